@@ -1,8 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import datetime
 import sys
 import os
+import threading
+import time
 from neo4j.exceptions import ConstraintError
 
 # Import functions from main.py
@@ -13,8 +18,17 @@ try:
         publicaciones_por_usuario, amigos_en_comun, top_publicaciones,
         sugerencias_de_amigos, UsuarioInput, PublicacionInput,
         get_all_usuarios, delete_all, insert_usuario, find_usuario,
-        usuario_to_str, publicacion_to_str
+        usuario_to_str, publicacion_to_str, actualizar_publicacion,
+        eliminar_publicacion, actualizar_etiquetas, top_publicaciones_tendencia,
+        top_etiquetas_tendencia, refrescar_tendencias, camino,
+        usuarios_pagina, contar_usuarios, contar_publicaciones,
+        emails_usuarios, eliminar_amistad, create_seguimiento,
+        eliminar_seguimiento, eliminar_usuario, publicaciones_en_rango,
+        find_usuarios, publicaciones_por_usuarios, amigos_de, seguidores,
+        seguidos, contar_seguimientos
     )
+    from likes import AgregadorLikes
+    from recomendaciones import Recomendador
 except ImportError:
     # Fallback implementations for demonstration
     print("BUT THIS IS A DEMO, NO DB CONNECTION")
@@ -30,24 +44,93 @@ except ImportError:
     def create_amistad(driver, email_a, email_b):
         print(f"Creating friendship between {email_a} and {email_b}")
     
-    def publicaciones_por_usuario(driver, email):
-        return [{"id": "1", "contenido": "Sample post", "fecha": "2025-01-01", "likes": 5, "etiquetas": ["sample"]}]
+    def publicaciones_por_usuario(driver, email, skip=0, limit=None, orden="fecha", descendente=True):
+        return [{"id": "1", "contenido": "Sample post", "fecha": "2025-01-01", "likes": 5, "etiquetas": ["sample"]}][skip:]
     
     def amigos_en_comun(driver, email1, email2):
         return ["Common Friend 1", "Common Friend 2"]
     
-    def top_publicaciones(driver, limit=5):
-        return [{"id": "1", "autor": "Sample User", "contenido": "Top post", "likes": 10}]
+    def top_publicaciones(driver, skip=0, limit=5, orden="likes", descendente=True):
+        return [{"id": "1", "autor": "Sample User", "contenido": "Top post", "likes": 10}][skip:]
     
     def sugerencias_de_amigos(driver, email):
         return ["Suggested Friend 1", "Suggested Friend 2"]
     
+    def amigos_de(driver, email):
+        return [{"email": "friend@mail.com", "nombre": "Sample Friend"}]
+    
+    def seguidores(driver, email, cursor=None, limit=20):
+        return [{"email": "follower@mail.com", "nombre": "Sample Follower", "desde": "2025-01-01"}], None
+    
+    def seguidos(driver, email, cursor=None, limit=20):
+        return [{"email": "followed@mail.com", "nombre": "Sample Followed", "desde": "2025-01-01"}], None
+    
+    def contar_seguimientos(driver, email):
+        return {"seguidores": 1, "seguidos": 1}
+    
     def get_all_usuarios(driver):
         return ["ana@mail.com", "bruno@mail.com", "carla@mail.com", "diego@mail.com", "elena@mail.com"]
     
+    def emails_usuarios(driver):
+        return ["ana@mail.com", "bruno@mail.com", "carla@mail.com", "diego@mail.com", "elena@mail.com"]
+    
+    def eliminar_amistad(driver, email_a, email_b):
+        print(f"Removing friendship between {email_a} and {email_b}")
+    
+    def create_seguimiento(driver, seguidor, seguido):
+        print(f"{seguidor} is now following {seguido}")
+    
+    def eliminar_seguimiento(driver, seguidor, seguido):
+        print(f"{seguidor} has stopped following {seguido}")
+    
+    def eliminar_usuario(driver, email):
+        print(f"Deleting user: {email}")
+    
+    def usuarios_pagina(driver, skip=0, limit=100, orden="email", descendente=False):
+        return [{"id": "U001", "nombre": "Sample User", "email": "sample@mail.com", "fechaRegistro": "2025-01-01"}][skip:]
+    
+    def contar_usuarios(driver):
+        return 1
+    
+    def contar_publicaciones(driver, email=None):
+        return 1
+    
+    def find_usuarios(driver, emails):
+        return {email: {"email": email, "nombre": email.split("@")[0].title()} for email in emails}
+    
+    def publicaciones_por_usuarios(driver, emails, por_usuario=3):
+        return {email: [] for email in emails}
+    
+    def publicaciones_en_rango(driver, email, desde, hasta, cursor=None, limit=20):
+        return [{"id": "1", "autor": "Sample User", "contenido": "Archived post", "fecha": desde, "likes": 1}], None
+    
     def delete_all(driver):
         print("Deleting all data")
     
+    def actualizar_publicacion(driver, post_id, contenido, likes):
+        print(f"Updating post {post_id}: {contenido}")
+    
+    def eliminar_publicacion(driver, post_id):
+        print(f"Deleting post: {post_id}")
+    
+    def actualizar_etiquetas(driver, post_id, etiquetas):
+        print(f"Updating tags of post {post_id}: {etiquetas}")
+    
+    def top_publicaciones_tendencia(driver, ventana="semana", limit=5):
+        return [{"id": "1", "autor": "Sample User", "contenido": "Trending post", "likes": 10}]
+    
+    def top_etiquetas_tendencia(driver, ventana="semana", limit=5):
+        return [{"etiqueta": "sample", "posts": 3, "likes": 10}]
+    
+    def refrescar_tendencias(driver, todas=False, lote=100):
+        return 0
+    
+    def camino(driver, email_a, email_b, max_depth=6):
+        return [email_a, "common@mail.com", email_b]
+    
+    AgregadorLikes = None
+    Recomendador = None
+    
     class UsuarioInput:
         def __init__(self, id, nombre, email, fechaRegistro):
             self.id = id
@@ -62,6 +145,264 @@ except ImportError:
             self.likes = likes
             self.etiquetas = etiquetas
 
+# Interval between trending bucket refreshes
+TRENDING_REFRESH_MS = 60_000
+
+# Prefetch of the selected user's views: wait before starting (so scrolling
+# through the user list costs nothing), users kept and age of a usable result
+PREFETCH_DELAY_S = 0.3
+PREFETCH_USERS = 8
+PREFETCH_TTL_S = 60
+# Rows per page of VirtualTreeview; the prefetched first page must match it
+PAGE_SIZE = 100
+
+# Table columns: (key, heading, width, sortable)
+GLOBAL_POST_COLUMNS = [
+    ("id", "ID", 120, True), ("autor", "Author", 100, True),
+    ("contenido", "Content", 320, True), ("fecha", "Date", 90, True),
+    ("likes", "Likes", 60, True), ("etiquetas", "Tags", 150, False),
+]
+USER_POST_COLUMNS = [c for c in GLOBAL_POST_COLUMNS if c[0] != "autor"]
+# The archive is always newest first, so its columns are not sortable
+ARCHIVE_COLUMNS = [(key, heading, width, False) for key, heading, width, _ in GLOBAL_POST_COLUMNS]
+# Followers and followings come newest first by cursor, so they are not sortable
+FOLLOW_COLUMNS = [
+    ("nombre", "Name", 160, False), ("email", "Email", 220, False), ("desde", "Since", 200, False),
+]
+USER_COLUMNS = [
+    ("id", "ID", 80, True), ("nombre", "Name", 160, True),
+    ("email", "Email", 220, True), ("fechaRegistro", "Registered", 100, True),
+]
+
+
+class CursorPager:
+    """
+    Adapts a keyset-paginated fetch_page(cursor, limit) -> (rows, next_cursor)
+    to the skip-based fetch of VirtualTreeview. The cursor where each page
+    starts is remembered, so scrolling back and forth never re-reads the
+    listing from the beginning.
+    """
+    def __init__(self, fetch_page: Callable):
+        self.fetch_page = fetch_page
+        self.cursors: Dict[int, Any] = {0: None}
+
+    def __call__(self, skip, limit, sort_key=None, descending=False):
+        start = max(offset for offset in self.cursors if offset <= skip)
+        while True:
+            rows, next_cursor = self.fetch_page(self.cursors[start], limit)
+            if next_cursor is not None:
+                self.cursors[start + len(rows)] = next_cursor
+            if start >= skip:
+                return rows
+            if next_cursor is None:
+                return []
+            start += len(rows)
+
+
+class Prefetcher:
+    """
+    Loads the views of the selected user in a single background thread so
+    the first click after switching users renders from memory. Each loader
+    in loaders(email) runs one at a time after PREFETCH_DELAY_S; selecting
+    another user drops whatever is still pending for the previous one.
+    Results are kept per user in an LRU of PREFETCH_USERS entries and are
+    served for PREFETCH_TTL_S. A view opened while its prefetch is still in
+    flight shares that query through the single-flight reads of database.py.
+    """
+    def __init__(self, loaders: Dict[str, Callable[[str], Any]]):
+        self.loaders = loaders
+        self.cache: "OrderedDict[str, Dict[str, tuple]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.pending: Optional[str] = None
+        self.generation = 0
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name="prefetch", daemon=True)
+        self.thread.start()
+
+    def select(self, email: str):
+        with self.lock:
+            self.pending = email
+            self.generation += 1
+            self.wakeup.notify()
+
+    def get(self, email: str, kind: str):
+        """Prefetched result, or None if missing or older than PREFETCH_TTL_S"""
+        with self.lock:
+            entry = self.cache.get(email, {}).get(kind)
+            if entry is None or time.monotonic() - entry[0] > PREFETCH_TTL_S:
+                return None
+            self.cache.move_to_end(email)
+            return entry[1]
+
+    def invalidate(self, *emails: str):
+        """Forget the given users, or everyone if none is given"""
+        with self.lock:
+            if not emails:
+                self.cache.clear()
+            for email in emails:
+                self.cache.pop(email, None)
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            self.generation += 1
+            self.wakeup.notify()
+
+    def current(self, generation: int) -> bool:
+        with self.lock:
+            return not self.stopped and self.generation == generation
+
+    def run(self):
+        while True:
+            with self.lock:
+                while self.pending is None and not self.stopped:
+                    self.wakeup.wait()
+                if self.stopped:
+                    return
+                email, generation = self.pending, self.generation
+                self.pending = None
+            time.sleep(PREFETCH_DELAY_S)
+            for kind, loader in self.loaders.items():
+                if not self.current(generation):
+                    break
+                if self.get(email, kind) is not None:
+                    continue
+                try:
+                    value = loader(email)
+                except Exception:
+                    continue  # the view will run the query itself and report the error
+                with self.lock:
+                    self.cache.setdefault(email, {})[kind] = (time.monotonic(), value)
+                    self.cache.move_to_end(email)
+                    while len(self.cache) > PREFETCH_USERS:
+                        self.cache.popitem(last=False)
+
+
+class VirtualTreeview(ttk.Frame):
+    """
+    Table that keeps only the visible rows in a ttk.Treeview. Rows are fetched
+    from the backend one page at a time as the user scrolls, a bounded number
+    of pages is cached, and clicking a sortable heading re-queries the backend
+    with that order.
+
+    fetch(skip, limit, sort_key, descending) returns a list of row dicts;
+    count() returns the total number of rows, or the table grows as pages load.
+    """
+    def __init__(self, parent, title, columns, fetch: Callable, count: Optional[Callable] = None,
+                 sort_key=None, descending=False, page_size=100, max_pages=20, height=20):
+        super().__init__(parent)
+        self.columns = columns
+        self.fetch = fetch
+        self.count = count
+        self.sort_key = sort_key
+        self.descending = descending
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.height = height
+        self.pages: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+        self.total = 0
+        self.top = 0
+
+        self.title_var = tk.StringVar(value=title)
+        self.title = title
+        ttk.Label(self, textvariable=self.title_var).grid(row=0, column=0, sticky=tk.W)
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in columns], show="headings",
+                                 height=height, selectmode="browse")
+        for key, heading, width, sortable in columns:
+            self.tree.heading(key, text=heading,
+                              command=(lambda k=key: self.sort_by(k)) if sortable else "")
+            self.tree.column(key, width=width, stretch=key == "contenido")
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        # Scrolling moves the window over the rows instead of the widget contents
+        for widget in (self.tree, self.scrollbar):
+            widget.bind("<MouseWheel>", self.on_mousewheel)
+            widget.bind("<Button-4>", lambda e: self.scroll_to(self.top - 3))
+            widget.bind("<Button-5>", lambda e: self.scroll_to(self.top + 3))
+        self.tree.bind("<Prior>", lambda e: self.scroll_to(self.top - self.height))
+        self.tree.bind("<Next>", lambda e: self.scroll_to(self.top + self.height))
+
+        self.reload()
+
+    def reload(self):
+        """Drop cached pages and show the first rows with the current order"""
+        self.pages.clear()
+        self.total = self.count() if self.count else 0
+        self.top = 0
+        self.render()
+
+    def sort_by(self, key):
+        """Sort by a column on the backend; clicking again reverses the order"""
+        self.descending = not self.descending if key == self.sort_key else False
+        self.sort_key = key
+        self.reload()
+
+    def page(self, index: int) -> List[Dict[str, Any]]:
+        if index in self.pages:
+            self.pages.move_to_end(index)
+            return self.pages[index]
+        rows = self.fetch(index * self.page_size, self.page_size, self.sort_key, self.descending)
+        self.pages[index] = rows
+        if len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        if not self.count:
+            # Unknown total: grow it as pages arrive
+            loaded = index * self.page_size + len(rows)
+            more = self.page_size if len(rows) == self.page_size else 0
+            self.total = max(self.total, loaded + more)
+        return rows
+
+    def rows(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        result = []
+        for index in range(start // self.page_size, (stop - 1) // self.page_size + 1):
+            rows = self.page(index)
+            offset = index * self.page_size
+            result.extend(rows[max(start - offset, 0):stop - offset])
+            if len(rows) < self.page_size:
+                break
+        return result
+
+    def render(self):
+        visible = self.rows(self.top, self.top + self.height) if self.height else []
+        self.tree.delete(*self.tree.get_children())
+        for row in visible:
+            self.tree.insert("", tk.END, values=[self.format(row.get(c[0])) for c in self.columns])
+        if self.count is None and len(visible) < self.height:
+            self.total = self.top + len(visible)
+        total = max(self.total, 1)
+        self.scrollbar.set(self.top / total, min((self.top + self.height) / total, 1.0))
+        shown = f"{self.top + 1}-{self.top + len(visible)}" if visible else "0"
+        self.title_var.set(f"=== {self.title} (showing {shown} of {self.total}) ===")
+
+    @staticmethod
+    def format(value):
+        if isinstance(value, (list, tuple)):
+            return ", ".join(str(v) for v in value)
+        return "" if value is None else str(value)
+
+    def scroll_to(self, top: int):
+        top = max(0, min(top, self.total - self.height))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * self.total))
+        elif action == "scroll":
+            step = self.height if unit == "pages" else 1
+            self.scroll_to(self.top + int(value) * step)
+
+    def on_mousewheel(self, event):
+        self.scroll_to(self.top - int(event.delta / 120) * 3)
+
 class SocialApp:
     def __init__(self, root):
         self.root = root
@@ -75,6 +416,29 @@ class SocialApp:
             messagebox.showerror("Database Error", f"Could not connect to database: {e}")
             self.driver = None
         
+        # Likes are coalesced per post and written once per flush interval
+        self.likes = AgregadorLikes(self.driver) if self.driver and AgregadorLikes else None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Tag-affinity recommender, built on first use. It is only touched from
+        # its own worker thread, so building the matrix never blocks the UI
+        self.recomendador = None
+        self.recommender_jobs = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recommender")
+        
+        # One-off queries behind buttons run here and render through
+        # in_background, so Tk keeps repainting
+        self.query_jobs = ThreadPoolExecutor(max_workers=2, thread_name_prefix="queries")
+        
+        # Background loading of the selected user's views
+        self.prefetch = Prefetcher({
+            "posts": lambda email: (
+                publicaciones_por_usuario(self.driver, email, 0, PAGE_SIZE, "fecha", True),
+                contar_publicaciones(self.driver, email),
+            ),
+            "suggestions": lambda email: sugerencias_de_amigos(self.driver, email),
+            "friends": lambda email: amigos_de(self.driver, email),
+        }) if self.driver else None
+        
         # Current user
         self.current_user = tk.StringVar()
         
@@ -84,9 +448,9 @@ class SocialApp:
         # Load initial data
         self.refresh_users()
 
-        # For pagination, LIMIT is always 5
-        self.post_skip = 0
-        self.post_limit = 5
+        # Periodic refresh of the dirty trending buckets, on its own worker
+        self.trending_jobs = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trending")
+        self.root.after(TRENDING_REFRESH_MS, self.refresh_trending_job)
     
     def create_widgets(self):
         # Main frame
@@ -113,12 +477,22 @@ class SocialApp:
                   command=self.view_global_posts).pack(side=tk.LEFT, padx=5)
         ttk.Button(social_frame, text="View My Posts", 
                   command=self.view_my_posts).pack(side=tk.LEFT, padx=5)
+        ttk.Button(social_frame, text="My Friends", 
+                  command=self.view_my_friends).pack(side=tk.LEFT, padx=5)
+        ttk.Button(social_frame, text="Post Archive", 
+                  command=self.view_archive).pack(side=tk.LEFT, padx=5)
+        ttk.Button(social_frame, text="Trending", 
+                  command=self.view_trending).pack(side=tk.LEFT, padx=5)
         ttk.Button(social_frame, text="Common Friends", 
                   command=self.view_common_friends).pack(side=tk.LEFT, padx=5)
         ttk.Button(social_frame, text="Friend Suggestions", 
                   command=self.view_friend_suggestions).pack(side=tk.LEFT, padx=5)
+        ttk.Button(social_frame, text="Follow Suggestions", 
+                  command=self.view_follow_suggestions).pack(side=tk.LEFT, padx=5)
         ttk.Button(social_frame, text="Create Post", 
                   command=self.create_post).pack(side=tk.LEFT, padx=5)
+        ttk.Button(social_frame, text="Like Post", 
+                  command=self.like_post).pack(side=tk.LEFT, padx=5)
         ttk.Button(social_frame, text="Add Friend", 
                   command=self.add_friend).pack(side=tk.LEFT, padx=5)
         ttk.Button(social_frame, text="Remove Friend", 
@@ -127,6 +501,10 @@ class SocialApp:
                   command=self.follow_user).pack(side=tk.LEFT, padx=5)
         ttk.Button(social_frame, text="Stop Following", 
                   command=self.stop_following).pack(side=tk.LEFT, padx=5)
+        ttk.Button(social_frame, text="Followers", 
+                  command=lambda: self.view_follows("seguidores")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(social_frame, text="Following", 
+                  command=lambda: self.view_follows("seguidos")).pack(side=tk.LEFT, padx=5)
         
         
         
@@ -150,6 +528,8 @@ class SocialApp:
         # Post CRUD buttons
         ttk.Button(crud_frame, text="Update Post", 
                   command=self.update_post).pack(side=tk.LEFT, padx=2)
+        ttk.Button(crud_frame, text="Edit Post Tags", 
+                  command=self.edit_post_tags).pack(side=tk.LEFT, padx=2)
         ttk.Button(crud_frame, text="Delete Post", 
                   command=self.delete_post).pack(side=tk.LEFT, padx=2)
         
@@ -158,18 +538,28 @@ class SocialApp:
         self.results_text.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
         
         # Scrollbar for results
-        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.results_text.yview)
-        scrollbar.grid(row=3, column=2, sticky=(tk.N, tk.S), pady=10)
-        self.results_text.configure(yscrollcommand=scrollbar.set)
+        self.results_scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.results_text.yview)
+        self.results_scrollbar.grid(row=3, column=2, sticky=(tk.N, tk.S), pady=10)
+        self.results_text.configure(yscrollcommand=self.results_scrollbar.set)
+
+        # Table view for large listings, shown in place of the text area
+        self.main_frame = main_frame
+        self.results_table = None
 
-        # Pagination buttons for global posts
-        self.pagination_frame = ttk.Frame(main_frame)
-        self.pagination_frame.grid(row=4, column=0, columnspan=2, pady=5)
-        self.prev_btn = ttk.Button(self.pagination_frame, text="← Previous", command=self.prev_posts)
-        self.next_btn = ttk.Button(self.pagination_frame, text="Next →", command=self.next_posts)
-        self.prev_btn.pack(side=tk.LEFT, padx=5)
-        self.next_btn.pack(side=tk.LEFT, padx=5)
-        self.pagination_frame.grid_remove()  # Hide by default
+        # Degrees of separation panel
+        connections_frame = ttk.LabelFrame(main_frame, text="Degrees of Separation", padding="5")
+        connections_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        ttk.Label(connections_frame, text="Other user:").pack(side=tk.LEFT, padx=2)
+        self.separation_email = ttk.Entry(connections_frame, width=25)
+        self.separation_email.pack(side=tk.LEFT, padx=2)
+        ttk.Label(connections_frame, text="Max depth:").pack(side=tk.LEFT, padx=2)
+        self.separation_depth = ttk.Spinbox(connections_frame, from_=1, to=10, width=4)
+        self.separation_depth.set("6")
+        self.separation_depth.pack(side=tk.LEFT, padx=2)
+        ttk.Button(connections_frame, text="Find Path", 
+                  command=self.view_separation).pack(side=tk.LEFT, padx=5)
+        self.separation_result = tk.StringVar()
+        ttk.Label(connections_frame, textvariable=self.separation_result).pack(side=tk.LEFT, padx=5)
 
     
     def refresh_users(self):
@@ -183,14 +573,11 @@ class SocialApp:
             return
         
         try:
-            # This function would need to be added to main.py
-            # For now, we'll use a direct query
-            with self.driver.session() as session:
-                result = session.run("MATCH (u:Usuario) RETURN u.email AS email")
-                users = [record["email"] for record in result]
-                self.user_combo['values'] = users
-                if users:
-                    self.current_user.set(users[0])
+            users = emails_usuarios(self.driver)
+            self.user_combo['values'] = users
+            if users:
+                self.current_user.set(users[0])
+                self.prefetch.select(users[0])
         except Exception as e:
             messagebox.showerror("Error", f"Could not load users: {e}")
     
@@ -198,38 +585,178 @@ class SocialApp:
         """Handle user selection change"""
         self.clear_results()
         self.results_text.insert(tk.END, f"Selected user: {self.current_user.get()}\n")
+        if self.prefetch:
+            self.prefetch.select(self.current_user.get())
+    
+    def prefetched(self, email, kind):
+        """Result loaded in the background for email, or None"""
+        return self.prefetch.get(email, kind) if self.prefetch else None
+    
+    def invalidate(self, *emails):
+        """Drop prefetched views that a write has made stale (all if no email)"""
+        if self.prefetch:
+            self.prefetch.invalidate(*emails)
+    
+    def on_close(self):
+        """Flush pending likes and stop the background workers before closing the window"""
+        if self.likes:
+            self.likes.cerrar()
+        if self.prefetch:
+            self.prefetch.stop()
+        self.recommender_jobs.shutdown(wait=False, cancel_futures=True)
+        self.trending_jobs.shutdown(wait=False, cancel_futures=True)
+        self.query_jobs.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+    
+    def in_background(self, worker: ThreadPoolExecutor, work: Callable[[], Any],
+                      done: Callable[[Any], None]):
+        """Run work() on worker and hand its result to done() on the Tk thread"""
+        def post(future: Future):
+            try:
+                self.root.after(0, self.finish_background, future, done)
+            except (RuntimeError, tk.TclError):
+                pass  # the window was closed meanwhile
+        worker.submit(work).add_done_callback(post)
+    
+    def finish_background(self, future: Future, done: Callable[[Any], None]):
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            messagebox.showerror("Database Error", str(e))
+            return
+        done(result)
+    
+    def recommender_changed(self, email: str, etiquetas: Optional[List[str]] = None,
+                            anteriores: List[str] = ()):
+        """
+        Apply a post by email whose tags went from anteriores to etiquetas
+        (new: no anteriores, deleted: no etiquetas) to the recommender. With
+        no tags, email followed or unfollowed someone.
+        """
+        def apply():
+            if self.recomendador is None:
+                return
+            if etiquetas is None:
+                self.recomendador.invalidar(email)
+            else:
+                self.recomendador.editar_publicacion(email, anteriores, etiquetas)
+        self.recommender_jobs.submit(apply)
     
     def clear_results(self):
         """Clear the results text area"""
+        if self.results_table:
+            self.results_table.destroy()
+            self.results_table = None
+            self.results_text.grid()
+            self.results_scrollbar.grid()
         self.results_text.delete(1.0, tk.END)
-        self.pagination_frame.grid_remove()
+    
+    def show_table(self, title, columns, fetch, count=None, sort_key=None, descending=False):
+        """Replace the text area with a virtualized table fed by fetch"""
+        self.clear_results()
+        self.results_text.grid_remove()
+        self.results_scrollbar.grid_remove()
+        self.results_table = VirtualTreeview(
+            self.main_frame, title, columns, fetch, count=count,
+            sort_key=sort_key, descending=descending
+        )
+        self.results_table.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
     
     # =========================================================================
     # SOCIAL FEATURES (existing functions)
     # =========================================================================
     
     def view_global_posts(self):
-        """Display global posts with pagination"""
-        posts = top_publicaciones(self.driver, self.post_skip) if self.driver else top_publicaciones(None, self.post_skip)
+        """Display global posts, loaded page by page as the table scrolls"""
+        self.show_table(
+            "GLOBAL POSTS", GLOBAL_POST_COLUMNS,
+            lambda skip, limit, key, desc: top_publicaciones(self.driver, skip, limit, key, desc),
+            count=lambda: contar_publicaciones(self.driver),
+            sort_key="likes", descending=True
+        )
+
+    def view_archive(self):
+        """Display posts in a date range, newest first, fetched with a keyset cursor"""
+        today = datetime.date.today()
+        desde = simpledialog.askstring(
+            "Post Archive", "From date (YYYY-MM-DD):",
+            initialvalue=(today - datetime.timedelta(days=30)).isoformat()
+        )
+        if not desde:
+            return
+        hasta = simpledialog.askstring("Post Archive", "To date (YYYY-MM-DD):", initialvalue=today.isoformat())
+        if not hasta:
+            return
+        try:
+            datetime.date.fromisoformat(desde)
+            datetime.date.fromisoformat(hasta)
+        except ValueError:
+            messagebox.showwarning("Warning", "Dates must use the YYYY-MM-DD format")
+            return
+        
+        user_email = self.current_user.get()
+        email = user_email if user_email and messagebox.askyesno(
+            "Post Archive", f"Only posts by {user_email}?") else None
+        
+        scope = f"{email}'s POSTS" if email else "ALL POSTS"
+        self.show_table(
+            f"{scope} FROM {desde} TO {hasta}", ARCHIVE_COLUMNS,
+            CursorPager(lambda cursor, limit: publicaciones_en_rango(
+                self.driver, email, desde, hasta, cursor, limit))
+        )
+
+    def view_trending(self):
+        """Display trending posts and tags for a time window"""
+        ventana = simpledialog.askstring(
+            "Trending",
+            "Window (dia, semana, mes):",
+            initialvalue="semana"
+        )
+        
+        if not ventana:
+            return
+        
+        def load():
+            try:
+                return (top_publicaciones_tendencia(self.driver, ventana),
+                        top_etiquetas_tendencia(self.driver, ventana))
+            except ValueError as e:
+                return e
+        
+        self.clear_results()
+        self.results_text.insert(tk.END, f"Loading trending ({ventana})...\n")
+        self.in_background(self.query_jobs, load, lambda result: self.show_trending(ventana, result))
+    
+    def show_trending(self, ventana, result):
+        """Fill the results area with the lists loaded by view_trending"""
+        if isinstance(result, ValueError):
+            self.clear_results()
+            messagebox.showwarning("Warning", str(result))
+            return
+        
+        posts, tags = result
         self.clear_results()
-        self.results_text.insert(tk.END, f"=== GLOBAL POSTS (Showing {self.post_skip+1}-{self.post_skip+len(posts)}) ===\n\n")
+        self.results_text.insert(tk.END, f"=== TRENDING TAGS ({ventana}) ===\n\n")
+        for tag in tags:
+            self.results_text.insert(tk.END, f"• {tag['etiqueta']}: {tag['posts']} posts, {tag['likes']} likes\n")
+        
+        self.results_text.insert(tk.END, f"\n=== TRENDING POSTS ({ventana}) ===\n\n")
         for post in posts:
             self.results_text.insert(tk.END, publicacion_to_str(post) + "\n")
-        # Show pagination buttons
-        self.pagination_frame.grid()
-        self.prev_btn['state'] = tk.NORMAL if self.post_skip > 0 else tk.DISABLED
-        self.next_btn['state'] = tk.NORMAL if len(posts) == self.post_limit else tk.DISABLED
-
-    def prev_posts(self):
-        """Show previous page of posts"""
-        if self.post_skip >= self.post_limit:
-            self.post_skip -= self.post_limit
-            self.view_global_posts()
-
-    def next_posts(self):
-        """Show next page of posts"""
-        self.post_skip += self.post_limit
-        self.view_global_posts()
+
+    def refresh_trending_job(self):
+        """Recompute the trending buckets changed since the last run"""
+        def refresh():
+            if self.driver:
+                try:
+                    refrescar_tendencias(self.driver)
+                except Exception as e:
+                    print(f"Could not refresh trending: {e}")
+        # The next run is scheduled once this one is done, so runs never overlap
+        self.in_background(self.trending_jobs, refresh,
+                           lambda _: self.root.after(TRENDING_REFRESH_MS, self.refresh_trending_job))
 
     def view_my_posts(self):
         """Display current user's posts"""
@@ -238,17 +765,66 @@ class SocialApp:
             messagebox.showwarning("Warning", "Please select a user first")
             return
         
-        if not self.driver:
-            # Demo data
-            posts = publicaciones_por_usuario(None, user_email)
-        else:
-            posts = publicaciones_por_usuario(self.driver, user_email)
+        first_page, total = self.prefetched(user_email, "posts") or (None, None)
         
+        def fetch(skip, limit, key, desc):
+            if first_page is not None and (skip, limit, key, desc) == (0, PAGE_SIZE, "fecha", True):
+                return first_page
+            return publicaciones_por_usuario(self.driver, user_email, skip, limit, key, desc)
+        
+        self.show_table(
+            f"{user_email}'s POSTS", USER_POST_COLUMNS, fetch,
+            count=lambda: contar_publicaciones(self.driver, user_email) if total is None else total,
+            sort_key="fecha", descending=True
+        )
+    
+    def view_my_friends(self):
+        """Display the current user's friends"""
+        user_email = self.current_user.get()
+        if not user_email:
+            messagebox.showwarning("Warning", "Please select a user first")
+            return
+        
+        friends = self.prefetched(user_email, "friends")
+        if friends is None:
+            self.clear_results()
+            self.results_text.insert(tk.END, f"Loading friends of {user_email}...\n")
+            self.in_background(self.query_jobs, lambda: amigos_de(self.driver, user_email),
+                               lambda result: self.show_friends(user_email, result))
+        else:
+            self.show_friends(user_email, friends)
+    
+    def show_friends(self, user_email, friends):
+        """Fill the results area with the friends loaded by view_my_friends"""
         self.clear_results()
-        self.results_text.insert(tk.END, f"=== {user_email}'s POSTS ===\n\n")
+        self.results_text.insert(tk.END, f"=== FRIENDS OF {user_email} ({len(friends)}) ===\n\n")
         
-        for post in posts:
-            self.results_text.insert(tk.END, publicacion_to_str(post) + "\n")
+        if friends:
+            for friend in friends:
+                self.results_text.insert(tk.END, f"• {friend['nombre']} ({friend['email']})\n")
+        else:
+            self.results_text.insert(tk.END, "No friends yet.\n")
+    
+    def view_follows(self, direction):
+        """Display the current user's followers ("seguidores") or followings ("seguidos")"""
+        user_email = self.current_user.get()
+        if not user_email:
+            messagebox.showwarning("Warning", "Please select a user first")
+            return
+        
+        fetch_page = seguidores if direction == "seguidores" else seguidos
+        title = "FOLLOWERS" if direction == "seguidores" else "FOLLOWING"
+        # The count is a stored counter; the table itself grows page by page,
+        # so a jump to the end never walks millions of rows
+        self.clear_results()
+        self.results_text.insert(tk.END, f"Loading {title.lower()} of {user_email}...\n")
+        self.in_background(
+            self.query_jobs, lambda: contar_seguimientos(self.driver, user_email)[direction],
+            lambda total: self.show_table(
+                f"{user_email}'s {title} ({total})", FOLLOW_COLUMNS,
+                CursorPager(lambda cursor, limit: fetch_page(self.driver, user_email, cursor, limit))
+            )
+        )
     
     def view_common_friends(self):
         """Display common friends with another user"""
@@ -289,10 +865,8 @@ class SocialApp:
             messagebox.showwarning("Warning", "Please select a user first")
             return
         
-        if not self.driver:
-            # Demo data
-            suggestions = sugerencias_de_amigos(None, user_email)
-        else:
+        suggestions = self.prefetched(user_email, "suggestions")
+        if suggestions is None:
             suggestions = sugerencias_de_amigos(self.driver, user_email)
         
         self.clear_results()
@@ -304,6 +878,79 @@ class SocialApp:
         else:
             self.results_text.insert(tk.END, "No friend suggestions available.\n")
     
+    def view_follow_suggestions(self):
+        """Display users to follow with similar tag interests"""
+        user_email = self.current_user.get()
+        if not user_email:
+            messagebox.showwarning("Warning", "Please select a user first")
+            return
+        
+        def load():
+            if not self.driver or not Recomendador:
+                suggestions = [("suggested@mail.com", 1.0)]
+            else:
+                if self.recomendador is None:
+                    self.recomendador = Recomendador(self.driver)
+                    self.recomendador.construir()
+                suggestions = self.recomendador.recomendar(user_email)
+            # Names and latest posts of every suggestion in two round trips
+            emails = [email for email, _ in suggestions]
+            return (suggestions, find_usuarios(self.driver, emails),
+                    publicaciones_por_usuarios(self.driver, emails, 2))
+        
+        self.clear_results()
+        self.results_text.insert(tk.END, f"Loading users to follow for {user_email}...\n")
+        self.in_background(self.recommender_jobs, load,
+                           lambda result: self.show_follow_suggestions(user_email, *result))
+    
+    def show_follow_suggestions(self, user_email, suggestions, users, posts):
+        """Fill the results area with the suggestions loaded by view_follow_suggestions"""
+        self.clear_results()
+        self.results_text.insert(tk.END, f"=== USERS TO FOLLOW FOR {user_email} ===\n\n")
+        
+        if suggestions:
+            for email, score in suggestions:
+                name = users.get(email, {}).get("nombre", email)
+                self.results_text.insert(tk.END, f"• {name} <{email}> (similarity {score:.2f})\n")
+                for post in posts.get(email, []):
+                    self.results_text.insert(tk.END, f"    {post['fecha']}: {post['contenido']}\n")
+        else:
+            self.results_text.insert(tk.END, "No follow suggestions available.\n")
+    
+    def view_separation(self):
+        """Display the degrees of separation and path to another user"""
+        user_email = self.current_user.get()
+        if not user_email:
+            messagebox.showwarning("Warning", "Please select a user first")
+            return
+        
+        other_email = self.separation_email.get().strip()
+        if not other_email:
+            messagebox.showwarning("Warning", "Please enter the email of another user")
+            return
+        
+        try:
+            max_depth = int(self.separation_depth.get())
+        except ValueError:
+            messagebox.showwarning("Warning", "Max depth must be a valid number")
+            return
+        
+        # The BFS can take a while on a big graph: it runs on a worker and
+        # only the resulting line is set on the Tk thread
+        def load():
+            try:
+                path = camino(self.driver, user_email, other_email, max_depth)
+            except RuntimeError as e:
+                return str(e)
+            if path is None:
+                return f"Not connected within {max_depth} hops"
+            users = find_usuarios(self.driver, path)
+            names = [users.get(email, {}).get("nombre", email) for email in path]
+            return f"{len(path) - 1} degrees: " + " → ".join(names)
+        
+        self.separation_result.set(f"Searching up to {max_depth} hops...")
+        self.in_background(self.query_jobs, load, self.separation_result.set)
+    
     def create_post(self):
         """Create a new post for the current user"""
         user_email = self.current_user.get()
@@ -331,10 +978,37 @@ class SocialApp:
                 create_publicacion(self.driver, user_email, post_input)
             else:
                 create_publicacion(None, user_email, post_input)
+            self.invalidate(user_email)
+            
+            self.recommender_changed(user_email, etiquetas)
             
             messagebox.showinfo("Success", "Post created successfully!")
             self.view_my_posts()  # Refresh to show the new post
     
+    def like_post(self):
+        """Add a like to a post"""
+        post_id = simpledialog.askstring(
+            "Like Post", 
+            "Enter the ID of the post to like:",
+            initialvalue=""
+        )
+        
+        if not post_id:
+            return
+        
+        if self.likes:
+            self.likes.agregar(post_id)
+            stats = self.likes.estadisticas()
+            self.clear_results()
+            self.results_text.insert(tk.END, f"Liked post {post_id}\n\n")
+            self.results_text.insert(
+                tk.END,
+                f"Likes received: {stats['incrementos']}, rows written: {stats['escrituras']}, "
+                f"pending: {stats['pendientes']}, coalescing ratio: {stats['ratio_coalescencia']:.1f}\n"
+            )
+        else:
+            print(f"Liking post: {post_id}")
+    
     def add_friend(self):
         """Add a friend for the current user"""
         user_email = self.current_user.get()
@@ -361,6 +1035,7 @@ class SocialApp:
             create_amistad(self.driver, user_email, friend_email)
         else:
             create_amistad(None, user_email, friend_email)
+        self.invalidate(user_email, friend_email)
         
         messagebox.showinfo("Success", f"Friend request sent to {friend_email}!")
         self.view_friend_suggestions()  # Refresh suggestions
@@ -387,14 +1062,8 @@ class SocialApp:
             return
         
         # Remove the friendship
-        if self.driver:
-            with self.driver.session() as session:
-                session.run(
-                    "MATCH (a:Usuario {email: $user_email})-[r:AMIGO_DE]-(b:Usuario {email: $friend_email}) DELETE r",
-                    user_email=user_email, friend_email=friend_email
-                )
-        else:
-            print(f"Removing friendship between {user_email} and {friend_email}")
+        eliminar_amistad(self.driver, user_email, friend_email)
+        self.invalidate(user_email, friend_email)
         
         messagebox.showinfo("Success", f"Friend {friend_email} removed!")
         self.view_friend_suggestions()  # Refresh suggestions
@@ -421,15 +1090,8 @@ class SocialApp:
             return
         
         # Create the follow relationship
-        if self.driver:
-            with self.driver.session() as session:
-                session.run(
-                    "MATCH (a:Usuario {email: $user_email}), (b:Usuario {email: $follow_email}) "
-                    "MERGE (a)-[:SIGUE_A]->(b)",
-                    user_email=user_email, follow_email=follow_email
-                )
-        else:
-            print(f"{user_email} is now following {follow_email}")
+        create_seguimiento(self.driver, user_email, follow_email)
+        self.recommender_changed(user_email)
         
         messagebox.showinfo("Success", f"You are now following {follow_email}!")
     
@@ -455,14 +1117,8 @@ class SocialApp:
             return
         
         # Remove the follow relationship
-        if self.driver:
-            with self.driver.session() as session:
-                session.run(
-                    "MATCH (a:Usuario {email: $user_email})-[r:SIGUE_A]->(b:Usuario {email: $unfollow_email}) DELETE r",
-                    user_email=user_email, unfollow_email=unfollow_email
-                )
-        else:
-            print(f"{user_email} has stopped following {unfollow_email}")
+        eliminar_seguimiento(self.driver, user_email, unfollow_email)
+        self.recommender_changed(user_email)
         
         messagebox.showinfo("Success", f"You have stopped following {unfollow_email}!")
     # =========================================================================
@@ -498,21 +1154,13 @@ class SocialApp:
             self.refresh_users()  # Refresh the user list
     
     def list_users(self):
-        """List all users"""
-        if not self.driver:
-            # Demo data
-            users = get_all_usuarios(None)
-        else:
-            users = get_all_usuarios(self.driver)
-        
-        self.clear_results()
-        self.results_text.insert(tk.END, "=== ALL USERS ===\n\n")
-        
-        if users:
-            for user in users:
-                self.results_text.insert(tk.END, f"• {usuario_to_str(user)}\n")
-        else:
-            self.results_text.insert(tk.END, "No users found.\n")
+        """List all users, loaded page by page as the table scrolls"""
+        self.show_table(
+            "ALL USERS", USER_COLUMNS,
+            lambda skip, limit, key, desc: usuarios_pagina(self.driver, skip, limit, key, desc),
+            count=lambda: contar_usuarios(self.driver),
+            sort_key="email"
+        )
     
     def search_users(self):
         """Search for users by name or email"""
@@ -595,12 +1243,9 @@ class SocialApp:
             return
         
         # Delete the user
-        # This function would need to be implemented in main.py
-        if self.driver:
-            with self.driver.session() as session:
-                session.run("MATCH (u:Usuario {email: $email}) DETACH DELETE u", email=user_email)
-        else:
-            print(f"Deleting user: {user_email}")
+        eliminar_usuario(self.driver, user_email)
+        # Anyone cached may have lost a friend or a suggestion
+        self.invalidate()
         
         messagebox.showinfo("Success", "User deleted successfully!")
         self.refresh_users()  # Refresh the user list
@@ -625,19 +1270,42 @@ class SocialApp:
             contenido, likes = dialog.result
             
             # Update the post
-            # This function would need to be implemented in main.py
-            if self.driver:
-                with self.driver.session() as session:
-                    session.run(
-                        "MATCH (p:Publicación {id: $id}) SET p.contenido = $contenido,  p.likes = $likes",
-                        id=post_id, contenido=contenido, likes=likes
-                    )
-            else:
-                print(f"Updating post {post_id}: {contenido}")
+            actualizar_publicacion(self.driver, post_id, contenido, likes)
+            self.invalidate(self.current_user.get())
             
             messagebox.showinfo("Success", "Post updated successfully!")
             self.view_my_posts()  # Refresh to show the updated post
     
+    def edit_post_tags(self):
+        """Replace the tags of an existing post"""
+        post_id = simpledialog.askstring(
+            "Edit Post Tags", 
+            "Enter the ID of the post to edit:",
+            initialvalue=""
+        )
+        
+        if not post_id:
+            return
+        
+        tags = simpledialog.askstring(
+            "Edit Post Tags", 
+            "Tags (comma separated):",
+            initialvalue=""
+        )
+        
+        if tags is None:
+            return
+        
+        etiquetas = [tag.strip() for tag in tags.split(",") if tag.strip()]
+        previous = actualizar_etiquetas(self.driver, post_id, etiquetas)
+        self.invalidate(self.current_user.get())
+        if previous and previous[0]:
+            author, old_tags = previous
+            self.recommender_changed(author, etiquetas, old_tags)
+        
+        messagebox.showinfo("Success", "Post tags updated successfully!")
+        self.view_my_posts()  # Refresh to show the updated tags
+    
     def delete_post(self):
         """Delete a post"""
         post_id = simpledialog.askstring(
@@ -658,12 +1326,11 @@ class SocialApp:
             return
         
         # Delete the post
-        # This function would need to be implemented in main.py
-        if self.driver:
-            with self.driver.session() as session:
-                session.run("MATCH (p:Publicación {id: $id}) DETACH DELETE p", id=post_id)
-        else:
-            print(f"Deleting post: {post_id}")
+        previous = eliminar_publicacion(self.driver, post_id)
+        self.invalidate(self.current_user.get())
+        if previous and previous[0]:
+            author, old_tags = previous
+            self.recommender_changed(author, [], old_tags)
         
         messagebox.showinfo("Success", "Post deleted successfully!")
         self.view_my_posts()  # Refresh to show the updated list
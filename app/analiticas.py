@@ -0,0 +1,246 @@
+# analiticas.py
+# Analítica de grafo en el cliente, sin el plugin GDS: el grafo de usuarios se
+# descarga por páginas a arreglos CSR de NumPy (indptr int64, indices int32
+# sobre un id denso por usuario), se calculan PageRank, comunidades por
+# propagación de etiquetas e histogramas de grado, y los resultados se
+# escriben de vuelta como propiedades de Usuario en lotes con UNWIND.
+#
+#   python analiticas.py [--tipos AMIGO_DE SIGUE] [--sin-escritura]
+import argparse
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from consultas import ARISTAS_POR_USUARIO, EMAILS_USUARIOS, ESCRIBIR_PROPIEDADES_USUARIO, TIPOS_RELACION_USUARIOS
+from database import a_numpy, get_driver, leer_columnas
+
+PAGINA = 10_000
+LOTE_ESCRITURA = 10_000
+TIPOS_VALIDOS = TIPOS_RELACION_USUARIOS
+
+
+@dataclass
+class Grafo:
+    """Grafo dirigido en formato CSR: los vecinos de i son indices[indptr[i]:indptr[i+1]]."""
+    emails: np.ndarray   # emails ordenados; la posición es el id denso
+    indptr: np.ndarray   # int64, len n+1
+    indices: np.ndarray  # int32, len m
+
+    @property
+    def n(self) -> int:
+        return len(self.emails)
+
+    @property
+    def m(self) -> int:
+        return len(self.indices)
+
+    def origenes(self) -> np.ndarray:
+        """Id de origen de cada arista (int32, len m)."""
+        return np.repeat(np.arange(self.n, dtype=np.int32), np.diff(self.indptr))
+
+    def grado_salida(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def grado_entrada(self) -> np.ndarray:
+        return np.bincount(self.indices, minlength=self.n)
+
+
+# ------------------------------------------------------------
+# CARGA
+# ------------------------------------------------------------
+def _cargar_emails(driver, pagina: int) -> np.ndarray:
+    # Una sola lectura en streaming, en lotes de `pagina`. Se reordena aquí:
+    # _ids hace búsqueda binaria con la comparación de Python, que no tiene
+    # por qué coincidir con el ORDER BY de Neo4j fuera de ASCII
+    emails = a_numpy(leer_columnas(driver, EMAILS_USUARIOS, {"email": "O"}, fetch_size=pagina))["email"]
+    return np.sort(emails) if len(emails) else np.array([], dtype=str)
+
+
+def _ids(emails: np.ndarray, valores: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Ids (búsqueda binaria en emails) y máscara de los valores que están en la tabla."""
+    if not valores or not len(emails):
+        return np.zeros(len(valores), dtype=np.int64), np.zeros(len(valores), dtype=bool)
+    claves = np.array(valores)
+    pos = np.minimum(np.searchsorted(emails, claves), len(emails) - 1)
+    return pos, emails[pos] == claves
+
+
+def cargar_grafo(driver, tipos: Sequence[str] = TIPOS_VALIDOS, pagina: int = PAGINA) -> Grafo:
+    """
+    Descarga las aristas de los tipos indicados a un Grafo CSR. Los usuarios se
+    recorren por páginas ordenadas por email; origen y destino de cada arista
+    se buscan en la tabla de emails y se descartan las aristas de usuarios
+    creados o borrados después de leerla.
+    """
+    for t in tipos:
+        if t not in TIPOS_VALIDOS:
+            raise ValueError(f"Tipo de relación inválido: {t}")
+    q = ARISTAS_POR_USUARIO[tuple(t for t in TIPOS_VALIDOS if t in tipos)]
+    emails = _cargar_emails(driver, pagina)
+    n = len(emails)
+
+    bloques_origen: List[np.ndarray] = []
+    bloques_destino: List[np.ndarray] = []
+    desde = ""
+    with driver.session() as s:
+        while True:
+            filas = list(s.run(q, desde=desde, pagina=pagina))
+            if not filas:
+                break
+            origenes: List[str] = []
+            destinos: List[str] = []
+            for fila in filas:
+                origenes.extend([fila["email"]] * len(fila["destinos"]))
+                destinos.extend(fila["destinos"])
+            if destinos:
+                src, src_ok = _ids(emails, origenes)
+                dst, dst_ok = _ids(emails, destinos)
+                validas = src_ok & dst_ok
+                bloques_origen.append(src[validas])
+                bloques_destino.append(dst[validas].astype(np.int32))
+            desde = filas[-1]["email"]
+
+    src = np.concatenate(bloques_origen) if bloques_origen else np.array([], dtype=np.int64)
+    dst = np.concatenate(bloques_destino) if bloques_destino else np.array([], dtype=np.int32)
+    # Las páginas llegan ordenadas por email, así que src suele venir ya
+    # ordenado; el orden estable lo garantiza aunque Neo4j ordene distinto
+    orden = np.argsort(src, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return Grafo(emails=emails, indptr=indptr, indices=dst[orden])
+
+
+def no_dirigido(g: Grafo) -> Grafo:
+    """Simetriza el grafo quitando aristas duplicadas y lazos."""
+    src = g.origenes().astype(np.int64)
+    dst = g.indices.astype(np.int64)
+    a = np.concatenate([src, dst])
+    b = np.concatenate([dst, src])
+    claves = np.unique(a * g.n + b)
+    a, b = claves // g.n, claves % g.n
+    mascara = a != b
+    a, b = a[mascara], b[mascara]
+    indptr = np.zeros(g.n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(a, minlength=g.n), out=indptr[1:])
+    return Grafo(emails=g.emails, indptr=indptr, indices=b.astype(np.int32))
+
+
+# ------------------------------------------------------------
+# ALGORITMOS
+# ------------------------------------------------------------
+def pagerank(g: Grafo, amortiguacion: float = 0.85, tol: float = 1e-6, max_iter: int = 100) -> np.ndarray:
+    """PageRank por iteración de potencias; la masa de nodos sin salida se reparte uniforme."""
+    n = g.n
+    if n == 0:
+        return np.array([], dtype=np.float64)
+    src = g.origenes()
+    salida = g.grado_salida().astype(np.float64)
+    colgantes = salida == 0
+    inv_salida = np.divide(1.0, salida, out=np.zeros(n), where=~colgantes)
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        aportes = (rank * inv_salida)[src]
+        nuevo = np.bincount(g.indices, weights=aportes, minlength=n)
+        nuevo = amortiguacion * (nuevo + rank[colgantes].sum() / n) + (1.0 - amortiguacion) / n
+        delta = np.abs(nuevo - rank).sum()
+        rank = nuevo
+        if delta < tol:
+            break
+    return rank
+
+
+def propagacion_etiquetas(g: Grafo, max_iter: int = 20, semilla: int = 0) -> np.ndarray:
+    """
+    Detección de comunidades por propagación de etiquetas sobre el grafo no
+    dirigido. En cada iteración cada nodo adopta la etiqueta más frecuente
+    entre sus vecinos (empates a la menor); solo se actualiza la mitad de los
+    nodos por iteración para evitar oscilaciones.
+    """
+    u = no_dirigido(g)
+    n = u.n
+    etiquetas = np.arange(n, dtype=np.int32)
+    src = u.origenes()
+    rng = np.random.default_rng(semilla)
+    for _ in range(max_iter):
+        # Pares (nodo, etiqueta vecina) codificados en un int64 y ordenados:
+        # cada racha de claves iguales es una etiqueta y su cuenta en ese nodo
+        claves = src.astype(np.int64) * n + etiquetas[u.indices]
+        claves.sort()
+        corte = np.ones(len(claves), dtype=bool)
+        corte[1:] = claves[1:] != claves[:-1]
+        inicios = np.flatnonzero(corte)
+        cuentas = np.diff(np.append(inicios, len(claves)))
+        nodos, etqs = claves[inicios] // n, claves[inicios] % n
+        # Por nodo, la primera (menor) etiqueta con la cuenta máxima
+        inicio_nodo = np.flatnonzero(np.append(True, nodos[1:] != nodos[:-1]))
+        maximo = np.repeat(np.maximum.reduceat(cuentas, inicio_nodo),
+                           np.diff(np.append(inicio_nodo, len(nodos))))
+        candidatas = np.flatnonzero(cuentas == maximo)
+        nodos_c = nodos[candidatas]
+        primero = np.append(True, nodos_c[1:] != nodos_c[:-1])
+        mejor = etiquetas.copy()
+        mejor[nodos_c[primero]] = etqs[candidatas][primero]
+
+        if np.array_equal(mejor, etiquetas):
+            break
+        etiquetas = np.where(rng.random(n) < 0.5, mejor, etiquetas)
+    # Renumera las comunidades como 0..k-1
+    _, etiquetas = np.unique(etiquetas, return_inverse=True)
+    return etiquetas.astype(np.int32)
+
+
+def histograma_grados(g: Grafo) -> Dict[str, np.ndarray]:
+    """Histogramas de grado: histograma[k] = número de usuarios con grado k."""
+    return {
+        "salida": np.bincount(g.grado_salida()),
+        "entrada": np.bincount(g.grado_entrada()),
+    }
+
+
+# ------------------------------------------------------------
+# ESCRITURA
+# ------------------------------------------------------------
+def escribir_propiedades(driver, g: Grafo, propiedades: Dict[str, np.ndarray], lote: int = LOTE_ESCRITURA):
+    """Escribe arreglos por usuario como propiedades de Usuario, en lotes con UNWIND."""
+    nombres = list(propiedades)
+    with driver.session() as s:
+        for inicio in range(0, g.n, lote):
+            fin = min(inicio + lote, g.n)
+            columnas = [propiedades[k][inicio:fin].tolist() for k in nombres]
+            filas = [
+                {"email": email, "props": dict(zip(nombres, valores))}
+                for email, *valores in zip(g.emails[inicio:fin].tolist(), *columnas)
+            ]
+            s.execute_write(lambda tx: tx.run(ESCRIBIR_PROPIEDADES_USUARIO, filas=filas).consume())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analítica de grafo en el cliente")
+    parser.add_argument("--tipos", nargs="+", default=list(TIPOS_VALIDOS), choices=TIPOS_VALIDOS)
+    parser.add_argument("--sin-escritura", action="store_true", help="no escribe los resultados")
+    args = parser.parse_args()
+
+    with get_driver() as driver:
+        g = cargar_grafo(driver, args.tipos)
+        print(f"Grafo: {g.n} usuarios, {g.m} aristas")
+
+        rank = pagerank(g)
+        comunidades = propagacion_etiquetas(g)
+        grados = histograma_grados(g)
+
+        print("\nTop 10 por PageRank:")
+        for i in np.argsort(-rank)[:10]:
+            print(f"  {g.emails[i]}: {rank[i]:.6f}")
+        print(f"\nComunidades: {comunidades.max() + 1 if g.n else 0}")
+        print(f"Histograma grado de salida: {grados['salida'].tolist()}")
+        print(f"Histograma grado de entrada: {grados['entrada'].tolist()}")
+
+        if not args.sin_escritura:
+            escribir_propiedades(driver, g, {"pagerank": rank, "comunidad": comunidades})
+            print("\nPropiedades pagerank y comunidad escritas en Usuario")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# bench_amistades.py
+# Almacenamiento y costo de escritura de las amistades según cómo se guardan:
+# "dos_aristas" (el esquema anterior, un AMIGO_DE en cada dirección) y
+# "canonica" (una sola relación del email menor al mayor, consultas.CARGA_AMISTADES).
+# Ambos escriben el mismo conjunto de amistades sobre usuarios sintéticos
+# @amistad.local, en lotes con UNWIND desde una sola sesión; se reportan
+# amistades/s, relaciones creadas y el tamaño estimado en el store de
+# relaciones. Los datos se borran al terminar.
+#
+#   python bench_amistades.py --usuarios 20000 --amigos 10
+import argparse
+import time
+
+import consultas as Q
+from carga_paralela import LOTE, generar_dataset
+from database import get_driver, init_schema
+
+DOMINIO = "amistad.local"
+LOTE_BORRADO = 10_000
+BYTES_RELACION = 34   # registro de relación del formato de store "record"
+
+DOS_ARISTAS = """
+UNWIND $filas AS f
+MATCH (a:Usuario {email:f[0]})
+MATCH (b:Usuario {email:f[1]})
+MERGE (a)-[:AMIGO_DE]->(b)
+MERGE (b)-[:AMIGO_DE]->(a)
+"""
+
+ESQUEMAS = {
+    "dos_aristas": DOS_ARISTAS,
+    "canonica": Q.CARGA_AMISTADES,
+}
+
+
+def _borrar(s, q: str):
+    while s.execute_write(lambda tx: tx.run(q, sufijo="@" + DOMINIO, lote=LOTE_BORRADO).single()["n"]):
+        pass
+
+
+def borrar_amistades(driver):
+    with driver.session() as s:
+        _borrar(s, """
+        MATCH (u:Usuario)-[r:AMIGO_DE]-() WHERE u.email ENDS WITH $sufijo
+        WITH DISTINCT r LIMIT $lote
+        DELETE r
+        RETURN count(*) AS n
+        """)
+
+
+def limpiar(driver):
+    with driver.session() as s:
+        _borrar(s, Q.BENCH_BORRAR_USUARIOS)
+
+
+def escribir(driver, q: str, pares, lote: int = LOTE):
+    """Escribe las amistades en lotes; devuelve (segundos, relaciones creadas)."""
+    creadas = 0
+    inicio = time.perf_counter()
+    with driver.session() as s:
+        for i in range(0, len(pares), lote):
+            filas = [list(p) for p in pares[i:i + lote]]
+            resumen = s.execute_write(lambda tx: tx.run(q, filas=filas).consume())
+            creadas += resumen.counters.relationships_created
+    return time.perf_counter() - inicio, creadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de almacenamiento de amistades")
+    parser.add_argument("--usuarios", type=int, default=20_000)
+    parser.add_argument("--amigos", type=int, default=10, help="amistades por usuario")
+    args = parser.parse_args()
+
+    ds = generar_dataset(args.usuarios, posts_por_usuario=0, amigos_por_usuario=args.amigos,
+                         seguidos_por_usuario=0, dominio=DOMINIO)
+    pares = ds.amistades
+    print(f"Dataset: {len(ds.usuarios)} usuarios, {len(pares)} amistades")
+    print(f"{'esquema':>12} {'segundos':>9} {'amistades/s':>12} {'relaciones':>11} {'MB est.':>8}")
+
+    resultados = {}
+    with get_driver() as driver:
+        init_schema(driver)
+        limpiar(driver)
+        try:
+            with driver.session() as s:
+                for i in range(0, len(ds.usuarios), LOTE):
+                    s.execute_write(lambda tx: tx.run(Q.CARGA_USUARIOS, filas=ds.usuarios[i:i + LOTE]).consume())
+            for nombre, q in ESQUEMAS.items():
+                borrar_amistades(driver)
+                segundos, creadas = escribir(driver, q, pares)
+                resultados[nombre] = (segundos, creadas)
+                print(f"{nombre:>12} {segundos:9.2f} {len(pares) / segundos:12.0f} {creadas:>11} "
+                      f"{creadas * BYTES_RELACION / 2**20:8.1f}")
+        finally:
+            limpiar(driver)
+
+    (t_dos, r_dos), (t_can, r_can) = resultados["dos_aristas"], resultados["canonica"]
+    if r_dos and t_can:
+        print(f"\nRelaciones: -{100 * (1 - r_can / r_dos):.0f}%   tiempo de escritura: x{t_dos / t_can:.2f} más rápido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# bench_carga.py
+# Speedup de carga_paralela.cargar según el número de workers. Cada corrida
+# carga un dataset sintético con emails @bench.local y lo borra al terminar.
+#
+#   python bench_carga.py --usuarios 50000 --workers 1 2 4 8
+import argparse
+
+from database import get_driver, init_schema
+from carga_paralela import generar_dataset, cargar
+
+DOMINIO = "bench.local"
+LOTE_BORRADO = 10_000
+
+
+def limpiar(driver):
+    consultas = [
+        """
+        MATCH (p:Publicación) WHERE p.id STARTS WITH $dominio
+        WITH p LIMIT $lote
+        DETACH DELETE p
+        RETURN count(*) AS n
+        """,
+        """
+        MATCH (u:Usuario) WHERE u.email ENDS WITH $sufijo
+        WITH u LIMIT $lote
+        DETACH DELETE u
+        RETURN count(*) AS n
+        """,
+    ]
+    with driver.session() as s:
+        for q in consultas:
+            while s.execute_write(lambda tx: tx.run(
+                q, dominio=DOMINIO, sufijo="@" + DOMINIO, lote=LOTE_BORRADO
+            ).single()["n"]):
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga paralela")
+    parser.add_argument("--usuarios", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    ds = generar_dataset(args.usuarios, dominio=DOMINIO)
+    filas = len(ds.usuarios) + len(ds.publicaciones) + len(ds.amistades) + len(ds.seguimientos)
+    print(f"Dataset: {len(ds.usuarios)} usuarios, {len(ds.publicaciones)} publicaciones, "
+          f"{len(ds.amistades)} amistades, {len(ds.seguimientos)} seguimientos")
+    print(f"{'workers':>7} {'segundos':>9} {'filas/s':>10} {'speedup':>8} {'reintentos':>10}")
+
+    base = None
+    with get_driver() as driver:
+        init_schema(driver)
+        for workers in args.workers:
+            limpiar(driver)
+            try:
+                stats = cargar(driver, ds, workers=workers)
+            finally:
+                limpiar(driver)
+            segundos = stats.total_segundos
+            base = base or segundos
+            print(f"{workers:>7} {segundos:9.2f} {filas / segundos:10.0f} {base / segundos:8.2f} {stats.reintentos:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# bench_columnas.py
+# Filas/s y memoria pico de una lectura grande según el modo de resultado:
+# "dicts" (un dict por fila con record.data()), "registros" (se conservan los
+# Record del driver) y "columnas" (database.leer_columnas, un array.array por
+# columna). Las filas se generan en el servidor con UNWIND, así la medida no
+# depende del tamaño de la base. Cada modo se corre dos veces: una para el
+# tiempo y otra con tracemalloc para la memoria (tracemalloc frena la lectura).
+#
+#   python bench_columnas.py --filas 10000000 --fetch-sizes 1000 10000 50000
+import argparse
+import time
+import tracemalloc
+
+from database import get_driver, leer_columnas
+
+FILAS_SINTETICAS = """
+UNWIND range(0, $n - 1) AS i
+RETURN i AS id, toFloat(i) * 0.5 AS valor, 'u' + toString(i % 1000) AS texto
+"""
+TIPOS = {"id": "q", "valor": "d", "texto": "O"}
+
+
+def leer_dicts(driver, n: int, fetch_size: int):
+    with driver.session(fetch_size=fetch_size) as s:
+        return [r.data() for r in s.run(FILAS_SINTETICAS, n=n)]
+
+
+def leer_registros(driver, n: int, fetch_size: int):
+    with driver.session(fetch_size=fetch_size) as s:
+        return list(s.run(FILAS_SINTETICAS, n=n))
+
+
+def leer_en_columnas(driver, n: int, fetch_size: int):
+    return leer_columnas(driver, FILAS_SINTETICAS, TIPOS, fetch_size=fetch_size, n=n)
+
+
+MODOS = {
+    "dicts": leer_dicts,
+    "registros": leer_registros,
+    "columnas": leer_en_columnas,
+}
+
+
+def medir(leer, driver, n: int, fetch_size: int):
+    t0 = time.perf_counter()
+    datos = leer(driver, n, fetch_size)
+    segundos = time.perf_counter() - t0
+    del datos
+
+    tracemalloc.start()
+    datos = leer(driver, n, fetch_size)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del datos
+    return segundos, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de lecturas masivas por modo de resultado")
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--fetch-sizes", type=int, nargs="+", default=[1000, 10_000, 50_000])
+    parser.add_argument("--modos", nargs="+", choices=sorted(MODOS), default=list(MODOS))
+    args = parser.parse_args()
+
+    print(f"{'modo':>10} {'fetch_size':>10} {'segundos':>9} {'filas/s':>10} {'pico MB':>9}")
+    with get_driver() as driver:
+        for modo in args.modos:
+            for fetch_size in args.fetch_sizes:
+                segundos, pico = medir(MODOS[modo], driver, args.filas, fetch_size)
+                print(f"{modo:>10} {fetch_size:>10} {segundos:9.2f} {args.filas / segundos:10.0f} "
+                      f"{pico / 2**20:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
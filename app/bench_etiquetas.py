@@ -0,0 +1,104 @@
+# bench_etiquetas.py
+# Latencia de publicaciones_por_etiqueta a medida que crece el número de posts
+# de una etiqueta, comparada con la consulta ingenua que expande el nodo
+# Etiqueta. Crea una etiqueta sintética y la borra al terminar.
+#
+#   python bench_etiquetas.py --tamanos 1000 10000 100000 1000000
+import argparse
+import statistics
+import time
+import uuid
+
+from database import get_driver, publicaciones_por_etiqueta
+
+LOTE = 10_000
+
+CONSULTA_INGENUA = """
+MATCH (e:Etiqueta {nombre:$etiqueta})<-[:TIENE_ETIQUETA]-(p:Publicación)
+RETURN p.id AS id, p.likes AS likes
+ORDER BY p.likes DESC
+LIMIT $limit
+"""
+
+
+def poblar(driver, etiqueta: str, desde: int, hasta: int):
+    q = """
+    MERGE (e:Etiqueta {nombre:$etiqueta})
+    WITH e
+    UNWIND range($desde, $hasta - 1) AS i
+    CREATE (p:Publicación {
+        id: $prefijo + toString(i), contenido: 'bench', likes: toInteger(rand() * 100000),
+        fecha: date() - duration({days: toInteger(rand() * 365)}), etiquetas: [$etiqueta]
+    })
+    CREATE (p)-[:TIENE_ETIQUETA {etiqueta:$etiqueta, likes:p.likes, fecha:p.fecha}]->(e)
+    """
+    with driver.session() as s:
+        for inicio in range(desde, hasta, LOTE):
+            s.execute_write(lambda tx: tx.run(
+                q, etiqueta=etiqueta, prefijo=f"{etiqueta}-",
+                desde=inicio, hasta=min(inicio + LOTE, hasta)
+            ).consume())
+
+
+def limpiar(driver, etiqueta: str):
+    with driver.session() as s:
+        while True:
+            borrados = s.execute_write(lambda tx: tx.run(
+                """
+                MATCH (p:Publicación) WHERE p.id STARTS WITH $prefijo
+                WITH p LIMIT $lote
+                DETACH DELETE p
+                RETURN count(*) AS n
+                """,
+                prefijo=f"{etiqueta}-", lote=LOTE
+            ).single()["n"])
+            if borrados == 0:
+                break
+        s.run("MATCH (e:Etiqueta {nombre:$etiqueta}) DETACH DELETE e", etiqueta=etiqueta)
+
+
+def medir(fn, repeticiones: int) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--paginas", type=int, default=10, help="profundidad de la página profunda")
+    args = parser.parse_args()
+
+    etiqueta = f"bench-{uuid.uuid4().hex[:8]}"
+    print(f"{'posts':>10} {'orden':>6} {'1a pág ms':>10} {'pág profunda ms':>16} {'ingenua ms':>11}")
+    with get_driver() as driver:
+        try:
+            creados = 0
+            for tamano in sorted(args.tamanos):
+                poblar(driver, etiqueta, creados, tamano)
+                creados = tamano
+                for orden in ("likes", "fecha"):
+                    # Cursor tras recorrer varias páginas, para medir una página profunda
+                    cursor = None
+                    for _ in range(args.paginas):
+                        _, cursor = publicaciones_por_etiqueta(driver, etiqueta, cursor, args.limit, orden)
+                    primera = medir(lambda: publicaciones_por_etiqueta(driver, etiqueta, None, args.limit, orden),
+                                    args.repeticiones)
+                    profunda = medir(lambda: publicaciones_por_etiqueta(driver, etiqueta, cursor, args.limit, orden),
+                                     args.repeticiones)
+                    ingenua = ""
+                    if orden == "likes":
+                        with driver.session() as s:
+                            ingenua = f"{medir(lambda: s.run(CONSULTA_INGENUA, etiqueta=etiqueta, limit=args.limit).consume(), args.repeticiones):11.2f}"
+                    print(f"{tamano:>10} {orden:>6} {primera:10.2f} {profunda:16.2f} {ingenua:>11}")
+        finally:
+            limpiar(driver, etiqueta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# bench_mixto.py
+# Prueba de carga con una mezcla configurable de operaciones de database.py
+# (por defecto 70% lecturas de publicaciones/feed, 20% consultas del grafo
+# social y 10% escrituras) a una tasa objetivo con llegadas de lazo abierto:
+# las peticiones se programan por un proceso de Poisson sin esperar a que
+# terminen las anteriores, y la latencia se mide desde el instante programado
+# (corrige la omisión coordinada: si el sistema se atrasa, la cola cuenta).
+#
+# Con varias tasas (o --saturacion) informa, por escalón, el throughput
+# logrado, p50/p99 corregidos, p99 de servicio y tasas de error y reintento,
+# y el punto de saturación: la mayor tasa que se sostiene dentro del SLO.
+# Carga un dataset sintético con emails @mixto.local y lo borra al terminar.
+#
+#   python bench_mixto.py --tasas 50 100 200 --duracion 30
+#   python bench_mixto.py --saturacion --tasa 50 --slo-ms 250
+import argparse
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+
+import consultas as Q
+from carga_paralela import ETIQUETAS, Dataset, cargar, generar_dataset
+from database import (
+    PublicacionInput, amigos_en_comun, camino, create_publicacion, create_seguimiento,
+    feed, get_driver, incrementar_likes, init_schema, publicaciones_por_etiqueta,
+    publicaciones_por_usuario, refrescar_tendencias, sugerencias_de_amigos,
+    top_publicaciones_tendencia,
+)
+
+DOMINIO = "mixto.local"
+LOTE_BORRADO = 10_000
+MEZCLA = "lectura=70,grafo=20,escritura=10"
+MAX_REINTENTOS = 3
+FACTOR_SATURACION = 1.5
+REINTENTABLES = (TransientError, ServiceUnavailable, SessionExpired)
+
+Operacion = Callable[[object, random.Random, Dataset], None]
+
+
+def _email(rng: random.Random, ds: Dataset) -> str:
+    return rng.choice(ds.usuarios)["email"]
+
+
+def _crear_publicacion(d, rng, ds):
+    create_publicacion(d, _email(rng, ds), PublicacionInput(
+        contenido="bench mixto", fecha=time.strftime("%Y-%m-%d"),
+        likes=0, etiquetas=rng.sample(ETIQUETAS, 2),
+    ))
+
+
+# Operaciones por categoría; dentro de una categoría se eligen con igual peso
+OPERACIONES: Dict[str, Dict[str, Operacion]] = {
+    "lectura": {
+        "publicaciones_por_usuario": lambda d, rng, ds: publicaciones_por_usuario(d, _email(rng, ds), 0, 20),
+        "feed": lambda d, rng, ds: feed(d, _email(rng, ds), 0, 20),
+        "publicaciones_por_etiqueta": lambda d, rng, ds: publicaciones_por_etiqueta(d, rng.choice(ETIQUETAS)),
+        "tendencias": lambda d, rng, ds: top_publicaciones_tendencia(d, "semana"),
+    },
+    "grafo": {
+        "amigos_en_comun": lambda d, rng, ds: amigos_en_comun(d, _email(rng, ds), _email(rng, ds)),
+        "sugerencias_de_amigos": lambda d, rng, ds: sugerencias_de_amigos(d, _email(rng, ds)),
+        "camino": lambda d, rng, ds: camino(d, _email(rng, ds), _email(rng, ds), max_depth=4),
+    },
+    "escritura": {
+        "create_publicacion": _crear_publicacion,
+        "incrementar_likes": lambda d, rng, ds: incrementar_likes(d, rng.choice(ds.publicaciones)["id"]),
+        "create_seguimiento": lambda d, rng, ds: create_seguimiento(d, _email(rng, ds), _email(rng, ds)),
+    },
+}
+
+
+def parsear_mezcla(texto: str) -> Dict[str, float]:
+    """"lectura=70,grafo=20,escritura=10" -> pesos normalizados."""
+    pesos = {}
+    for parte in texto.split(","):
+        categoria, _, peso = parte.partition("=")
+        categoria = categoria.strip()
+        if categoria not in OPERACIONES:
+            raise ValueError(f"Categoría inválida: {categoria} (usar {', '.join(OPERACIONES)})")
+        pesos[categoria] = float(peso)
+    total = sum(pesos.values())
+    if total <= 0:
+        raise ValueError("La mezcla debe tener algún peso positivo")
+    return {c: p / total for c, p in pesos.items()}
+
+
+# ------------------------------------------------------------
+# MEDICIÓN
+# ------------------------------------------------------------
+@dataclass
+class Resultado:
+    tasa: float
+    duracion: float
+    latencias: List[float] = field(default_factory=list)          # desde el instante programado
+    servicio: List[float] = field(default_factory=list)           # desde que un hilo la toma
+    por_categoria: Dict[str, List[float]] = field(default_factory=dict)
+    errores: int = 0
+    reintentos: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def registrar(self, categoria: str, latencia: float, servicio: float, error: bool, reintentos: int):
+        with self._lock:
+            self.latencias.append(latencia)
+            self.servicio.append(servicio)
+            self.por_categoria.setdefault(categoria, []).append(latencia)
+            self.errores += error
+            self.reintentos += reintentos
+
+    @property
+    def completadas(self) -> int:
+        return len(self.latencias)
+
+    @property
+    def throughput(self) -> float:
+        return self.completadas / self.duracion if self.duracion else 0.0
+
+
+def percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    orden = sorted(valores)
+    return orden[min(len(orden) - 1, int(p * len(orden)))]
+
+
+def _ejecutar(driver, op: Operacion, rng: random.Random, ds: Dataset) -> Tuple[bool, int]:
+    """Ejecuta op reintentando errores transitorios. Devuelve (error, reintentos)."""
+    for intento in range(MAX_REINTENTOS + 1):
+        try:
+            op(driver, rng, ds)
+            return False, intento
+        except REINTENTABLES:
+            if intento == MAX_REINTENTOS:
+                return True, intento
+            time.sleep(0.01 * 2 ** intento * (1 + rng.random()))
+        except Exception:
+            return True, intento
+    return True, MAX_REINTENTOS
+
+
+def correr(driver, ds: Dataset, mezcla: Dict[str, float], tasa: float, duracion: float,
+           hilos: int, semilla: int = 0) -> Resultado:
+    """
+    Un escalón de lazo abierto: un hilo programa las llegadas (exponenciales
+    de media 1/tasa) en una cola y `hilos` workers las atienden.
+    """
+    rng = random.Random(semilla)
+    categorias = list(mezcla)
+    pesos = [mezcla[c] for c in categorias]
+    resultado = Resultado(tasa, duracion)
+    cola: "queue.Queue[Optional[Tuple[float, str, Operacion]]]" = queue.Queue()
+
+    def worker(indice: int):
+        rng_w = random.Random(semilla * 1000 + indice)
+        while True:
+            tarea = cola.get()
+            if tarea is None:
+                return
+            programada, categoria, op = tarea
+            inicio = time.perf_counter()
+            error, reintentos = _ejecutar(driver, op, rng_w, ds)
+            fin = time.perf_counter()
+            resultado.registrar(categoria, fin - programada, fin - inicio, error, reintentos)
+
+    workers = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(hilos)]
+    for w in workers:
+        w.start()
+
+    inicio = time.perf_counter()
+    siguiente = inicio
+    while True:
+        siguiente += rng.expovariate(tasa)
+        if siguiente - inicio >= duracion:
+            break
+        espera = siguiente - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        categoria = rng.choices(categorias, pesos)[0]
+        op = rng.choice(list(OPERACIONES[categoria].values()))
+        cola.put((siguiente, categoria, op))
+
+    for _ in workers:
+        cola.put(None)
+    for w in workers:
+        w.join()
+    resultado.duracion = time.perf_counter() - inicio
+    return resultado
+
+
+def sostenible(r: Resultado, slo_ms: float, max_errores: float) -> bool:
+    """La tasa se sostiene si se logra ≥ 90% de lo ofrecido, p99 ≤ SLO y pocos errores."""
+    return (r.throughput >= 0.9 * r.tasa
+            and 1000 * percentil(r.latencias, 0.99) <= slo_ms
+            and r.errores <= max_errores * max(r.completadas, 1))
+
+
+# ------------------------------------------------------------
+# DATASET
+# ------------------------------------------------------------
+def limpiar(driver, dominio: str = DOMINIO):
+    """Borra los usuarios de prueba de dominio y sus publicaciones y recalcula sus tendencias."""
+    with driver.session() as s:
+        for q in (Q.BENCH_BORRAR_PUBLICACIONES, Q.BENCH_BORRAR_USUARIOS):
+            while s.execute_write(lambda tx: tx.run(
+                q, sufijo="@" + dominio, lote=LOTE_BORRADO
+            ).single()["n"]):
+                pass
+    refrescar_tendencias(driver)
+
+
+def _fila(r: Resultado) -> str:
+    total = max(r.completadas, 1)
+    return (f"{r.tasa:>8.0f} {r.throughput:>9.1f} {1000 * percentil(r.latencias, 0.50):>8.1f} "
+            f"{1000 * percentil(r.latencias, 0.99):>8.1f} {1000 * percentil(r.servicio, 0.99):>10.1f} "
+            f"{100 * r.errores / total:>7.2f} {100 * r.reintentos / total:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga mixta de lazo abierto")
+    parser.add_argument("--usuarios", type=int, default=10_000)
+    parser.add_argument("--mezcla", default=MEZCLA, help=f"pesos por categoría (por defecto {MEZCLA})")
+    parser.add_argument("--tasas", type=float, nargs="+", default=[50, 100, 200], help="peticiones/s por escalón")
+    parser.add_argument("--saturacion", action="store_true",
+                        help=f"subir la tasa ×{FACTOR_SATURACION} desde --tasa hasta saturar")
+    parser.add_argument("--tasa", type=float, default=50)
+    parser.add_argument("--duracion", type=float, default=30, help="segundos por escalón")
+    parser.add_argument("--hilos", type=int, default=64)
+    parser.add_argument("--slo-ms", type=float, default=250, help="p99 máximo (corregido)")
+    parser.add_argument("--max-errores", type=float, default=0.01, help="fracción de errores tolerada")
+    args = parser.parse_args()
+
+    mezcla = parsear_mezcla(args.mezcla)
+    ds = generar_dataset(args.usuarios, dominio=DOMINIO)
+    print("Mezcla: " + ", ".join(f"{c} {100 * p:.0f}%" for c, p in mezcla.items()))
+    print(f"{'ofrecida':>8} {'lograda':>9} {'p50 ms':>8} {'p99 ms':>8} {'p99 serv':>10} "
+          f"{'error%':>7} {'reintento%':>10}")
+
+    resultados: List[Resultado] = []
+    with get_driver() as driver:
+        init_schema(driver)
+        limpiar(driver)
+        cargar(driver, ds)
+        try:
+            tasas = iter(args.tasas) if not args.saturacion else None
+            tasa = args.tasa if args.saturacion else next(tasas)
+            while tasa is not None:
+                r = correr(driver, ds, mezcla, tasa, args.duracion, args.hilos, semilla=len(resultados))
+                resultados.append(r)
+                print(_fila(r))
+                if args.saturacion:
+                    tasa = tasa * FACTOR_SATURACION if sostenible(r, args.slo_ms, args.max_errores) else None
+                else:
+                    tasa = next(tasas, None)
+        finally:
+            limpiar(driver)
+
+    ultimo = resultados[-1]
+    print("\np99 corregido por categoría en el último escalón:")
+    for categoria, latencias in sorted(ultimo.por_categoria.items()):
+        print(f"  {categoria}: {1000 * percentil(latencias, 0.99):.1f} ms ({len(latencias)} operaciones)")
+
+    sostenidas = [r.tasa for r in resultados if sostenible(r, args.slo_ms, args.max_errores)]
+    if sostenidas:
+        print(f"\nPunto de saturación: {max(sostenidas):.0f} peticiones/s "
+              f"(p99 ≤ {args.slo_ms:.0f} ms, errores ≤ {100 * args.max_errores:.1f}%)")
+    else:
+        print(f"\nNinguna tasa se sostuvo dentro del SLO de {args.slo_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
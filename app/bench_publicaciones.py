@@ -0,0 +1,146 @@
+# bench_publicaciones.py
+# Publicaciones/s y espera de locks con escritores concurrentes. Cada hilo
+# publica como su propio usuario @publica.local, siempre con etiquetas de las
+# cinco compartidas, durante --duracion segundos. Se comparan el camino
+# anterior ("merge": MERGE de la publicación, de cada Etiqueta y de cada
+# TIENE_ETIQUETA) y el actual ("create": database.create_publicacion). La
+# espera de locks se muestrea con SHOW TRANSACTIONS: de cada transacción se
+# guarda el mayor waitTime observado.
+#
+#   python bench_publicaciones.py --hilos 1 4 16 --duracion 20
+import argparse
+import random
+import threading
+import time
+from datetime import date
+from typing import Dict, List
+
+import consultas as Q
+from bench_mixto import limpiar, percentil
+from carga_paralela import ETIQUETAS
+from database import PublicacionInput, _registrar_tendencia, create_publicacion, get_driver, init_schema
+
+DOMINIO = "publica.local"
+INTERVALO_MUESTREO = 0.05
+
+CREAR_PUBLICACION_MERGE = """
+MATCH (u:Usuario {email:$email})
+MERGE (p:Publicación {id:$id})
+SET p.contenido=$contenido, p.fecha=date($fecha), p.likes=$likes,
+    p.etiquetas=$etiquetas, p.autor=$email
+MERGE (u)-[:CREA]->(p)
+WITH p, $etiquetas AS tags
+UNWIND tags AS tag
+MERGE (e:Etiqueta {nombre:tag})
+MERGE (p)-[r:TIENE_ETIQUETA]->(e)
+SET r.etiqueta=tag, r.likes=p.likes, r.fecha=p.fecha
+"""
+
+TRANSACCIONES = "SHOW TRANSACTIONS YIELD transactionId AS id, waitTime AS espera"
+
+
+def publicar_merge(driver, email: str, pub: PublicacionInput):
+    def _tx(tx):
+        post_id = f"{DOMINIO}-{random.getrandbits(64):016x}"
+        tx.run(CREAR_PUBLICACION_MERGE, email=email, id=post_id, contenido=pub.contenido,
+               fecha=pub.fecha, likes=pub.likes, etiquetas=pub.etiquetas).consume()
+        _registrar_tendencia(tx, post_id, 1, pub.likes)
+    with driver.session() as s:
+        s.execute_write(_tx)
+
+
+MODOS = {
+    "merge": publicar_merge,
+    "create": create_publicacion,
+}
+
+
+def _segundos(duracion) -> float:
+    return (duracion.months * 30 + duracion.days) * 86400 + duracion.seconds + duracion.nanoseconds / 1e9
+
+
+def muestrear_esperas(driver, detener: threading.Event, esperas: Dict[str, float]):
+    with driver.session() as s:
+        while not detener.wait(INTERVALO_MUESTREO):
+            for r in s.run(TRANSACCIONES):
+                if r["espera"] is not None:
+                    esperas[r["id"]] = max(esperas.get(r["id"], 0.0), _segundos(r["espera"]))
+
+
+def correr(driver, publicar, emails: List[str], duracion: float) -> Dict[str, float]:
+    latencias: List[float] = []
+    errores = [0]
+    esperas: Dict[str, float] = {}
+    lock = threading.Lock()
+    fin = time.perf_counter() + duracion
+    hoy = date.today().isoformat()
+
+    def escritor(email: str):
+        rng = random.Random(email)
+        while time.perf_counter() < fin:
+            pub = PublicacionInput(contenido=f"Publicación de {email}", fecha=hoy,
+                                   likes=0, etiquetas=rng.sample(ETIQUETAS, 3))
+            t0 = time.perf_counter()
+            try:
+                publicar(driver, email, pub)
+            except Exception:
+                with lock:
+                    errores[0] += 1
+                continue
+            with lock:
+                latencias.append(time.perf_counter() - t0)
+
+    detener = threading.Event()
+    muestreo = threading.Thread(target=muestrear_esperas, args=(driver, detener, esperas), daemon=True)
+    muestreo.start()
+    hilos = [threading.Thread(target=escritor, args=(e,)) for e in emails]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    segundos = time.perf_counter() - inicio
+    detener.set()
+    muestreo.join()
+
+    return {
+        "posts_s": len(latencias) / segundos,
+        "p50_ms": 1000 * percentil(latencias, 0.50),
+        "p99_ms": 1000 * percentil(latencias, 0.99),
+        "espera_ms": 1000 * sum(esperas.values()),
+        "espera_por_post_ms": 1000 * sum(esperas.values()) / max(len(latencias), 1),
+        "errores": errores[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de creación concurrente de publicaciones")
+    parser.add_argument("--hilos", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duracion", type=float, default=20.0, help="segundos por corrida")
+    parser.add_argument("--modos", nargs="+", choices=list(MODOS), default=list(MODOS))
+    args = parser.parse_args()
+
+    emails = [f"escritor{i:04d}@{DOMINIO}" for i in range(max(args.hilos))]
+    print(f"{'modo':>7} {'hilos':>5} {'posts/s':>8} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'espera ms':>10} {'ms/post':>8} {'errores':>7}")
+    with get_driver() as driver:
+        init_schema(driver)
+        limpiar(driver, DOMINIO)
+        try:
+            with driver.session() as s:
+                s.run(Q.CARGA_ETIQUETAS, filas=ETIQUETAS).consume()
+                s.run(Q.CARGA_USUARIOS, filas=[
+                    {"id": e, "nombre": e, "email": e, "fechaRegistro": date.today().isoformat()}
+                    for e in emails
+                ]).consume()
+            for modo in args.modos:
+                for hilos in args.hilos:
+                    r = correr(driver, MODOS[modo], emails[:hilos], args.duracion)
+                    print(f"{modo:>7} {hilos:>5} {r['posts_s']:8.1f} {r['p50_ms']:7.1f} {r['p99_ms']:7.1f} "
+                          f"{r['espera_ms']:10.0f} {r['espera_por_post_ms']:8.2f} {r['errores']:>7}")
+        finally:
+            limpiar(driver, DOMINIO)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# carga_paralela.py
+# Carga paralela de un dataset completo (usuarios, etiquetas, publicaciones,
+# amistades y seguimientos) repartida en N sesiones.
+#
+# - Las etiquetas se crean primero en una sola transacción, así los lotes de
+#   publicaciones solo hacen MATCH sobre ellas y nunca compiten en un MERGE.
+# - Usuarios y publicaciones se cargan en lotes concurrentes; las publicaciones
+#   se agrupan por autor para que dos lotes no bloqueen el mismo usuario.
+# - Las relaciones entre usuarios se reparten en G = 2·N grupos de usuarios y
+#   se ejecutan por rondas de un torneo round-robin: en cada ronda cada worker
+#   toma un par de grupos distinto, de modo que no hay dos workers bloqueando
+#   el mismo conjunto de nodos a la vez.
+# - Los deadlocks y demás errores transitorios se reintentan con backoff.
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Tuple
+
+from neo4j.exceptions import TransientError
+
+import consultas as Q
+from database import refrescar_tendencias
+
+LOTE = 5_000
+MAX_REINTENTOS = 10
+ETIQUETAS = ["music", "travel", "sports", "food", "tech"]
+
+
+@dataclass
+class Dataset:
+    usuarios: List[Dict] = field(default_factory=list)
+    publicaciones: List[Dict] = field(default_factory=list)
+    amistades: List[Tuple[str, str]] = field(default_factory=list)
+    seguimientos: List[Tuple[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class Estadisticas:
+    filas: Dict[str, int] = field(default_factory=dict)
+    segundos: Dict[str, float] = field(default_factory=dict)
+    reintentos: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def reintento(self):
+        with self._lock:
+            self.reintentos += 1
+
+    @property
+    def total_segundos(self) -> float:
+        return sum(self.segundos.values())
+
+
+def generar_dataset(n_usuarios: int, posts_por_usuario: int = 3, amigos_por_usuario: int = 3,
+                    seguidos_por_usuario: int = 2, dominio: str = "mail.com", semilla: int = 0) -> Dataset:
+    """Dataset sintético con la misma forma que seed_data, de cualquier tamaño."""
+    rng = random.Random(semilla)
+    hoy = date.today()
+    ds = Dataset()
+    emails = [f"user{i:07d}@{dominio}" for i in range(n_usuarios)]
+    for i, email in enumerate(emails):
+        ds.usuarios.append({
+            "id": f"U{i:07d}", "nombre": f"Usuario {i}", "email": email,
+            "fechaRegistro": (hoy - timedelta(days=rng.randint(1, 730))).isoformat(),
+        })
+        for j in range(posts_por_usuario):
+            ds.publicaciones.append({
+                "id": f"{dominio}-P{i:07d}-{j}", "autor": email,
+                "contenido": f"Publicación {j} de {email}",
+                "fecha": (hoy - timedelta(days=rng.randint(1, 365))).isoformat(),
+                "likes": rng.randint(0, 50),
+                "etiquetas": rng.sample(ETIQUETAS, rng.randint(2, 3)),
+            })
+    if n_usuarios > 1:
+        for email in emails:
+            for otro in rng.sample(emails, min(amigos_por_usuario, n_usuarios - 1)):
+                if otro != email:
+                    ds.amistades.append((email, otro))
+            for otro in rng.sample(emails, min(seguidos_por_usuario, n_usuarios - 1)):
+                if otro != email:
+                    ds.seguimientos.append((email, otro))
+    return ds
+
+
+# ------------------------------------------------------------
+# EJECUCIÓN CON REINTENTOS
+# ------------------------------------------------------------
+def _escribir(driver, q: str, filas: List, stats: Estadisticas):
+    """Ejecuta q con $filas en una transacción, reintentando errores transitorios (deadlocks)."""
+    espera = 0.05
+    with driver.session() as s:
+        for intento in range(MAX_REINTENTOS):
+            try:
+                with s.begin_transaction() as tx:
+                    tx.run(q, filas=filas).consume()
+                    tx.commit()
+                return
+            except TransientError:
+                if intento == MAX_REINTENTOS - 1:
+                    raise
+                stats.reintento()
+                time.sleep(espera * (1 + random.random()))
+                espera = min(espera * 2, 2.0)
+
+
+def _lotes(filas: List, tamano: int) -> List[List]:
+    return [filas[i:i + tamano] for i in range(0, len(filas), tamano)]
+
+
+def _lotes_por_clave(filas: List[Dict], clave: str, tamano: int) -> List[List[Dict]]:
+    """Lotes de filas ordenadas por clave que nunca parten un mismo valor en dos lotes."""
+    lotes: List[List[Dict]] = [[]]
+    for fila in filas:
+        actual = lotes[-1]
+        if len(actual) >= tamano and actual[-1][clave] != fila[clave]:
+            lotes.append(actual := [])
+        actual.append(fila)
+    return [l for l in lotes if l]
+
+
+def _fase(nombre: str, stats: Estadisticas, filas: int, fn: Callable[[], None]):
+    inicio = time.perf_counter()
+    fn()
+    stats.segundos[nombre] = time.perf_counter() - inicio
+    stats.filas[nombre] = filas
+
+
+def _grupo(email: str, grupos: int) -> int:
+    return zlib.crc32(email.encode()) % grupos
+
+
+def rondas_round_robin(grupos: int) -> List[List[Tuple[int, int]]]:
+    """
+    Rondas en las que cada grupo aparece una sola vez: primero la diagonal
+    (i, i) y luego los pares (i, j) de un torneo round-robin (grupos par).
+    """
+    rondas = [[(i, i) for i in range(grupos)]]
+    equipos = list(range(grupos))
+    for _ in range(grupos - 1):
+        rondas.append([tuple(sorted((equipos[k], equipos[grupos - 1 - k]))) for k in range(grupos // 2)])
+        equipos = [equipos[0], equipos[-1]] + equipos[1:-1]
+    return rondas
+
+
+def particionar_relaciones(pares: List[Tuple[str, str]], grupos: int) -> List[List[List[Tuple[str, str]]]]:
+    """
+    Reparte las relaciones por ronda y, dentro de cada ronda, por par de
+    grupos. Cada unidad va ordenada por extremos para bloquear siempre en el
+    mismo orden.
+    """
+    por_bloque: Dict[Tuple[int, int], List[Tuple[str, str]]] = {}
+    for a, b in pares:
+        bloque = tuple(sorted((_grupo(a, grupos), _grupo(b, grupos))))
+        por_bloque.setdefault(bloque, []).append((a, b))
+    return [
+        [sorted(por_bloque[bloque]) for bloque in ronda if bloque in por_bloque]
+        for ronda in rondas_round_robin(grupos)
+    ]
+
+
+# ------------------------------------------------------------
+# CARGA
+# ------------------------------------------------------------
+def cargar(driver, ds: Dataset, workers: int = 4, lote: int = LOTE) -> Estadisticas:
+    """Carga el dataset con `workers` sesiones concurrentes."""
+    stats = Estadisticas()
+    grupos = 2 * workers
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def en_paralelo(q: str, lotes: List[List]):
+            for futuro in [pool.submit(_escribir, driver, q, l, stats) for l in lotes]:
+                futuro.result()
+
+        def relaciones(q: str, pares: List[Tuple[str, str]]):
+            # Cada ronda es una barrera: sus unidades no comparten nodos
+            for ronda in particionar_relaciones(pares, grupos):
+                futuros = [
+                    pool.submit(lambda unidad: [_escribir(driver, q, l, stats) for l in _lotes(unidad, lote)], u)
+                    for u in ronda
+                ]
+                for futuro in futuros:
+                    futuro.result()
+
+        etiquetas = sorted({t for p in ds.publicaciones for t in p["etiquetas"]})
+        _fase("etiquetas", stats, len(etiquetas),
+              lambda: _escribir(driver, Q.CARGA_ETIQUETAS, etiquetas, stats))
+        _fase("usuarios", stats, len(ds.usuarios),
+              lambda: en_paralelo(Q.CARGA_USUARIOS, _lotes(ds.usuarios, lote)))
+        publicaciones = sorted(ds.publicaciones, key=lambda p: p["autor"])
+        _fase("publicaciones", stats, len(publicaciones),
+              lambda: en_paralelo(Q.CARGA_PUBLICACIONES, _lotes_por_clave(publicaciones, "autor", lote)))
+        _fase("amistades", stats, len(ds.amistades),
+              lambda: relaciones(Q.CARGA_AMISTADES, ds.amistades))
+        _fase("seguimientos", stats, len(ds.seguimientos),
+              lambda: relaciones(Q.CARGA_SEGUIMIENTOS, ds.seguimientos))
+
+    # Las publicaciones no pasan por create_publicacion: recalcula las tendencias
+    _fase("tendencias", stats, 0, lambda: refrescar_tendencias(driver, todas=True))
+    return stats
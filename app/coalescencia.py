@@ -0,0 +1,142 @@
+# coalescencia.py
+# Single-flight para lecturas: las llamadas concurrentes a la misma función
+# con los mismos argumentos comparten una sola ejecución en curso y su
+# resultado (o su excepción). No es una caché: en cuanto la ejecución
+# termina, la siguiente llamada vuelve a la base de datos.
+#
+# Funciona con hilos (llamar, o el decorador compartida) y con asyncio
+# (llamar_async), donde las corrutinas que esperan no ocupan un hilo cada una.
+# Todos los que comparten una ejecución reciben el mismo objeto resultado, así
+# que no deben modificarlo.
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def _congelar(valor: Any) -> Hashable:
+    """Versión hashable de un argumento (listas -> tuplas, dicts -> pares ordenados)."""
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _congelar(v)) for k, v in valor.items()))
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(_congelar(v) for v in valor)
+    hash(valor)
+    return valor
+
+
+class _Vuelo:
+    __slots__ = ("listo", "resultado", "error")
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class Coalescedor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._en_vuelo: Dict[Hashable, _Vuelo] = {}
+        self._en_vuelo_async: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._llamadas: Dict[str, int] = {}
+        self._ejecuciones: Dict[str, int] = {}
+
+    @staticmethod
+    def _clave(func: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Optional[Hashable]:
+        try:
+            return (func, _congelar(args), _congelar(kwargs))
+        except TypeError:
+            return None   # argumentos no hashables: se ejecuta sin compartir
+
+    def _contar(self, func: Callable, ejecuta: bool):
+        nombre = func.__name__
+        self._llamadas[nombre] = self._llamadas.get(nombre, 0) + 1
+        if ejecuta:
+            self._ejecuciones[nombre] = self._ejecuciones.get(nombre, 0) + 1
+
+    # ------------------------------------------------------------
+    # HILOS
+    # ------------------------------------------------------------
+    def llamar(self, func: Callable, *args, **kwargs) -> Any:
+        clave = self._clave(func, args, kwargs)
+        if clave is None:
+            with self._lock:
+                self._contar(func, True)
+            return func(*args, **kwargs)
+        with self._lock:
+            vuelo = self._en_vuelo.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._en_vuelo[clave] = _Vuelo()
+            self._contar(func, lider)
+
+        if not lider:
+            vuelo.listo.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.resultado
+        try:
+            vuelo.resultado = func(*args, **kwargs)
+            return vuelo.resultado
+        except BaseException as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._en_vuelo[clave]
+            vuelo.listo.set()
+
+    def compartida(self, func: Callable) -> Callable:
+        """Decorador: las llamadas concurrentes iguales a func comparten una ejecución."""
+        @functools.wraps(func)
+        def envoltura(*args, **kwargs):
+            return self.llamar(func, *args, **kwargs)
+        envoltura.coalescedor = self
+        return envoltura
+
+    # ------------------------------------------------------------
+    # ASYNCIO
+    # ------------------------------------------------------------
+    async def llamar_async(self, func: Callable, *args,
+                           ejecutar: Optional[Callable[..., Awaitable[Any]]] = None, **kwargs) -> Any:
+        """
+        Como llamar, para corrutinas de un mismo event loop. ejecutar(func,
+        *args, **kwargs) lanza la función bloqueante (por defecto en
+        asyncio.to_thread); las demás corrutinas esperan su resultado.
+        """
+        ejecutar = ejecutar or asyncio.to_thread
+        clave = self._clave(func, args, kwargs)
+        if clave is None:
+            with self._lock:
+                self._contar(func, True)
+            return await ejecutar(func, *args, **kwargs)
+        clave = (id(asyncio.get_running_loop()), clave)
+        with self._lock:
+            futuro = self._en_vuelo_async.get(clave)
+            lider = futuro is None
+            if lider:
+                futuro = self._en_vuelo_async[clave] = asyncio.ensure_future(ejecutar(func, *args, **kwargs))
+                futuro.add_done_callback(lambda _: self._en_vuelo_async.pop(clave, None))
+            self._contar(func, lider)
+        # shield: si se cancela una de las peticiones, la ejecución sigue para las demás
+        return await asyncio.shield(futuro)
+
+    # ------------------------------------------------------------
+    # CONTADORES
+    # ------------------------------------------------------------
+    def estadisticas(self) -> Dict[str, Any]:
+        """Por función: llamadas, ejecuciones reales y ejecuciones ahorradas."""
+        with self._lock:
+            funciones = {
+                nombre: {"llamadas": n, "ejecuciones": self._ejecuciones.get(nombre, 0),
+                         "ahorradas": n - self._ejecuciones.get(nombre, 0)}
+                for nombre, n in sorted(self._llamadas.items())
+            }
+            en_vuelo = len(self._en_vuelo) + len(self._en_vuelo_async)
+        return {
+            "ahorradas": sum(f["ahorradas"] for f in funciones.values()),
+            "en_vuelo": en_vuelo,
+            "funciones": funciones,
+        }
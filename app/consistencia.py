@@ -0,0 +1,128 @@
+# consistencia.py
+# Verifica las reglas de db/validation.cypher sin recorrer el grafo en una sola
+# sentencia: cada regla avanza por bloques de --lote nodos ordenados por su
+# clave única, así la memoria por consulta no depende del tamaño del grafo.
+# Informa cuántas violaciones hay y una muestra, y con --reparar corrige las
+# de cada bloque en su propia transacción.
+#
+# El progreso de cada regla queda en un nodo (:Verificacion {regla}); con
+# --reanudar la verificación sigue desde la última clave revisada, así que un
+# grafo grande puede verificarse en varias corridas acotadas con --max-lotes.
+#
+#   python consistencia.py [--reglas ...] [--reparar] [--reanudar] [--lote 1000] [--max-lotes N]
+import argparse
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import consultas as Q
+from database import get_driver
+
+LOTE = 1000
+MUESTRAS = 5
+
+
+@dataclass(frozen=True)
+class Regla:
+    nombre: str
+    descripcion: str
+    bloque: str                       # devuelve ultimo, revisados y violaciones de un bloque
+    reparacion: Optional[str] = None  # recibe $filas con las violaciones de un bloque
+
+
+REGLAS: Dict[str, Regla] = {r.nombre: r for r in [
+    Regla("usuarios_sin_publicaciones", "Usuarios sin publicaciones", Q.USUARIOS_SIN_PUBLICACIONES),
+    Regla("publicaciones_sin_etiquetas", "Publicaciones sin etiquetas", Q.PUBLICACIONES_SIN_ETIQUETAS,
+          Q.REPARAR_PUBLICACIONES_SIN_ETIQUETAS),
+    Regla("amistades_no_canonicas", "Amistades del email mayor al menor", Q.AMISTADES_NO_CANONICAS,
+          Q.REPARAR_AMISTADES_NO_CANONICAS),
+    Regla("amistades_duplicadas", "Amistades guardadas más de una vez", Q.AMISTADES_DUPLICADAS,
+          Q.REPARAR_AMISTADES_DUPLICADAS),
+    Regla("contadores_seguimiento", "Contadores de seguidores/seguidos desactualizados",
+          Q.CONTADORES_SEGUIMIENTO, Q.REPARAR_CONTADORES_SEGUIMIENTO),
+]}
+
+
+@dataclass
+class Resultado:
+    regla: str
+    revisados: int = 0
+    violaciones: int = 0
+    reparadas: int = 0
+    muestra: List[str] = field(default_factory=list)
+    cursor: Optional[str] = ""        # última clave revisada; None si se terminó la pasada
+
+
+def _describir(violacion: Any) -> str:
+    if isinstance(violacion, list):
+        return " -> ".join(map(str, violacion))
+    return str(violacion)
+
+
+def _guardar(s, r: Resultado):
+    s.execute_write(lambda tx: tx.run(
+        Q.GUARDAR_PROGRESO_CONSISTENCIA, regla=r.regla, cursor=r.cursor, revisados=r.revisados,
+        violaciones=r.violaciones, reparadas=r.reparadas, muestra=r.muestra
+    ).consume())
+
+
+def verificar(driver, regla: Regla, lote: int = LOTE, reparar: bool = False, reanudar: bool = False,
+              max_lotes: Optional[int] = None, muestras: int = MUESTRAS) -> Resultado:
+    """
+    Recorre la regla bloque a bloque (desde el principio, o desde donde quedó
+    la corrida anterior si reanudar=True y no había terminado) y guarda el
+    progreso después de cada bloque. Se detiene al final o tras max_lotes.
+    """
+    r = Resultado(regla.nombre)
+    with driver.session() as s:
+        if reanudar:
+            previo = s.run(Q.PROGRESO_CONSISTENCIA, regla=regla.nombre).single()
+            if previo and previo["cursor"] is not None:
+                r.cursor = previo["cursor"]
+                r.revisados, r.violaciones, r.reparadas = previo["revisados"], previo["violaciones"], previo["reparadas"]
+                r.muestra = list(previo["muestra"] or [])
+
+        lotes = 0
+        while max_lotes is None or lotes < max_lotes:
+            b = s.run(regla.bloque, desde=r.cursor, lote=lote).single()
+            if not b["revisados"]:
+                r.cursor = None
+                break
+            violaciones = b["violaciones"]
+            r.revisados += b["revisados"]
+            r.violaciones += len(violaciones)
+            r.muestra.extend(_describir(v) for v in violaciones[:max(0, muestras - len(r.muestra))])
+            if reparar and regla.reparacion and violaciones:
+                r.reparadas += s.execute_write(
+                    lambda tx: tx.run(regla.reparacion, filas=violaciones).single()["n"])
+            r.cursor = b["ultimo"]
+            lotes += 1
+            _guardar(s, r)
+        if r.cursor is None:
+            _guardar(s, r)
+    return r
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verificación por lotes de las reglas de db/validation.cypher")
+    parser.add_argument("--reglas", nargs="+", choices=list(REGLAS), default=list(REGLAS))
+    parser.add_argument("--reparar", action="store_true", help="corregir las violaciones reparables")
+    parser.add_argument("--reanudar", action="store_true", help="seguir desde donde quedó la corrida anterior")
+    parser.add_argument("--lote", type=int, default=LOTE, help="nodos por bloque")
+    parser.add_argument("--max-lotes", type=int, default=None, help="bloques por regla en esta corrida")
+    parser.add_argument("--muestras", type=int, default=MUESTRAS)
+    args = parser.parse_args(argv)
+
+    with get_driver() as driver:
+        for nombre in args.reglas:
+            regla = REGLAS[nombre]
+            r = verificar(driver, regla, args.lote, args.reparar, args.reanudar, args.max_lotes, args.muestras)
+            estado = "completa" if r.cursor is None else f"pendiente desde {r.cursor!r}"
+            reparadas = f", {r.reparadas} reparadas" if regla.reparacion else ""
+            print(f"{regla.descripcion}: {r.violaciones} violaciones en {r.revisados} revisados"
+                  f"{reparadas} ({estado})")
+            for v in r.muestra:
+                print(f"  {v}")
+
+
+if __name__ == "__main__":
+    main()
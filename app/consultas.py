@@ -0,0 +1,855 @@
+# consultas.py
+# Registro central de todas las sentencias Cypher de la aplicación. Cada
+# consulta tiene un nombre estable; los módulos importan las constantes de
+# aquí en vez de escribir Cypher en línea, y verificar_planes.py puede así
+# hacer EXPLAIN de todas ellas y comparar sus planes con db/planes.json.
+#
+# Las consultas con ORDER BY variable se registran como una variante por
+# columna y sentido ("nombre[columna asc|desc]"); nunca se arma Cypher con
+# texto del usuario.
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+MAX_FILAS = 10_000       # filas estimadas máximas por operador, salvo que se indique otra cosa
+SIN_LIMITE = 2**31 - 1   # LIMIT para los listados que se piden completos
+TIPOS_RELACION_USUARIOS = ("AMIGO_DE", "SIGUE")
+
+
+@dataclass(frozen=True)
+class Consulta:
+    nombre: str
+    cypher: str
+    ejemplo: Dict[str, Any] = field(default_factory=dict)
+    permitidos: FrozenSet[str] = frozenset()  # operadores prohibidos aceptados en esta consulta
+    max_filas: int = MAX_FILAS
+    explicable: bool = True                   # False para comandos de administración (SHOW ...)
+
+    def parametros(self) -> Dict[str, Any]:
+        """Parámetros de ejemplo para EXPLAIN: los propios y, si faltan, los genéricos."""
+        nombres = set(re.findall(r"\$(\w+)", self.cypher))
+        return {n: self.ejemplo.get(n, EJEMPLOS.get(n)) for n in sorted(nombres)}
+
+
+REGISTRO: Dict[str, Consulta] = {}
+
+# Valores genéricos de los parámetros; solo importan su tipo y forma
+EJEMPLOS: Dict[str, Any] = {
+    "email": "ana@mail.com", "email1": "ana@mail.com", "email2": "bruno@mail.com",
+    "a": "ana@mail.com", "b": "bruno@mail.com",
+    "seguidor": "ana@mail.com", "seguido": "bruno@mail.com",
+    "emails": ["ana@mail.com", "bruno@mail.com"],
+    "id": "U001", "nombre": "Ana", "fechaRegistro": "2025-01-01",
+    "contenido": "Hola", "fecha": "2025-01-01", "likes": 0, "etiquetas": ["tech"],
+    "etiqueta": "tech", "valor": 10, "post_id": "P001",
+    "skip": 0, "limit": 10, "lote": 100, "pagina": 100, "desde": "",
+    "dia": date(2025, 1, 1), "dias": 7, "n": 20,
+    "version": 1, "checksum": "0" * 64,
+    "filas": [], "sufijo": "@bench.local",
+}
+
+
+def registrar(nombre: str, cypher: str, ejemplo: Optional[Dict[str, Any]] = None,
+              permitidos: Iterable[str] = (), max_filas: int = MAX_FILAS,
+              explicable: bool = True) -> str:
+    """Registra una consulta con nombre y devuelve su texto."""
+    if nombre in REGISTRO:
+        raise ValueError(f"Consulta duplicada en el registro: {nombre}")
+    REGISTRO[nombre] = Consulta(nombre, cypher.strip(), dict(ejemplo or {}),
+                                frozenset(permitidos), max_filas, explicable)
+    return REGISTRO[nombre].cypher
+
+
+def _variantes_orden(nombre: str, plantilla: str, ordenes: Dict[str, str], desempate: str,
+                     **opciones) -> Dict[Tuple[str, bool], str]:
+    """Una consulta por (columna, descendente), sustituyendo <orden> en la plantilla."""
+    variantes = {}
+    for clave, expresion in ordenes.items():
+        for descendente in (False, True):
+            sentido = "DESC" if descendente else "ASC"
+            variantes[(clave, descendente)] = registrar(
+                f"{nombre}[{clave} {sentido.lower()}]",
+                plantilla.replace("<orden>", f"{expresion} {sentido}, {desempate}"),
+                **opciones
+            )
+    return variantes
+
+
+# ------------------------------------------------------------
+# USUARIOS
+# ------------------------------------------------------------
+UPSERT_USUARIO = registrar("usuario.upsert", """
+MERGE (u:Usuario {email:$email})
+SET u.id=$id, u.nombre=$nombre, u.fechaRegistro=date($fechaRegistro)
+RETURN u
+""")
+
+INSERTAR_USUARIO = registrar("usuario.insertar", """
+CREATE (u:Usuario {
+    id:$id, nombre:$nombre, email:$email,
+    fechaRegistro:date($fechaRegistro), Activo:1
+})
+RETURN u
+""")
+
+BUSCAR_USUARIO = registrar("usuario.buscar", "MATCH (u:Usuario {email:$email}) RETURN u")
+
+BUSCAR_USUARIOS = registrar("usuarios.buscar_lote", """
+UNWIND $emails AS email
+MATCH (u:Usuario {email:email})
+RETURN email, u
+""")
+
+# Descuenta sus seguimientos de los contadores de los demás antes de borrarlo
+ELIMINAR_USUARIO = registrar("usuario.eliminar", """
+MATCH (u:Usuario {email:$email})
+CALL {
+    WITH u
+    MATCH (u)-[:SIGUE]->(b:Usuario)
+    SET b.num_seguidores = b.num_seguidores - 1
+}
+CALL {
+    WITH u
+    MATCH (a:Usuario)-[:SIGUE]->(u)
+    SET a.num_seguidos = a.num_seguidos - 1
+}
+DETACH DELETE u
+""")
+
+TODOS_LOS_USUARIOS = registrar("usuarios.todos", "MATCH (u:Usuario) RETURN u", max_filas=SIN_LIMITE)
+
+EMAILS_USUARIOS = registrar(
+    "usuarios.emails", "MATCH (u:Usuario) RETURN u.email AS email ORDER BY email",
+    max_filas=SIN_LIMITE
+)
+
+CONTAR_USUARIOS = registrar("usuarios.contar", "MATCH (u:Usuario) RETURN count(u) AS n")
+
+# Columnas por las que se puede ordenar cada listado (nunca se interpola texto
+# del usuario en la consulta, solo estas expresiones)
+ORDENES_USUARIO = {
+    "id": "u.id", "nombre": "u.nombre", "email": "u.email",
+    "fechaRegistro": "u.fechaRegistro",
+}
+
+USUARIOS_PAGINA = _variantes_orden("usuarios.pagina", """
+MATCH (u:Usuario)
+RETURN u.id AS id, u.nombre AS nombre, u.email AS email,
+       u.fechaRegistro AS fechaRegistro
+ORDER BY <orden>
+SKIP $skip
+LIMIT $limit
+""", ORDENES_USUARIO, "u.email", max_filas=SIN_LIMITE)
+
+# ------------------------------------------------------------
+# PUBLICACIONES
+# ------------------------------------------------------------
+# Una publicación nueva siempre tiene un id nuevo: se crea con CREATE, y sus
+# etiquetas llegan ya resueltas como pares [nombre, elementId] (ver
+# database._resolver_etiquetas), así ninguna escritura hace MERGE sobre los
+# nodos Etiqueta compartidos. Devuelve las etiquetas enlazadas: un id que ya
+# no corresponde a esa etiqueta no enlaza nada.
+_ENLAZAR_PARES = """
+  UNWIND $pares AS par
+  MATCH (e:Etiqueta)
+  WHERE elementId(e) = par[1] AND e.nombre = par[0]
+  CREATE (p)-[:TIENE_ETIQUETA {etiqueta:par[0], likes:p.likes, fecha:p.fecha}]->(e)
+  RETURN collect(par[0]) AS enlazadas
+"""
+_EJEMPLO_PARES = {"pares": [["tech", "4:00000000-0000-0000-0000-000000000000:0"]]}
+
+CREAR_PUBLICACION = registrar("publicacion.crear", f"""
+MATCH (u:Usuario {{email:$email}})
+CREATE (p:Publicación {{id:$id, contenido:$contenido, fecha:date($fecha), likes:$likes,
+                       etiquetas:$etiquetas, autor:$email}})
+CREATE (u)-[:CREA]->(p)
+WITH p
+CALL {{
+  WITH p{_ENLAZAR_PARES}}}
+RETURN enlazadas
+""", _EJEMPLO_PARES)
+
+ENLAZAR_ETIQUETAS = registrar("publicacion.enlazar_etiquetas", f"""
+MATCH (p:Publicación {{id:$id}})
+CALL {{
+  WITH p{_ENLAZAR_PARES}}}
+RETURN enlazadas
+""", _EJEMPLO_PARES)
+
+RESOLVER_ETIQUETAS = registrar("etiquetas.resolver", """
+UNWIND $etiquetas AS tag
+MERGE (e:Etiqueta {nombre:tag})
+RETURN tag, elementId(e) AS id
+""")
+
+# Lo que una edición o un borrado tienen que descontar: likes para las
+# tendencias, autor y etiquetas anteriores para el recomendador
+DATOS_PUBLICACION = registrar("publicacion.datos", """
+MATCH (p:Publicación {id:$id})
+OPTIONAL MATCH (u:Usuario)-[:CREA]->(p)
+RETURN p.likes AS likes, u.email AS autor, coalesce(p.etiquetas, []) AS etiquetas
+""")
+
+REEMPLAZAR_ETIQUETAS = registrar("publicacion.reemplazar_etiquetas", """
+MATCH (p:Publicación {id:$id})
+OPTIONAL MATCH (p)-[r:TIENE_ETIQUETA]->(e:Etiqueta)
+WHERE NOT e.nombre IN $etiquetas
+DELETE r
+WITH DISTINCT p
+SET p.etiquetas = $etiquetas
+WITH p
+UNWIND $etiquetas AS tag
+MERGE (e:Etiqueta {nombre:tag})
+MERGE (p)-[r:TIENE_ETIQUETA]->(e)
+SET r.etiqueta=tag, r.likes=p.likes, r.fecha=p.fecha
+""", permitidos={"Eager"})
+
+BACKFILL_ETIQUETAS = registrar("publicacion.backfill_etiquetas", """
+MATCH (p:Publicación)
+WHERE p.id > $desde
+WITH p ORDER BY p.id LIMIT $lote
+CALL {
+    WITH p
+    OPTIONAL MATCH (p)-[r:TIENE_ETIQUETA]->(e:Etiqueta)
+    SET r.etiqueta = e.nombre, r.likes = p.likes, r.fecha = p.fecha
+    RETURN collect(DISTINCT e.nombre) AS etiquetas
+}
+SET p.etiquetas = etiquetas
+RETURN max(p.id) AS ultimo, count(p) AS n
+""")
+
+ACTUALIZAR_PUBLICACION = registrar("publicacion.actualizar", """
+MATCH (p:Publicación {id:$id})
+WITH p, $likes - coalesce(p.likes, 0) AS delta
+SET p.contenido=$contenido, p.likes=$likes
+WITH p, delta
+OPTIONAL MATCH (p)-[r:TIENE_ETIQUETA]->()
+SET r.likes = p.likes
+RETURN DISTINCT delta
+""", permitidos={"Eager"})
+
+SUMAR_LIKES = registrar("publicacion.sumar_likes", """
+UNWIND $filas AS f
+MATCH (p:Publicación {id:f.id})
+SET p.likes = coalesce(p.likes, 0) + f.dl
+""")
+
+SINCRONIZAR_LIKES_ETIQUETAS = registrar("publicacion.sincronizar_likes_etiquetas", """
+UNWIND $filas AS f
+MATCH (p:Publicación {id:f.id})-[r:TIENE_ETIQUETA]->()
+SET r.likes = p.likes
+""")
+
+ELIMINAR_PUBLICACION = registrar(
+    "publicacion.eliminar", "MATCH (p:Publicación {id:$id}) DETACH DELETE p"
+)
+
+CONTAR_PUBLICACIONES = registrar(
+    "publicaciones.contar", "MATCH (p:Publicación) RETURN count(p) AS n"
+)
+
+CONTAR_PUBLICACIONES_USUARIO = registrar(
+    "publicaciones.contar_usuario",
+    "MATCH (u:Usuario {email:$email}) RETURN COUNT { (u)-[:CREA]->() } AS n"
+)
+
+ORDENES_PUBLICACION = {
+    "id": "p.id", "autor": "u.nombre", "contenido": "p.contenido",
+    "fecha": "p.fecha", "likes": "p.likes",
+}
+
+PUBLICACIONES_POR_USUARIO = _variantes_orden("publicaciones.por_usuario", """
+MATCH (u:Usuario {email: $email})-[:CREA]->(p:Publicación)
+RETURN p.id AS id,
+       p.contenido AS contenido,
+       p.fecha AS fecha,
+       p.likes AS likes,
+       coalesce(p.etiquetas, []) AS etiquetas
+ORDER BY <orden>
+SKIP $skip
+LIMIT $limit
+""", ORDENES_PUBLICACION, "p.id")
+
+TOP_PUBLICACIONES = _variantes_orden("publicaciones.top", """
+MATCH (p:Publicación)<-[:CREA]-(u:Usuario)
+RETURN p.id AS id,
+       u.nombre AS autor,
+       p.contenido AS contenido,
+       p.likes AS likes,
+       p.fecha AS fecha,
+       coalesce(p.etiquetas, []) AS etiquetas
+ORDER BY <orden>
+SKIP $skip
+LIMIT $limit
+""", ORDENES_PUBLICACION, "p.id", max_filas=SIN_LIMITE)
+
+# Últimas publicaciones de varios usuarios en un viaje: por cada email, un seek
+# ordenado sobre (autor, fecha) que se corta en $limit
+PUBLICACIONES_POR_USUARIOS = registrar("publicaciones.por_usuarios", """
+UNWIND $emails AS email
+CALL {
+    WITH email
+    MATCH (p:Publicación)
+    USING INDEX p:Publicación(autor, fecha)
+    WHERE p.autor = email AND p.fecha IS NOT NULL
+    WITH p ORDER BY p.fecha DESC, p.id DESC LIMIT $limit
+    RETURN collect(p {.id, .contenido, .fecha, .likes, etiquetas: coalesce(p.etiquetas, [])}) AS publicaciones
+}
+RETURN email, publicaciones
+""")
+
+# Publicaciones de los usuarios que sigue email, de la más reciente a la más antigua
+FEED = registrar("publicaciones.feed", """
+MATCH (:Usuario {email:$email})-[:SIGUE]->(a:Usuario)-[:CREA]->(p:Publicación)
+RETURN p.id AS id,
+       a.nombre AS autor,
+       p.contenido AS contenido,
+       p.likes AS likes,
+       p.fecha AS fecha,
+       coalesce(p.etiquetas, []) AS etiquetas
+ORDER BY p.fecha DESC, p.id DESC
+SKIP $skip
+LIMIT $limit
+""")
+
+# Cada publicación guarda el email de su autor (p.autor) con un índice
+# compuesto (autor, fecha): un rango de fechas de un usuario es un seek
+# ordenado por fecha, cuyo costo depende de la página y no del historial.
+# Sin autor se usa el índice de fecha.
+def _publicaciones_en_rango(por_autor: bool, con_cursor: bool) -> str:
+    indice = "p:Publicación(autor, fecha)" if por_autor else "p:Publicación(fecha)"
+    autor = "p.autor = $email AND " if por_autor else ""
+    # Con cursor, $hasta es la fecha del cursor y el id desempata dentro del día
+    filtro = " AND (p.fecha < date($hasta) OR p.id < $post_id)" if con_cursor else ""
+    nombre = f"publicaciones.en_rango[{'autor' if por_autor else 'todas'}{' cursor' if con_cursor else ''}]"
+    return registrar(nombre, f"""
+MATCH (p:Publicación)
+USING INDEX {indice}
+WHERE {autor}p.fecha >= date($desde) AND p.fecha <= date($hasta){filtro}
+WITH p ORDER BY p.fecha DESC, p.id DESC LIMIT $limit
+OPTIONAL MATCH (p)<-[:CREA]-(u:Usuario)
+RETURN p.id AS id,
+       u.nombre AS autor,
+       p.contenido AS contenido,
+       p.likes AS likes,
+       p.fecha AS fecha,
+       coalesce(p.etiquetas, []) AS etiquetas
+""", ejemplo={"desde": "2025-01-01", "hasta": "2025-12-31"})
+
+
+PUBLICACIONES_EN_RANGO = {
+    (por_autor, con_cursor): _publicaciones_en_rango(por_autor, con_cursor)
+    for por_autor in (False, True) for con_cursor in (False, True)
+}
+
+# Las relaciones TIENE_ETIQUETA copian la etiqueta, likes y fecha del post, con
+# índices compuestos (etiqueta, likes) y (etiqueta, fecha). Así una página de
+# una etiqueta es un index seek ordenado sobre las relaciones en vez de
+# expandir todo el vecindario del nodo Etiqueta, que tiene millones de posts.
+ORDENES_ETIQUETA = {"likes": "likes", "fecha": "fecha"}
+
+
+def _publicaciones_por_etiqueta(campo: str, con_cursor: bool) -> str:
+    valor = "date($valor)" if campo == "fecha" else "$valor"
+    filtro = (f"AND r.{campo} <= {valor} AND (r.{campo} < {valor} OR p.id < $post_id)"
+              if con_cursor else "")
+    return registrar(
+        f"publicaciones.por_etiqueta[{campo}{' cursor' if con_cursor else ''}]", f"""
+MATCH (p:Publicación)-[r:TIENE_ETIQUETA]->()
+USING INDEX r:TIENE_ETIQUETA(etiqueta, {campo})
+WHERE r.etiqueta = $etiqueta {filtro}
+WITH p, r ORDER BY r.{campo} DESC, p.id DESC LIMIT $limit
+OPTIONAL MATCH (p)<-[:CREA]-(u:Usuario)
+RETURN p.id AS id,
+       u.nombre AS autor,
+       p.contenido AS contenido,
+       p.likes AS likes,
+       p.fecha AS fecha,
+       coalesce(p.etiquetas, []) AS etiquetas,
+       r.{campo} AS clave
+""", ejemplo={"valor": "2025-01-01"} if campo == "fecha" else None)
+
+
+PUBLICACIONES_POR_ETIQUETA = {
+    (campo, con_cursor): _publicaciones_por_etiqueta(campo, con_cursor)
+    for campo in ORDENES_ETIQUETA for con_cursor in (False, True)
+}
+
+# ------------------------------------------------------------
+# AMISTADES Y SEGUIMIENTOS
+# ------------------------------------------------------------
+# Los dos extremos son seeks por la constraint única de email (una fila cada
+# uno), así que el producto cartesiano entre ellos es de 1 × 1.
+# Una amistad es una sola relación AMIGO_DE, del email menor al mayor; las
+# lecturas la recorren sin dirección
+CREAR_AMISTAD = registrar("amistad.crear", """
+WITH CASE WHEN $a < $b THEN [$a, $b] ELSE [$b, $a] END AS par
+MATCH (a:Usuario {email:par[0]})
+MATCH (b:Usuario {email:par[1]})
+MERGE (a)-[:AMIGO_DE]->(b)
+""")
+
+ELIMINAR_AMISTAD = registrar("amistad.eliminar", """
+MATCH (:Usuario {email:$a})-[r:AMIGO_DE]-(:Usuario {email:$b})
+DELETE r
+""")
+
+# Cada SIGUE guarda los emails de sus extremos y su fecha (índices compuestos
+# (seguido, desde) y (seguidor, desde)); cada usuario mantiene sus contadores
+# num_seguidores y num_seguidos, que se leen sin recorrer relaciones.
+_NUEVO_SEGUIMIENTO = """
+ON CREATE SET r.desde = datetime(), r.seguidor = a.email, r.seguido = b.email,
+              a.num_seguidos = coalesce(a.num_seguidos, 0) + 1,
+              b.num_seguidores = coalesce(b.num_seguidores, 0) + 1"""
+
+CREAR_SEGUIMIENTO = registrar("seguimiento.crear", f"""
+MATCH (a:Usuario {{email:$seguidor}})
+MATCH (b:Usuario {{email:$seguido}})
+MERGE (a)-[r:SIGUE]->(b){_NUEVO_SEGUIMIENTO}
+""")
+
+ELIMINAR_SEGUIMIENTO = registrar("seguimiento.eliminar", """
+MATCH (a:Usuario {email:$seguidor})-[r:SIGUE]->(b:Usuario {email:$seguido})
+DELETE r
+SET a.num_seguidos = a.num_seguidos - 1, b.num_seguidores = b.num_seguidores - 1
+""")
+
+CONTAR_SEGUIMIENTOS = registrar("seguimiento.contar", """
+MATCH (u:Usuario {email:$email})
+RETURN coalesce(u.num_seguidores, 0) AS seguidores, coalesce(u.num_seguidos, 0) AS seguidos
+""")
+
+# Seguidores o seguidos de $email, de los más recientes a los más antiguos,
+# con cursor (desde en nanosegundos desde epoch, email del otro); la clave
+# entera mantiene la precisión de r.desde y va en una URL sin escapar nada.
+# Las cuentas con pocas relaciones las expanden desde su nodo; las densas
+# ("denso") hacen un seek ordenado en el índice de SIGUE, cuyo costo depende
+# de la página y no del grado.
+_EXTREMOS_SEGUIMIENTO = {"seguidores": ("seguido", "seguidor"), "seguidos": ("seguidor", "seguido")}
+
+
+def _seguimientos(direccion: str, denso: bool, con_cursor: bool) -> str:
+    propio, otro = _EXTREMOS_SEGUIMIENTO[direccion]
+    flecha = "<-[r:SIGUE]-" if direccion == "seguidores" else "-[r:SIGUE]->"
+    if denso:
+        patron = ("(o:Usuario)-[r:SIGUE]->()" if direccion == "seguidores"
+                  else "()-[r:SIGUE]->(o:Usuario)")
+        patron += f"\nUSING INDEX r:SIGUE({propio}, desde)"
+        filtros = [f"r.{propio} = $email", "r.desde IS NOT NULL"]
+    else:
+        patron = f"(:Usuario {{email:$email}}){flecha}(o:Usuario)"
+        filtros = ["r.desde IS NOT NULL"]
+    inicio = ""
+    if con_cursor:
+        inicio = "WITH datetime({epochSeconds: $clave / 1000000000, nanosecond: $clave % 1000000000}) AS hasta\n"
+        filtros.append(f"r.desde <= hasta AND (r.desde < hasta OR r.{otro} < $otro)")
+    variante = " ".join(v for v, activa in (("denso", denso), ("cursor", con_cursor)) if activa)
+    return registrar(f"seguimiento.pagina_{direccion}{f'[{variante}]' if variante else ''}", f"""
+{inicio}MATCH {patron}
+WHERE {" AND ".join(filtros)}
+WITH o, r ORDER BY r.desde DESC, r.{otro} DESC LIMIT $limit
+RETURN o.email AS email, o.nombre AS nombre, r.desde AS desde,
+       r.desde.epochSeconds * 1000000000 + r.desde.nanosecond AS clave
+""", ejemplo={"clave": 1735689600000000000, "otro": "bruno@mail.com"})
+
+
+SEGUIMIENTOS = {
+    (direccion, denso, con_cursor): _seguimientos(direccion, denso, con_cursor)
+    for direccion in _EXTREMOS_SEGUIMIENTO for denso in (False, True) for con_cursor in (False, True)
+}
+
+SEGUIDOS = registrar(
+    "seguimiento.seguidos",
+    "MATCH (:Usuario {email:$email})-[:SIGUE]->(b:Usuario) RETURN b.email AS email"
+)
+
+AMIGOS_DE = registrar("amigos.lista", """
+MATCH (:Usuario {email:$email})-[:AMIGO_DE]-(a:Usuario)
+RETURN DISTINCT a.email AS email, a.nombre AS nombre
+ORDER BY nombre, email
+""")
+
+AMIGOS_EN_COMUN = registrar("amigos.en_comun", """
+MATCH (u1:Usuario {email: $email1})-[:AMIGO_DE]-(amigo:Usuario)-[:AMIGO_DE]-(u2:Usuario {email: $email2})
+WHERE amigo <> u1 AND amigo <> u2
+RETURN DISTINCT coalesce(amigo.nombre, amigo.email) AS nombre
+ORDER BY nombre
+""")
+
+SUGERENCIAS_DE_AMIGOS = registrar("amigos.sugerencias", """
+MATCH (u:Usuario {email: $email})-[:AMIGO_DE]-(a)-[:AMIGO_DE]-(sugerencia:Usuario)
+WHERE NOT (u)-[:AMIGO_DE]-(sugerencia)
+  AND u <> sugerencia
+RETURN DISTINCT sugerencia.nombre AS nombre
+""")
+
+VECINOS_AMIGOS = registrar("amigos.vecinos_lote", """
+UNWIND $emails AS email
+MATCH (:Usuario {email:email})-[:AMIGO_DE]-(v:Usuario)
+RETURN email, collect(DISTINCT v.email) AS vecinos
+""")
+
+# ------------------------------------------------------------
+# TENDENCIAS
+# ------------------------------------------------------------
+REGISTRAR_TENDENCIAS = registrar("tendencias.registrar", """
+UNWIND $filas AS f
+MATCH (p:Publicación {id:f.id})
+MERGE (t:Tendencia {dia:p.fecha})
+SET t.sucio = true
+WITH p, f
+UNWIND coalesce(p.etiquetas, []) AS etiqueta
+MERGE (te:TendenciaEtiqueta {dia:p.fecha, etiqueta:etiqueta})
+ON CREATE SET te.posts = 0, te.likes = 0
+SET te.posts = te.posts + f.dp, te.likes = te.likes + f.dl
+""", permitidos={"Eager"})
+
+MARCAR_TENDENCIAS = registrar("tendencias.marcar_todas", """
+MATCH (p:Publicación)
+WITH DISTINCT p.fecha AS dia
+MERGE (t:Tendencia {dia:dia})
+SET t.sucio = true
+""", permitidos={"Eager"}, max_filas=SIN_LIMITE)
+
+RECALCULAR_TOP_TENDENCIA = registrar("tendencias.recalcular_top", """
+MATCH (t:Tendencia {dia:$dia})
+OPTIONAL MATCH (p:Publicación {fecha:$dia})
+WITH t, p ORDER BY p.likes DESC
+WITH t, collect(p.id)[..$n] AS top
+SET t.top_ids = top, t.sucio = false
+""")
+
+BORRAR_TENDENCIAS_ETIQUETA = registrar(
+    "tendencias.borrar_etiquetas", "MATCH (te:TendenciaEtiqueta {dia:$dia}) DELETE te"
+)
+
+RECALCULAR_TENDENCIAS_ETIQUETA = registrar("tendencias.recalcular_etiquetas", """
+MATCH (p:Publicación {fecha:$dia})
+UNWIND coalesce(p.etiquetas, []) AS etiqueta
+WITH etiqueta, count(p) AS posts, sum(p.likes) AS likes
+CREATE (:TendenciaEtiqueta {dia:$dia, etiqueta:etiqueta, posts:posts, likes:likes})
+""")
+
+TENDENCIAS_SUCIAS = registrar(
+    "tendencias.sucias", "MATCH (t:Tendencia) WHERE t.sucio RETURN t.dia AS dia LIMIT $lote"
+)
+
+TOP_PUBLICACIONES_TENDENCIA = registrar("tendencias.top_publicaciones", """
+MATCH (t:Tendencia)
+WHERE t.dia > date() - duration({days:$dias})
+UNWIND t.top_ids AS post_id
+MATCH (p:Publicación {id:post_id})<-[:CREA]-(u:Usuario)
+RETURN p.id AS id,
+       u.nombre AS autor,
+       p.contenido AS contenido,
+       p.likes AS likes,
+       p.fecha AS fecha,
+       coalesce(p.etiquetas, []) AS etiquetas
+ORDER BY p.likes DESC
+LIMIT $limit
+""")
+
+TOP_ETIQUETAS_TENDENCIA = registrar("tendencias.top_etiquetas", """
+MATCH (te:TendenciaEtiqueta)
+WHERE te.dia > date() - duration({days:$dias})
+RETURN te.etiqueta AS etiqueta,
+       sum(te.posts) AS posts,
+       sum(te.likes) AS likes
+ORDER BY posts DESC, likes DESC
+LIMIT $limit
+""")
+
+# ------------------------------------------------------------
+# MARCADOR, MIGRACIONES Y MANTENIMIENTO
+# ------------------------------------------------------------
+LEER_VERSIONES = registrar("marcador.versiones", """
+OPTIONAL MATCH (m:Inicializacion {clave:'datos'})
+WITH m.version AS datos
+OPTIONAL MATCH (sm:SchemaMigration)
+RETURN datos, coalesce(max(sm.version), 0) AS esquema
+""")
+
+ESCRIBIR_MARCADOR = registrar("marcador.escribir", """
+MERGE (m:Inicializacion {clave:'datos'})
+SET m.version = $version, m.fecha = datetime()
+""")
+
+HAY_DATOS = registrar("datos.hay", "MATCH (u:Usuario) RETURN count(u) > 0 AS hay")
+
+# Solo para la re-siembra destructiva: recorre todo el grafo a propósito
+BORRAR_TODO = registrar(
+    "datos.borrar_todo", "MATCH (n) DETACH DELETE n",
+    permitidos={"AllNodesScan"}, max_filas=SIN_LIMITE
+)
+
+VERSION_ESQUEMA = registrar(
+    "migraciones.version", "MATCH (m:SchemaMigration) RETURN coalesce(max(m.version), 0) AS v"
+)
+
+MIGRACIONES_APLICADAS = registrar(
+    "migraciones.aplicadas",
+    "MATCH (m:SchemaMigration) RETURN m.version AS version, m.checksum AS checksum"
+)
+
+REGISTRAR_MIGRACION = registrar("migraciones.registrar", """
+MERGE (sm:SchemaMigration {version:$version})
+SET sm.nombre = $nombre, sm.checksum = $checksum, sm.aplicada = datetime()
+""")
+
+INDICES_PENDIENTES = registrar("migraciones.indices_pendientes", """
+SHOW INDEXES YIELD name, state, populationPercent
+WHERE state <> 'ONLINE'
+RETURN name, state, populationPercent
+""", explicable=False)
+
+# ------------------------------------------------------------
+# INFORMACIÓN DE LA BASE
+# ------------------------------------------------------------
+INFO_USUARIOS = registrar("info.usuarios", "MATCH (u:Usuario) RETURN count(u) as count")
+INFO_PUBLICACIONES = registrar("info.publicaciones", "MATCH (p:Publicación) RETURN count(p) as count")
+INFO_ETIQUETAS = registrar("info.etiquetas", "MATCH (e:Etiqueta) RETURN count(e) as count")
+INFO_LISTA_ETIQUETAS = registrar(
+    "info.lista_etiquetas", "MATCH (e:Etiqueta) RETURN e.nombre as nombre ORDER BY nombre"
+)
+INFO_TOP_AMISTADES = registrar("info.top_amistades", """
+MATCH (u:Usuario)
+RETURN u.email as email, u.nombre as nombre,
+       size([(u)-[:AMIGO_DE]-(:Usuario) | 1]) as amigos_count
+ORDER BY amigos_count DESC
+LIMIT 5
+""", max_filas=SIN_LIMITE)
+
+# Sonda de salud (sonda.py): ninguna de sus consultas recorre el grafo
+SONDA_PING = registrar("sonda.ping", "RETURN 1 AS ok")
+
+SONDA_VERSION = registrar("sonda.version", """
+CALL dbms.components() YIELD name, versions, edition
+RETURN name, versions[0] AS version, edition
+""", explicable=False)
+
+# ------------------------------------------------------------
+# CONSISTENCIA
+# ------------------------------------------------------------
+# Las reglas de db/validation.cypher, de a un bloque de $lote nodos por su
+# clave única a partir de $desde (seek ordenado por el índice de la
+# constraint). Cada bloque devuelve su última clave, cuántos nodos revisó y
+# las violaciones que encontró en ellos; consistencia.py las recorre todas.
+def _bloque(nombre: str, etiqueta: str, clave: str, violaciones: str) -> str:
+    violaciones = violaciones.strip("\n")
+    return registrar(f"consistencia.{nombre}", f"""
+MATCH (n:{etiqueta})
+WHERE n.{clave} > $desde
+WITH n ORDER BY n.{clave} LIMIT $lote
+CALL {{
+    WITH n
+{violaciones}
+}}
+RETURN max(n.{clave}) AS ultimo, count(n) AS revisados,
+       reduce(acc = [], v IN collect(violaciones) | acc + v) AS violaciones
+""")
+
+
+USUARIOS_SIN_PUBLICACIONES = _bloque("usuarios_sin_publicaciones", "Usuario", "email", """
+    RETURN CASE WHEN EXISTS { (n)-[:CREA]->(:Publicación) } THEN [] ELSE [n.email] END AS violaciones
+""")
+
+PUBLICACIONES_SIN_ETIQUETAS = _bloque("publicaciones_sin_etiquetas", "Publicación", "id", """
+    RETURN CASE WHEN EXISTS { (n)-[:TIENE_ETIQUETA]->(:Etiqueta) } THEN [] ELSE [n.id] END AS violaciones
+""")
+
+# Una amistad guardada del email mayor al menor
+AMISTADES_NO_CANONICAS = _bloque("amistades_no_canonicas", "Usuario", "email", """
+    MATCH (n)-[:AMIGO_DE]->(v:Usuario)
+    WHERE n.email > v.email
+    RETURN collect([n.email, v.email]) AS violaciones
+""")
+
+AMISTADES_DUPLICADAS = _bloque("amistades_duplicadas", "Usuario", "email", """
+    MATCH (n)-[r:AMIGO_DE]->(v:Usuario)
+    WITH n, v, count(r) AS veces
+    WHERE veces > 1
+    RETURN collect([n.email, v.email]) AS violaciones
+""")
+
+# Contadores de seguimiento distintos del grado real (COUNT sin etiqueta en el
+# otro extremo: se lee del grado guardado en el nodo, sin expandir)
+CONTADORES_SEGUIMIENTO = _bloque("contadores_seguimiento", "Usuario", "email", """
+    RETURN CASE WHEN coalesce(n.num_seguidores, 0) = COUNT { (n)<-[:SIGUE]-() }
+                 AND coalesce(n.num_seguidos, 0) = COUNT { (n)-[:SIGUE]->() }
+                THEN [] ELSE [n.email] END AS violaciones
+""")
+
+# Reparaciones: reciben las violaciones de un bloque en $filas y devuelven
+# cuántas corrigieron. Las publicaciones sin etiquetas solo se pueden
+# reparar si conservan la lista p.etiquetas.
+REPARAR_PUBLICACIONES_SIN_ETIQUETAS = registrar("consistencia.reparar_publicaciones_sin_etiquetas", """
+UNWIND $filas AS id
+MATCH (p:Publicación {id:id})
+WHERE NOT EXISTS { (p)-[:TIENE_ETIQUETA]->(:Etiqueta) } AND size(coalesce(p.etiquetas, [])) > 0
+WITH p
+UNWIND p.etiquetas AS tag
+MERGE (e:Etiqueta {nombre:tag})
+MERGE (p)-[r:TIENE_ETIQUETA]->(e)
+SET r.etiqueta=tag, r.likes=p.likes, r.fecha=p.fecha
+RETURN count(DISTINCT p) AS n
+""", permitidos={"Eager"})
+
+# Como la migración 004: la amistad pasa a ir del email menor al mayor
+REPARAR_AMISTADES_NO_CANONICAS = registrar("consistencia.reparar_amistades_no_canonicas", """
+UNWIND $filas AS par
+MATCH (a:Usuario {email:par[0]})-[r:AMIGO_DE]->(b:Usuario {email:par[1]})
+MERGE (b)-[:AMIGO_DE]->(a)
+DELETE r
+RETURN count(*) AS n
+""", permitidos={"Eager"})
+
+REPARAR_AMISTADES_DUPLICADAS = registrar("consistencia.reparar_amistades_duplicadas", """
+UNWIND $filas AS par
+MATCH (a:Usuario {email:par[0]})-[r:AMIGO_DE]->(b:Usuario {email:par[1]})
+WITH a, b, collect(r) AS rs
+FOREACH (r IN rs[1..] | DELETE r)
+RETURN count(*) AS n
+""")
+
+REPARAR_CONTADORES_SEGUIMIENTO = registrar("consistencia.reparar_contadores_seguimiento", """
+UNWIND $filas AS email
+MATCH (u:Usuario {email:email})
+SET u.num_seguidores = COUNT { (u)<-[:SIGUE]-() }, u.num_seguidos = COUNT { (u)-[:SIGUE]->() }
+RETURN count(*) AS n
+""")
+
+# Progreso por regla, para retomar una verificación larga donde quedó
+PROGRESO_CONSISTENCIA = registrar("consistencia.progreso", """
+MATCH (v:Verificacion {regla:$regla})
+RETURN v.cursor AS cursor, v.revisados AS revisados, v.violaciones AS violaciones,
+       v.reparadas AS reparadas, v.muestra AS muestra
+""", {"regla": "amistades_duplicadas"})
+
+GUARDAR_PROGRESO_CONSISTENCIA = registrar("consistencia.guardar_progreso", """
+MERGE (v:Verificacion {regla:$regla})
+SET v.cursor = $cursor, v.revisados = $revisados, v.violaciones = $violaciones,
+    v.reparadas = $reparadas, v.muestra = $muestra, v.actualizada = datetime(),
+    v.completada = CASE WHEN $cursor IS NULL THEN datetime() ELSE v.completada END
+""", {"regla": "amistades_duplicadas", "cursor": "", "revisados": 0, "violaciones": 0,
+      "reparadas": 0, "muestra": []})
+
+# ------------------------------------------------------------
+# RECOMENDACIONES Y ANALÍTICA
+# ------------------------------------------------------------
+ETIQUETAS_POR_USUARIO = registrar("recomendaciones.etiquetas_por_usuario", """
+MATCH (u:Usuario)
+WHERE u.email > $desde
+WITH u ORDER BY u.email LIMIT $pagina
+OPTIONAL MATCH (u)-[:CREA]->(p:Publicación)
+WITH u, reduce(acc = [], ets IN collect(coalesce(p.etiquetas, [])) | acc + ets) AS etiquetas
+RETURN u.email AS email, etiquetas
+ORDER BY email
+""")
+
+# AMIGO_DE se guarda una sola vez por amistad: se recorre sin dirección para
+# que cada amistad sea una arista saliente de sus dos extremos
+PATRONES_ARISTAS = {
+    "AMIGO_DE": "(u)-[:AMIGO_DE]-(v:Usuario)",
+    "SIGUE": "(u)-[:SIGUE]->(v:Usuario)",
+}
+
+
+def _aristas_por_usuario(tipos: Tuple[str, ...]) -> str:
+    destinos = " + ".join(f"[{PATRONES_ARISTAS[t]} | v.email]" for t in tipos)
+    return registrar(f"analiticas.aristas[{'|'.join(tipos)}]", f"""
+MATCH (u:Usuario)
+WHERE u.email > $desde
+WITH u ORDER BY u.email LIMIT $pagina
+RETURN u.email AS email, {destinos} AS destinos
+ORDER BY email
+""")
+
+
+# Una variante por subconjunto de tipos, en el orden de TIPOS_RELACION_USUARIOS
+ARISTAS_POR_USUARIO = {
+    tipos: _aristas_por_usuario(tipos)
+    for tipos in [("AMIGO_DE",), ("SIGUE",), TIPOS_RELACION_USUARIOS]
+}
+
+ESCRIBIR_PROPIEDADES_USUARIO = registrar("analiticas.escribir_propiedades", """
+UNWIND $filas AS f
+MATCH (u:Usuario {email:f.email})
+SET u += f.props
+""")
+
+# ------------------------------------------------------------
+# INSTANTÁNEA DEL GRAFO
+# ------------------------------------------------------------
+INSTANTANEA_USUARIOS = registrar("instantanea.usuarios", """
+MATCH (u:Usuario)
+RETURN u.email AS email, coalesce(u.nombre, '') AS nombre
+ORDER BY email
+""", max_filas=SIN_LIMITE)
+
+# Las mismas páginas de aristas que la analítica: AMIGO_DE sin dirección,
+# SIGUE con las aristas salientes de cada usuario
+INSTANTANEA_ADYACENCIA = {t: ARISTAS_POR_USUARIO[(t,)] for t in TIPOS_RELACION_USUARIOS}
+
+# ------------------------------------------------------------
+# CARGA PARALELA
+# ------------------------------------------------------------
+CARGA_ETIQUETAS = registrar("carga.etiquetas", """
+UNWIND $filas AS tag
+MERGE (:Etiqueta {nombre:tag})
+""")
+
+CARGA_USUARIOS = registrar("carga.usuarios", """
+UNWIND $filas AS f
+MERGE (u:Usuario {email:f.email})
+SET u.id = f.id, u.nombre = f.nombre, u.fechaRegistro = date(f.fechaRegistro)
+""")
+
+CARGA_PUBLICACIONES = registrar("carga.publicaciones", """
+UNWIND $filas AS f
+MATCH (u:Usuario {email:f.autor})
+CREATE (p:Publicación {id:f.id, contenido:f.contenido, fecha:date(f.fecha),
+                       likes:f.likes, etiquetas:f.etiquetas, autor:f.autor})
+CREATE (u)-[:CREA]->(p)
+WITH p, f
+UNWIND f.etiquetas AS tag
+MATCH (e:Etiqueta {nombre:tag})
+CREATE (p)-[:TIENE_ETIQUETA {etiqueta:tag, likes:p.likes, fecha:p.fecha}]->(e)
+""")
+
+CARGA_AMISTADES = registrar("carga.amistades", """
+UNWIND $filas AS f
+WITH CASE WHEN f[0] < f[1] THEN f ELSE [f[1], f[0]] END AS par
+MATCH (a:Usuario {email:par[0]})
+MATCH (b:Usuario {email:par[1]})
+MERGE (a)-[:AMIGO_DE]->(b)
+""")
+
+CARGA_SEGUIMIENTOS = registrar("carga.seguimientos", f"""
+UNWIND $filas AS f
+MATCH (a:Usuario {{email:f[0]}})
+MATCH (b:Usuario {{email:f[1]}})
+MERGE (a)-[r:SIGUE]->(b){_NUEVO_SEGUIMIENTO}
+""")
+
+# ------------------------------------------------------------
+# BENCHMARKS
+# ------------------------------------------------------------
+# Borrado por lotes de los datos de prueba (usuarios con email en @dominio):
+# recorren todos los usuarios a propósito. Devuelven cuántos borraron, y se
+# repiten hasta que no queda nada.
+BENCH_BORRAR_PUBLICACIONES = registrar("bench.borrar_publicaciones", """
+MATCH (u:Usuario)-[:CREA]->(p:Publicación) WHERE u.email ENDS WITH $sufijo
+WITH p LIMIT $lote
+MERGE (t:Tendencia {dia:p.fecha})
+SET t.sucio = true
+DETACH DELETE p
+RETURN count(*) AS n
+""", permitidos={"Eager"}, max_filas=SIN_LIMITE)
+
+BENCH_BORRAR_USUARIOS = registrar("bench.borrar_usuarios", """
+MATCH (u:Usuario) WHERE u.email ENDS WITH $sufijo
+WITH u LIMIT $lote
+DETACH DELETE u
+RETURN count(*) AS n
+""", max_filas=SIN_LIMITE)
@@ -1,10 +1,17 @@
 # database.py
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 import os
+import json
 import uuid
+from array import array
+from itertools import islice
+from migraciones import aplicar_migraciones, ultima_version
+from coalescencia import Coalescedor
+import consultas as Q
+from consultas import ORDENES_PUBLICACION, ORDENES_USUARIO, ORDENES_ETIQUETA, SIN_LIMITE
 import random
 from datetime import datetime, timedelta
 
@@ -17,6 +24,12 @@ load_dotenv()
 URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 AUTH_USER = os.getenv("NEO4J_USERNAME", "neo4j")
 AUTH_PASS = os.getenv("NEO4J_PASSWORD")
+# Instantánea binaria de AMIGO_DE/SIGUE (ver instantanea_grafo.py) y su bitácora
+GRAFO_INSTANTANEA = os.getenv(
+    "GRAFO_INSTANTANEA",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "db", "grafo.csr"),
+)
+BITACORA_GRAFO = GRAFO_INSTANTANEA + ".log"
 
 # ------------------------------------------------------------
 # DATA MODELS
@@ -47,106 +60,256 @@ def get_driver():
 # SCHEMA / CONSTRAINTS
 # ------------------------------------------------------------
 def init_schema(driver):
-    schema_queries = [
-        """
-        CREATE CONSTRAINT IF NOT EXISTS
-        FOR (u:Usuario) REQUIRE u.email IS UNIQUE
-        """,
-        """
-        CREATE CONSTRAINT IF NOT EXISTS
-        FOR (u:Usuario) REQUIRE (u.id) IS NOT NULL
-        """,
-        """
-        CREATE CONSTRAINT IF NOT EXISTS
-        FOR (p:Publicación) REQUIRE p.id IS UNIQUE
-        """,
-        """
-        CREATE CONSTRAINT IF NOT EXISTS
-        FOR (e:Etiqueta) REQUIRE e.nombre IS UNIQUE
-        """
-    ]
-    with driver.session() as s:
-        for q in schema_queries:
-            s.run(q)
+    """
+    Aplica las migraciones pendientes de db/migraciones (ver migraciones.py).
+    """
+    return aplicar_migraciones(driver)
+
+# ------------------------------------------------------------
+# BITÁCORA DEL GRAFO
+# ------------------------------------------------------------
+# Las escrituras de amistades, seguimientos y usuarios se anotan, una línea
+# JSON por cambio, en la bitácora que instantanea_grafo.py aplica sobre la
+# última instantánea. Solo se anotan las escrituras que cambiaron el grafo
+# (según los contadores de la consulta). La bitácora solo existe si se
+# escribió una instantánea; sin ella no se anota nada. Cada línea se agrega
+# con un único write en modo O_APPEND, así varios procesos pueden anotar a la
+# vez.
+def _anotar(op: str, a: str, b: Optional[str] = None, tipo: Optional[str] = None,
+            nombre: Optional[str] = None):
+    cambio = {"op": op, "a": a}
+    if b is not None:
+        cambio.update(tipo=tipo, b=b)
+    if nombre is not None:
+        cambio["nombre"] = nombre
+    try:
+        fd = os.open(BITACORA_GRAFO, os.O_WRONLY | os.O_APPEND)
+    except FileNotFoundError:
+        return
+    try:
+        os.write(fd, (json.dumps(cambio, ensure_ascii=False) + "\n").encode("utf-8"))
+    finally:
+        os.close(fd)
+
+# ------------------------------------------------------------
+# LECTURAS COMPARTIDAS
+# ------------------------------------------------------------
+# Las funciones de lectura marcadas con @LECTURAS.compartida agrupan las
+# llamadas concurrentes iguales (misma función y argumentos) en una sola
+# consulta, ver coalescencia.py. LECTURAS.estadisticas() da las ahorradas.
+LECTURAS = Coalescedor()
 
 # ------------------------------------------------------------
 # CRUD / UPSERTS
 # ------------------------------------------------------------
 def upsert_usuario(driver, user: UsuarioInput):
-    q = """
-    MERGE (u:Usuario {email:$email})
-    SET u.id=$id, u.nombre=$nombre, u.fechaRegistro=date($fechaRegistro)
-    RETURN u
-    """
     with driver.session() as s:
-        return s.run(q, **user.__dict__).single()
+        r = s.run(Q.UPSERT_USUARIO, **user.__dict__).single()
+    if r:
+        _anotar("usuario", user.email, nombre=user.nombre)
+    return r
 
 def insert_usuario(driver, user: UsuarioInput):
-    q = """
-    CREATE (u:Usuario {
-        id:$id, nombre:$nombre, email:$email,
-        fechaRegistro:date($fechaRegistro), Activo:1
-    })
-    RETURN u
-    """
     with driver.session() as s:
-        return s.run(q, **user.__dict__).single()
+        r = s.run(Q.INSERTAR_USUARIO, **user.__dict__).single()
+    if r:
+        _anotar("usuario", user.email, nombre=user.nombre)
+    return r
 
 def create_publicacion(driver, user_email: str, pub: PublicacionInput):
     """
     Crea una publicación y la conecta con el autor y sus etiquetas.
     """
+    etiquetas = _normalizar_etiquetas(pub.etiquetas)
     def _tx(tx):
         post_id = str(uuid.uuid4())
-        tx.run(
-            """
-            MATCH (u:Usuario {email:$email})
-            MERGE (p:Publicación {id:$id})
-            SET p.contenido=$contenido, p.fecha=date($fecha), p.likes=$likes
-            MERGE (u)-[:CREA]->(p)
-            WITH p, $etiquetas AS tags
-            UNWIND tags AS tag
-            MERGE (e:Etiqueta {nombre:tag})
-            MERGE (p)-[:TIENE_ETIQUETA]->(e)
-            """,
+        record = tx.run(
+            Q.CREAR_PUBLICACION,
             email=user_email, id=post_id,
             contenido=pub.contenido, fecha=pub.fecha,
-            likes=pub.likes, etiquetas=pub.etiquetas
-        )
+            likes=pub.likes, etiquetas=etiquetas,
+            pares=_resolver_etiquetas(tx, etiquetas)
+        ).single()
+        if not record:
+            return
+        faltan = [e for e in etiquetas if e not in record["enlazadas"]]
+        if faltan:
+            # Ids de la caché que ya no son de esa etiqueta (borrada y recreada)
+            for e in faltan:
+                _ids_etiquetas.pop(e, None)
+            tx.run(Q.ENLAZAR_ETIQUETAS, id=post_id, pares=_resolver_etiquetas(tx, faltan)).consume()
+        _registrar_tendencia(tx, post_id, 1, pub.likes)
     with driver.session() as s:
         s.execute_write(_tx)
 
+def _normalizar_etiquetas(etiquetas: List[str]) -> List[str]:
+    # Sin vacíos ni duplicados, conservando el orden
+    return list(dict.fromkeys(e for e in etiquetas if e))
+
+# Caché nombre de etiqueta -> elementId de su nodo. Las etiquetas conocidas se
+# enlazan por id sin tocar el nodo con MERGE, así los escritores concurrentes
+# no hacen cola en los pocos nodos Etiqueta que comparten todas las
+# publicaciones; solo las etiquetas nuevas para este proceso pasan por MERGE.
+_ids_etiquetas: Dict[str, str] = {}
+
+def _resolver_etiquetas(tx, etiquetas: List[str]) -> List[List[str]]:
+    """Pares [nombre, elementId] de las etiquetas, creando las que no existan."""
+    ids = {e: _ids_etiquetas.get(e) for e in etiquetas}
+    nuevas = [e for e, i in ids.items() if i is None]
+    if nuevas:
+        for r in tx.run(Q.RESOLVER_ETIQUETAS, etiquetas=nuevas):
+            ids[r["tag"]] = _ids_etiquetas[r["tag"]] = r["id"]
+    return [[e, ids[e]] for e in etiquetas]
+
+def actualizar_etiquetas(driver, post_id: str,
+                         etiquetas: List[str]) -> Optional[Tuple[str, List[str]]]:
+    """
+    Reemplaza las etiquetas de una publicación, manteniendo sincronizadas las
+    relaciones TIENE_ETIQUETA y la propiedad p.etiquetas. Devuelve (autor,
+    etiquetas anteriores) para el recomendador, o None si no existe.
+    """
+    etiquetas = _normalizar_etiquetas(etiquetas)
+    def _tx(tx):
+        record = tx.run(Q.DATOS_PUBLICACION, id=post_id).single()
+        if not record:
+            return None
+        likes = record["likes"] or 0
+        _registrar_tendencia(tx, post_id, -1, -likes)
+        tx.run(Q.REEMPLAZAR_ETIQUETAS, id=post_id, etiquetas=etiquetas)
+        _registrar_tendencia(tx, post_id, 1, likes)
+        return record["autor"], record["etiquetas"]
+    with driver.session() as s:
+        return s.execute_write(_tx)
+
+def backfill_etiquetas(driver, lote: int = 1000) -> int:
+    """
+    Rellena p.etiquetas y las propiedades de índice de TIENE_ETIQUETA
+    (etiqueta, likes, fecha) a partir de las relaciones existentes, recorriendo
+    las publicaciones por id en lotes. Devuelve el número de publicaciones.
+    """
+    total, desde = 0, ""
+    with driver.session() as s:
+        while True:
+            record = s.execute_write(lambda tx: tx.run(Q.BACKFILL_ETIQUETAS, desde=desde, lote=lote).single())
+            if not record or record["n"] == 0:
+                return total
+            total += record["n"]
+            desde = record["ultimo"]
+
 def create_amistad(driver, email_a: str, email_b: str):
     """
-    Crea amistad bidireccional.
+    Crea la amistad entre dos usuarios: una sola relación, del email menor al mayor.
+    """
+    with driver.session() as s:
+        resumen = s.run(Q.CREAR_AMISTAD, a=email_a, b=email_b).consume()
+    if resumen.counters.relationships_created:
+        _anotar("+", email_a, email_b, "AMIGO_DE")
+
+def eliminar_amistad(driver, email_a: str, email_b: str):
     """
-    q = """
-    MATCH (a:Usuario {email:$a})
-    MATCH (b:Usuario {email:$b})
-    MERGE (a)-[:AMIGO_DE]->(b)
-    MERGE (b)-[:AMIGO_DE]->(a)
+    Elimina la amistad entre dos usuarios, en ambas direcciones.
     """
     with driver.session() as s:
-        s.run(q, a=email_a, b=email_b)
+        resumen = s.run(Q.ELIMINAR_AMISTAD, a=email_a, b=email_b).consume()
+    if resumen.counters.relationships_deleted:
+        _anotar("-", email_a, email_b, "AMIGO_DE")
 
 def create_seguimiento(driver, seguidor: str, seguido: str):
     """
-    Crea relación de seguimiento unidireccional.
+    Crea relación de seguimiento unidireccional y suma uno a los contadores
+    de ambos usuarios (solo si no existía).
+    """
+    with driver.session() as s:
+        resumen = s.run(Q.CREAR_SEGUIMIENTO, seguidor=seguidor, seguido=seguido).consume()
+    if resumen.counters.relationships_created:
+        _anotar("+", seguidor, seguido, "SIGUE")
+
+def eliminar_seguimiento(driver, seguidor: str, seguido: str):
+    """
+    Elimina la relación de seguimiento de seguidor a seguido y descuenta los
+    contadores.
     """
-    q = """
-    MATCH (a:Usuario {email:$seguidor})
-    MATCH (b:Usuario {email:$seguido})
-    MERGE (a)-[:SIGUE]->(b)
+    with driver.session() as s:
+        resumen = s.run(Q.ELIMINAR_SEGUIMIENTO, seguidor=seguidor, seguido=seguido).consume()
+    if resumen.counters.relationships_deleted:
+        _anotar("-", seguidor, seguido, "SIGUE")
+
+def actualizar_publicacion(driver, post_id: str, contenido: str, likes: int):
+    """
+    Actualiza contenido y likes de una publicación y ajusta las tendencias
+    con la diferencia de likes.
     """
+    def _tx(tx):
+        record = tx.run(
+            Q.ACTUALIZAR_PUBLICACION,
+            id=post_id, contenido=contenido, likes=likes
+        ).single()
+        if record:
+            _registrar_tendencia(tx, post_id, 0, record["delta"])
     with driver.session() as s:
-        s.run(q, seguidor=seguidor, seguido=seguido)
+        s.execute_write(_tx)
 
+def incrementar_likes(driver, post_id: str, delta: int = 1):
+    """
+    Suma delta a los likes de una publicación de forma atómica en el servidor.
+    """
+    incrementar_likes_lote(driver, {post_id: delta})
+
+def incrementar_likes_lote(driver, deltas: Dict[str, int]):
+    """
+    Aplica varios incrementos de likes {post_id: delta} en una sola transacción.
+    """
+    filas = [{"id": post_id, "dp": 0, "dl": d} for post_id, d in deltas.items() if d]
+    if not filas:
+        return
+    def _tx(tx):
+        tx.run(Q.SUMAR_LIKES, filas=filas)
+        tx.run(Q.SINCRONIZAR_LIKES_ETIQUETAS, filas=filas)
+        _registrar_tendencias(tx, filas)
+    with driver.session() as s:
+        s.execute_write(_tx)
+
+def eliminar_publicacion(driver, post_id: str) -> Optional[Tuple[str, List[str]]]:
+    """
+    Elimina una publicación descontándola antes de sus buckets de tendencia.
+    Devuelve (autor, etiquetas) para el recomendador, o None si no existía.
+    """
+    def _tx(tx):
+        record = tx.run(Q.DATOS_PUBLICACION, id=post_id).single()
+        if not record:
+            return None
+        _registrar_tendencia(tx, post_id, -1, -(record["likes"] or 0))
+        tx.run(Q.ELIMINAR_PUBLICACION, id=post_id)
+        return record["autor"], record["etiquetas"]
+    with driver.session() as s:
+        return s.execute_write(_tx)
+
+@LECTURAS.compartida
 def find_usuario(driver, email: str) -> Optional[Dict[str, Any]]:
-    q = "MATCH (u:Usuario {email:$email}) RETURN u"
     with driver.session() as s:
-        record = s.run(q, email=email).single()
+        record = s.run(Q.BUSCAR_USUARIO, email=email).single()
         return record["u"] if record else None
 
+@LECTURAS.compartida
+def find_usuarios(driver, emails: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Varios usuarios en una sola consulta: {email: usuario}. Los emails que no
+    existen no aparecen en el resultado.
+    """
+    if not emails:
+        return {}
+    with driver.session() as s:
+        return {r["email"]: r["u"] for r in s.run(Q.BUSCAR_USUARIOS, emails=list(dict.fromkeys(emails)))}
+
+def eliminar_usuario(driver, email: str):
+    """
+    Elimina un usuario y todas sus relaciones.
+    """
+    with driver.session() as s:
+        resumen = s.run(Q.ELIMINAR_USUARIO, email=email).consume()
+    if resumen.counters.nodes_deleted:
+        _anotar("-usuario", email)
+
 # ------------------------------------------------------------
 # TOSTRING
 # ------------------------------------------------------------
@@ -162,74 +325,423 @@ def publicacion_to_str(pub: Dict[str, Any]) -> str:
 # ------------------------------------------------------------
 # QUERIES
 # ------------------------------------------------------------
-def publicaciones_por_usuario(driver, email: str) -> List[Dict[str, Any]]:
-    q = """
-    MATCH (u:Usuario {email: $email})-[:CREA]->(p:Publicación)
-    OPTIONAL MATCH (p)-[:TIENE_ETIQUETA]->(e:Etiqueta)
-    WITH p, collect(DISTINCT e.nombre) AS etiquetas
-    RETURN p.id AS id,
-           p.contenido AS contenido,
-           p.fecha AS fecha,
-           p.likes AS likes,
-           etiquetas
-    ORDER BY p.fecha DESC
+# Las columnas de orden (ORDENES_*) y una variante registrada de cada consulta
+# por columna y sentido viven en consultas.py
+def _orden(variantes: Dict[Tuple[str, bool], str], ordenes: Dict[str, str],
+           clave: str, descendente: bool) -> str:
+    if clave not in ordenes:
+        raise ValueError(f"Orden inválido: {clave} (usar {', '.join(ordenes)})")
+    return variantes[(clave, descendente)]
+
+@LECTURAS.compartida
+def publicaciones_por_usuario(driver, email: str, skip: int = 0, limit: Optional[int] = None,
+                              orden: str = "fecha", descendente: bool = True) -> List[Dict[str, Any]]:
+    q = _orden(Q.PUBLICACIONES_POR_USUARIO, ORDENES_PUBLICACION, orden, descendente)
+    limit = SIN_LIMITE if limit is None else limit
+    with driver.session() as s:
+        return [r.data() for r in s.run(q, email=email, skip=skip, limit=limit)]
+
+@LECTURAS.compartida
+def publicaciones_por_usuarios(driver, emails: List[str],
+                               por_usuario: int = 3) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Las por_usuario publicaciones más recientes de cada email, en una sola
+    consulta: {email: [publicaciones]} (lista vacía si no tiene).
     """
+    if not emails:
+        return {}
+    emails = list(dict.fromkeys(emails))
     with driver.session() as s:
-        return [r.data() for r in s.run(q, email=email)]
+        filas = {r["email"]: r["publicaciones"]
+                 for r in s.run(Q.PUBLICACIONES_POR_USUARIOS, emails=emails, limit=por_usuario)}
+    return {email: filas.get(email, []) for email in emails}
 
-def amigos_en_comun(driver, email1: str, email2: str) -> List[str]:
-    q = """
-    MATCH (u1:Usuario {email: $email1}), (u2:Usuario {email: $email2})
-    MATCH (amigo:Usuario)
-    WHERE (u1)-[:AMIGO_DE]-(amigo)
-      AND (u2)-[:AMIGO_DE]-(amigo)
-      AND amigo <> u1
-      AND amigo <> u2
-    RETURN DISTINCT coalesce(amigo.nombre, amigo.email) AS nombre
-    ORDER BY nombre
-    """
-    with driver.session() as s:
-        return [r["nombre"] for r in s.run(q, email1=email1, email2=email2)]
-
-def top_publicaciones(driver, skip: int = 0, limit: int = 5) -> List[Dict[str, Any]]:
-    q = """
-    MATCH (p:Publicación)<-[:CREA]-(u:Usuario)
-    OPTIONAL MATCH (p)-[:TIENE_ETIQUETA]->(e:Etiqueta)
-    WITH p, u, collect(DISTINCT e.nombre) AS etiquetas
-    RETURN p.id AS id,
-           u.nombre AS autor,
-           p.contenido AS contenido,
-           p.likes AS likes,
-           p.fecha AS fecha,
-           etiquetas
-    ORDER BY p.likes DESC
-    SKIP $skip
-    LIMIT $limit
+@LECTURAS.compartida
+def contar_publicaciones(driver, email: Optional[str] = None) -> int:
     """
+    Número de publicaciones de un usuario (o de todas si email es None),
+    leído de los contadores de grado/etiqueta sin recorrer las publicaciones.
+    """
+    q = Q.CONTAR_PUBLICACIONES if email is None else Q.CONTAR_PUBLICACIONES_USUARIO
+    with driver.session() as s:
+        record = s.run(q, email=email).single()
+        return record["n"] if record else 0
+
+@LECTURAS.compartida
+def amigos_en_comun(driver, email1: str, email2: str) -> List[str]:
+    with driver.session() as s:
+        return [r["nombre"] for r in s.run(Q.AMIGOS_EN_COMUN, email1=email1, email2=email2)]
+
+@LECTURAS.compartida
+def top_publicaciones(driver, skip: int = 0, limit: int = 5,
+                      orden: str = "likes", descendente: bool = True) -> List[Dict[str, Any]]:
+    q = _orden(Q.TOP_PUBLICACIONES, ORDENES_PUBLICACION, orden, descendente)
     with driver.session() as s:
         return [r.data() for r in s.run(q, limit=limit, skip=skip)]
 
+@LECTURAS.compartida
+def publicaciones_por_etiqueta(driver, etiqueta: str, cursor: Optional[str] = None,
+                               limit: int = 10, orden: str = "likes"):
+    """
+    Página de publicaciones de una etiqueta ordenadas por likes o fecha (desc).
+    Devuelve (filas, siguiente_cursor); el cursor es None en la última página.
+    """
+    if orden not in ORDENES_ETIQUETA:
+        raise ValueError(f"Orden inválido: {orden} (usar {', '.join(ORDENES_ETIQUETA)})")
+    campo = ORDENES_ETIQUETA[orden]
+
+    params: Dict[str, Any] = {"etiqueta": etiqueta, "limit": limit}
+    if cursor:
+        valor, post_id = cursor.split("|", 1)
+        params["valor"] = int(valor) if campo == "likes" else valor
+        params["post_id"] = post_id
+
+    q = Q.PUBLICACIONES_POR_ETIQUETA[(campo, bool(cursor))]
+    with driver.session() as s:
+        filas = [r.data() for r in s.run(q, **params)]
+
+    siguiente = None
+    if len(filas) == limit:
+        ultima = filas[-1]
+        siguiente = f"{ultima['clave']}|{ultima['id']}"
+    for fila in filas:
+        del fila["clave"]
+    return filas, siguiente
+
+@LECTURAS.compartida
+def publicaciones_en_rango(driver, email: Optional[str], desde: str, hasta: str,
+                           cursor: Optional[str] = None, limit: int = 20):
+    """
+    Página de publicaciones con fecha entre desde y hasta (inclusive, 'YYYY-MM-DD')
+    de un usuario, o de todos si email es None, de la más reciente a la más
+    antigua. Devuelve (filas, siguiente_cursor); el cursor es None en la última
+    página.
+    """
+    params: Dict[str, Any] = {"email": email, "desde": str(desde), "hasta": str(hasta), "limit": limit}
+    if cursor:
+        params["hasta"], params["post_id"] = cursor.split("|", 1)
+    q = Q.PUBLICACIONES_EN_RANGO[(email is not None, bool(cursor))]
+    with driver.session() as s:
+        filas = [r.data() for r in s.run(q, **params)]
+
+    siguiente = None
+    if len(filas) == limit:
+        ultima = filas[-1]
+        siguiente = f"{ultima['fecha']}|{ultima['id']}"
+    return filas, siguiente
+
+@LECTURAS.compartida
+def get_all_usuarios(driver, fetch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    with _sesion(driver, fetch_size) as s:
+        return [r["u"] for r in s.run(Q.TODOS_LOS_USUARIOS)]
+
+@LECTURAS.compartida
+def emails_usuarios(driver, fetch_size: Optional[int] = None) -> List[str]:
+    with _sesion(driver, fetch_size) as s:
+        return [r["email"] for r in s.run(Q.EMAILS_USUARIOS)]
+
+@LECTURAS.compartida
+def usuarios_pagina(driver, skip: int = 0, limit: int = 100,
+                    orden: str = "email", descendente: bool = False) -> List[Dict[str, Any]]:
+    q = _orden(Q.USUARIOS_PAGINA, ORDENES_USUARIO, orden, descendente)
+    with driver.session() as s:
+        return [r.data() for r in s.run(q, skip=skip, limit=limit)]
+
+@LECTURAS.compartida
+def contar_usuarios(driver) -> int:
+    with driver.session() as s:
+        return s.run(Q.CONTAR_USUARIOS).single()["n"]
+
+@LECTURAS.compartida
+def feed(driver, email: str, skip: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Publicaciones de los usuarios que sigue email, de la más reciente a la más antigua.
+    """
+    with driver.session() as s:
+        return [r.data() for r in s.run(Q.FEED, email=email, skip=skip, limit=limit)]
+
+@LECTURAS.compartida
+def contar_seguimientos(driver, email: str) -> Dict[str, int]:
+    """Seguidores y seguidos de un usuario, leídos de sus contadores (O(1))."""
+    with driver.session() as s:
+        r = s.run(Q.CONTAR_SEGUIMIENTOS, email=email).single()
+    return r.data() if r else {"seguidores": 0, "seguidos": 0}
+
+# Por encima de este grado los listados se leen del índice de SIGUE en vez de
+# expandir las relaciones del usuario
+GRADO_DENSO = 1_000
+
+def _seguimientos(driver, direccion: str, email: str, cursor: Optional[str], limit: int):
+    params: Dict[str, Any] = {"email": email, "limit": limit}
+    if cursor:
+        clave, params["otro"] = cursor.split("|", 1)
+        params["clave"] = int(clave)
+    with driver.session() as s:
+        grados = s.run(Q.CONTAR_SEGUIMIENTOS, email=email).single()
+        if grados is None:
+            return [], None
+        q = Q.SEGUIMIENTOS[(direccion, grados[direccion] > GRADO_DENSO, bool(cursor))]
+        filas = [r.data() for r in s.run(q, **params)]
+
+    siguiente = None
+    if len(filas) == limit:
+        ultima = filas[-1]
+        siguiente = f"{ultima['clave']}|{ultima['email']}"
+    for fila in filas:
+        del fila["clave"]
+    return filas, siguiente
+
+@LECTURAS.compartida
+def seguidores(driver, email: str, cursor: Optional[str] = None, limit: int = 20):
+    """
+    Página de seguidores (email, nombre, desde), del más reciente al más
+    antiguo. Devuelve (filas, siguiente_cursor); el cursor es None en la
+    última página.
+    """
+    return _seguimientos(driver, "seguidores", email, cursor, limit)
+
+@LECTURAS.compartida
+def seguidos(driver, email: str, cursor: Optional[str] = None, limit: int = 20):
+    """Como seguidores, para los usuarios que email sigue."""
+    return _seguimientos(driver, "seguidos", email, cursor, limit)
+
+@LECTURAS.compartida
+def amigos_de(driver, email: str) -> List[Dict[str, Any]]:
+    """Amigos de un usuario (email y nombre), por nombre."""
+    with driver.session() as s:
+        return [r.data() for r in s.run(Q.AMIGOS_DE, email=email)]
+
+@LECTURAS.compartida
 def sugerencias_de_amigos(driver, email: str) -> List[str]:
-    q = """
-    MATCH (u:Usuario {email: $email})-[:AMIGO_DE]-(a)-[:AMIGO_DE]-(sugerencia:Usuario)
-    WHERE NOT (u)-[:AMIGO_DE]-(sugerencia)
-      AND u <> sugerencia
-    RETURN DISTINCT sugerencia.nombre AS nombre
+    with driver.session() as s:
+        return [r["nombre"] for r in s.run(Q.SUGERENCIAS_DE_AMIGOS, email=email)]
+
+# ------------------------------------------------------------
+# LECTURAS MASIVAS
+# ------------------------------------------------------------
+# El driver trae los registros del servidor en lotes de fetch_size (1000 por
+# defecto). Las lecturas grandes piden lotes mayores para hacer menos viajes,
+# y leer_columnas evita crear un dict por fila: transpone cada lote de
+# registros y lo agrega de una vez a un array.array por columna.
+FETCH_SIZE_MASIVO = 10_000
+
+def _sesion(driver, fetch_size: Optional[int] = None):
+    return driver.session(fetch_size=fetch_size) if fetch_size else driver.session()
+
+def leer_columnas(driver, q: str, tipos: Dict[str, str], fetch_size: int = FETCH_SIZE_MASIVO,
+                  **params) -> Dict[str, Any]:
+    """
+    Ejecuta q y devuelve {columna: valores}. tipos da, por columna del RETURN,
+    un typecode de array.array ("q" enteros, "d" reales, ...) o "O" para
+    guardar los valores en una lista. Las columnas numéricas no admiten null.
+    """
+    columnas = {c: [] if t == "O" else array(t) for c, t in tipos.items()}
+    with _sesion(driver, fetch_size) as s:
+        result = s.run(q, **params)
+        claves = result.keys()
+        destinos = [(claves.index(c), columnas[c]) for c in tipos]
+        registros = iter(result)
+        while True:
+            lote = list(islice(registros, fetch_size))
+            if not lote:
+                return columnas
+            valores = list(zip(*lote))
+            for i, columna in destinos:
+                columna.extend(valores[i])
+
+def a_numpy(columnas: Dict[str, Any]) -> Dict[str, Any]:
+    """Vistas NumPy sin copia de las columnas numéricas; las listas se convierten a arreglos."""
+    import numpy as np
+    return {
+        c: np.frombuffer(v, dtype=v.typecode) if isinstance(v, array) else np.array(v)
+        for c, v in columnas.items()
+    }
+
+# ------------------------------------------------------------
+# GRADOS DE SEPARACIÓN
+# ------------------------------------------------------------
+# BFS bidireccional sobre AMIGO_DE: en cada salto se expande la frontera más
+# pequeña con consultas por lotes de LOTE_FRONTERA emails, y la búsqueda se
+# corta al primer encuentro, al llegar a max_depth o al superar MAX_VISITADOS.
+LOTE_FRONTERA = 1000
+MAX_VISITADOS = 1_000_000
+
+def _vecinos_amigos(session, emails: List[str]):
+    for i in range(0, len(emails), LOTE_FRONTERA):
+        for r in session.run(Q.VECINOS_AMIGOS, emails=emails[i:i + LOTE_FRONTERA]):
+            yield r["email"], r["vecinos"]
+
+def _reconstruir(padres: Dict[str, Optional[str]], nodo: Optional[str]) -> List[str]:
+    camino = []
+    while nodo is not None:
+        camino.append(nodo)
+        nodo = padres[nodo]
+    return camino
+
+@LECTURAS.compartida
+def camino(driver, email_a: str, email_b: str, max_depth: int = 6,
+           max_visitados: int = MAX_VISITADOS) -> Optional[List[str]]:
+    """
+    Camino más corto de amistades entre dos usuarios (lista de emails), o None
+    si no están conectados en max_depth saltos.
     """
+    if email_a == email_b:
+        return [email_a]
+    padres_a: Dict[str, Optional[str]] = {email_a: None}
+    padres_b: Dict[str, Optional[str]] = {email_b: None}
+    frontera_a, frontera_b = [email_a], [email_b]
+    saltos = 0
     with driver.session() as s:
-        return [r["nombre"] for r in s.run(q, email=email)]
+        while frontera_a and frontera_b and saltos < max_depth:
+            desde_a = len(frontera_a) <= len(frontera_b)
+            frontera, padres, otros = (
+                (frontera_a, padres_a, padres_b) if desde_a else (frontera_b, padres_b, padres_a)
+            )
+            nueva = []
+            for email, vecinos in _vecinos_amigos(s, frontera):
+                for v in vecinos:
+                    if v in padres:
+                        continue
+                    padres[v] = email
+                    if v in otros:
+                        lado_a = _reconstruir(padres_a, v)[::-1]
+                        return lado_a + _reconstruir(padres_b, padres_b[v])
+                    nueva.append(v)
+                if len(padres_a) + len(padres_b) > max_visitados:
+                    raise RuntimeError(
+                        f"Búsqueda abortada: más de {max_visitados} usuarios visitados"
+                    )
+            if desde_a:
+                frontera_a = nueva
+            else:
+                frontera_b = nueva
+            saltos += 1
+    return None
+
+@LECTURAS.compartida
+def grado_de_separacion(driver, email_a: str, email_b: str, max_depth: int = 6) -> Optional[int]:
+    """
+    Número de saltos de amistad entre dos usuarios, o None si no están
+    conectados en max_depth saltos.
+    """
+    ruta = camino(driver, email_a, email_b, max_depth)
+    return len(ruta) - 1 if ruta else None
+
+# ------------------------------------------------------------
+# TENDENCIAS
+# ------------------------------------------------------------
+# Cada día con publicaciones tiene un nodo (:Tendencia {dia}) con los ids de
+# sus TOP_POR_BUCKET publicaciones con más likes, y un (:TendenciaEtiqueta
+# {dia, etiqueta}) por etiqueta con contadores de posts y likes. Los
+# contadores se ajustan en la misma transacción de cada escritura; el top de
+# posts se recalcula en refrescar_tendencias solo para los buckets marcados
+# como sucios.
+VENTANAS_TENDENCIA = {"dia": 1, "semana": 7, "mes": 30}
+TOP_POR_BUCKET = 20
+
+def _registrar_tendencia(tx, post_id: str, delta_posts: int, delta_likes: int):
+    _registrar_tendencias(tx, [{"id": post_id, "dp": delta_posts, "dl": delta_likes}])
+
+def _registrar_tendencias(tx, filas: List[Dict[str, Any]]):
+    tx.run(Q.REGISTRAR_TENDENCIAS, filas=filas)
+
+def _dias_ventana(ventana: str) -> int:
+    if ventana not in VENTANAS_TENDENCIA:
+        raise ValueError(f"Ventana inválida: {ventana} (usar {', '.join(VENTANAS_TENDENCIA)})")
+    return VENTANAS_TENDENCIA[ventana]
 
-def get_all_usuarios(driver) -> List[Dict[str, Any]]:
-    q = "MATCH (u:Usuario) RETURN u"
+def refrescar_tendencias(driver, todas: bool = False, lote: int = 100) -> int:
+    """
+    Recalcula los buckets de tendencia sucios (o todos si todas=True).
+    Devuelve el número de buckets recalculados.
+    """
+    if todas:
+        with driver.session() as s:
+            s.run(Q.MARCAR_TENDENCIAS)
+
+    def _tx(tx, dia):
+        tx.run(Q.RECALCULAR_TOP_TENDENCIA, dia=dia, n=TOP_POR_BUCKET)
+        tx.run(Q.BORRAR_TENDENCIAS_ETIQUETA, dia=dia)
+        tx.run(Q.RECALCULAR_TENDENCIAS_ETIQUETA, dia=dia)
+
+    total = 0
     with driver.session() as s:
-        return [r["u"] for r in s.run(q)]
-    
+        while True:
+            dias = [r["dia"] for r in s.run(Q.TENDENCIAS_SUCIAS, lote=lote)]
+            if not dias:
+                return total
+            for dia in dias:
+                s.execute_write(_tx, dia)
+            total += len(dias)
+
+@LECTURAS.compartida
+def top_publicaciones_tendencia(driver, ventana: str = "semana", limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Publicaciones con más likes de la ventana (dia/semana/mes), leídas de los
+    buckets precalculados.
+    """
+    with driver.session() as s:
+        return [r.data() for r in s.run(Q.TOP_PUBLICACIONES_TENDENCIA, dias=_dias_ventana(ventana),
+                                        limit=min(limit, TOP_POR_BUCKET))]
+
+@LECTURAS.compartida
+def top_etiquetas_tendencia(driver, ventana: str = "semana", limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Etiquetas con más publicaciones (y likes, como desempate) en la ventana.
+    """
+    with driver.session() as s:
+        return [r.data() for r in s.run(Q.TOP_ETIQUETAS_TENDENCIA, dias=_dias_ventana(ventana), limit=limit)]
+
+# ------------------------------------------------------------
+# MARCADOR DE INICIALIZACIÓN
+# ------------------------------------------------------------
+# Un único nodo indica que la base ya tiene esquema y datos, para que el
+# arranque no vuelva a sembrar. Subir VERSION_DATOS fuerza una re-siembra.
+VERSION_DATOS = 1
+
+def leer_versiones(driver) -> Tuple[Optional[int], int]:
+    """
+    (versión de datos, versión de esquema) en una sola consulta, para que el
+    arranque cueste un único viaje al servidor.
+    """
+    with driver.session() as s:
+        record = s.run(Q.LEER_VERSIONES).single()
+        return record["datos"], record["esquema"]
+
+def inicializada(driver) -> bool:
+    """True si los datos y el esquema están al día."""
+    datos, esquema = leer_versiones(driver)
+    return datos == VERSION_DATOS and esquema == ultima_version()
+
+def escribir_marcador(driver, version: int = VERSION_DATOS):
+    with driver.session() as s:
+        s.run(Q.ESCRIBIR_MARCADOR, version=version)
+
+def hay_datos(driver) -> bool:
+    with driver.session() as s:
+        return s.run(Q.HAY_DATOS).single()["hay"]
+
+# ------------------------------------------------------------
+# SERVICIOS EN MEMORIA
+# ------------------------------------------------------------
+# Objetos con estado propio sobre el driver (likes por lotes, recomendador).
+# Se crean desde aquí para que quien reciba este módulo como backend pueda
+# reemplazarlos; se importan al llamar porque ambos módulos importan database.
+def agregador_likes(driver, intervalo: float = 0.5):
+    from likes import AgregadorLikes
+    return AgregadorLikes(driver, intervalo)
+
+def recomendador(driver, k: int = 10):
+    from recomendaciones import Recomendador
+    return Recomendador(driver, k)
+
 # ------------------------------------------------------------
 # DELETES ALL
 # ------------------------------------------------------------
 def delete_all(driver):
     with driver.session() as s:
-        s.run("MATCH (n) DETACH DELETE n")
+        s.run(Q.BORRAR_TODO)
+    _ids_etiquetas.clear()
 
 # ------------------------------------------------------------
 # EXAMPLE DATA LOAD
@@ -327,35 +839,30 @@ def seed_data(driver):
 # ------------------------------------------------------------
 # DATABASE INFO
 # ------------------------------------------------------------
+@LECTURAS.compartida
 def get_database_info(driver):
     """Obtiene información de la base de datos para verificación"""
     info = {}
     
     with driver.session() as s:
         # Contar usuarios
-        result = s.run("MATCH (u:Usuario) RETURN count(u) as count")
+        result = s.run(Q.INFO_USUARIOS)
         info['usuarios'] = result.single()["count"]
         
         # Contar publicaciones
-        result = s.run("MATCH (p:Publicación) RETURN count(p) as count")
+        result = s.run(Q.INFO_PUBLICACIONES)
         info['publicaciones'] = result.single()["count"]
         
         # Contar etiquetas
-        result = s.run("MATCH (e:Etiqueta) RETURN count(e) as count")
+        result = s.run(Q.INFO_ETIQUETAS)
         info['etiquetas'] = result.single()["count"]
         
         # Obtener etiquetas
-        result = s.run("MATCH (e:Etiqueta) RETURN e.nombre as nombre ORDER BY nombre")
+        result = s.run(Q.INFO_LISTA_ETIQUETAS)
         info['lista_etiquetas'] = [record["nombre"] for record in result]
         
         # Amistades por usuario (primeros 5)
-        result = s.run("""
-        MATCH (u:Usuario)
-        RETURN u.email as email, u.nombre as nombre, 
-               size([(u)-[:AMIGO_DE]-(:Usuario) | 1]) as amigos_count
-        ORDER BY amigos_count DESC
-        LIMIT 5
-        """)
+        result = s.run(Q.INFO_TOP_AMISTADES)
         info['top_amistades'] = [(record["nombre"], record["amigos_count"]) for record in result]
     
     return info
\ No newline at end of file
@@ -0,0 +1,402 @@
+# instantanea_grafo.py
+# Instantánea binaria del grafo de usuarios para responder consultas de
+# amistad sin pasar por Neo4j. Un solo archivo guarda la tabla email -> id
+# (emails ordenados de ancho fijo, el id es la posición), los nombres y la
+# adyacencia CSR de AMIGO_DE (no dirigida) y SIGUE (saliente). El lector lo
+# abre con mmap y trabaja sobre vistas NumPy sin copia, así el arranque no
+# depende del tamaño del grafo y el sistema operativo solo trae a memoria las
+# páginas que se consultan, aunque el archivo no quepa en RAM.
+#
+# Las escrituras posteriores las anota database.py en la bitácora
+# (<instantánea>.log); el lector la aplica encima de la instantánea al abrir y
+# en cada actualizar().
+#
+#   python instantanea_grafo.py --escribir
+#   python instantanea_grafo.py --comunes ana@mail.com bruno@mail.com --sugerencias ana@mail.com
+import argparse
+import json
+import mmap
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from consultas import INSTANTANEA_ADYACENCIA, INSTANTANEA_USUARIOS
+from database import GRAFO_INSTANTANEA, get_driver, leer_columnas
+
+MAGIA = b"GRAFOCSR"
+VERSION = 1
+CABECERA = 4096     # bytes reservados al inicio: MAGIA + cabecera JSON
+ALINEACION = 64
+PAGINA = 10_000
+TIPOS = tuple(INSTANTANEA_ADYACENCIA)
+_VACIO = np.zeros(0, dtype=np.int64)
+
+
+# ------------------------------------------------------------
+# ESCRITURA
+# ------------------------------------------------------------
+def _ids(emails: np.ndarray, valores: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Ids de una lista de emails y la máscara de los que están en la tabla."""
+    if not valores or not len(emails):
+        return np.zeros(len(valores), dtype=np.int64), np.zeros(len(valores), dtype=bool)
+    claves = np.array([v.encode("utf-8") for v in valores], dtype="S")
+    pos = np.minimum(np.searchsorted(emails, claves), len(emails) - 1)
+    return pos, emails[pos] == claves
+
+
+def _alinear(f):
+    resto = f.tell() % ALINEACION
+    if resto:
+        f.write(b"\0" * (ALINEACION - resto))
+
+
+def _seccion(f, secciones: Dict[str, Any], nombre: str, arreglo: np.ndarray):
+    _alinear(f)
+    secciones[nombre] = {"offset": f.tell(), "dtype": arreglo.dtype.str, "n": len(arreglo)}
+    arreglo.tofile(f)
+
+
+def _escribir_aristas(f, secciones: Dict[str, Any], driver, tipo: str, emails: np.ndarray,
+                      pagina: int) -> np.ndarray:
+    """
+    Recorre los usuarios por páginas ordenadas por email y escribe los
+    destinos de cada uno, ordenados, directamente al archivo. En memoria solo
+    quedan los grados (un int64 por usuario). Devuelve indptr.
+    """
+    n = len(emails)
+    grados = np.zeros(n, dtype=np.int64)
+    _alinear(f)
+    offset, m, ultimo = f.tell(), 0, -1
+    desde = ""
+    with driver.session(fetch_size=pagina) as s:
+        while True:
+            filas = list(s.run(INSTANTANEA_ADYACENCIA[tipo], desde=desde, pagina=pagina))
+            if not filas:
+                break
+            desde = filas[-1]["email"]
+            origenes, validos = _ids(emails, [fila["email"] for fila in filas])
+            largos = np.array([len(fila["destinos"]) for fila in filas], dtype=np.int64)
+            destinos, destinos_validos = _ids(emails, [d for fila in filas for d in fila["destinos"]])
+            # Usuarios o destinos creados después de leer la tabla de emails:
+            # quedan fuera, sus cambios están en la bitácora
+            origenes = np.repeat(np.where(validos, origenes, -1), largos)
+            mascara = destinos_validos & (origenes >= 0)
+            src, dst = origenes[mascara], destinos[mascara]
+            if not len(src):
+                continue
+            if src.min() <= ultimo:
+                raise ValueError("El orden de emails de Neo4j no coincide con el orden por bytes")
+            orden = np.lexsort((dst, src))
+            src, dst = src[orden], dst[orden]
+            unicos = np.ones(len(src), dtype=bool)
+            unicos[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+            src, dst = src[unicos], dst[unicos]
+            np.add.at(grados, src, 1)
+            dst.astype(np.int32).tofile(f)
+            m += len(dst)
+            ultimo = int(src[-1])
+    secciones[f"{tipo}.indices"] = {"offset": offset, "dtype": np.dtype(np.int32).str, "n": m}
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(grados, out=indptr[1:])
+    return indptr
+
+
+def escribir(driver, ruta: str = GRAFO_INSTANTANEA, pagina: int = PAGINA) -> Dict[str, Any]:
+    """
+    Escribe la instantánea en ruta (vía un archivo temporal y os.replace, así
+    los lectores nunca ven un archivo a medias) y devuelve su cabecera.
+    """
+    bitacora = ruta + ".log"
+    # La bitácora se crea antes de leer el grafo: lo que se escriba mientras
+    # tanto queda anotado y el lector lo vuelve a aplicar (los cambios son
+    # idempotentes)
+    with open(bitacora, "ab"):
+        pass
+    desde_bitacora = os.path.getsize(bitacora)
+
+    usuarios = leer_columnas(driver, INSTANTANEA_USUARIOS, {"email": "O", "nombre": "O"}, fetch_size=pagina)
+    emails = np.array([e.encode("utf-8") for e in usuarios["email"]], dtype="S")
+    if len(emails) > 1 and not np.all(emails[1:] > emails[:-1]):
+        raise ValueError("El orden de emails de Neo4j no coincide con el orden por bytes")
+    nombres = [nombre.encode("utf-8") for nombre in usuarios["nombre"]]
+    offsets = np.zeros(len(nombres) + 1, dtype=np.int64)
+    np.cumsum([len(nombre) for nombre in nombres], out=offsets[1:])
+
+    secciones: Dict[str, Any] = {}
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(b"\0" * CABECERA)
+        _seccion(f, secciones, "emails", emails)
+        _seccion(f, secciones, "nombres.offsets", offsets)
+        _seccion(f, secciones, "nombres.datos", np.frombuffer(b"".join(nombres), dtype=np.uint8))
+        for tipo in TIPOS:
+            _seccion(f, secciones, f"{tipo}.indptr", _escribir_aristas(f, secciones, driver, tipo, emails, pagina))
+        cabecera = {
+            "version": VERSION,
+            "creada": datetime.now().isoformat(timespec="seconds"),
+            "usuarios": len(emails),
+            "aristas": {tipo: secciones[f"{tipo}.indices"]["n"] for tipo in TIPOS},
+            "bitacora": desde_bitacora,
+            "secciones": secciones,
+        }
+        datos = MAGIA + json.dumps(cabecera).encode("utf-8")
+        if len(datos) >= CABECERA:
+            raise ValueError("La cabecera no cabe en el espacio reservado")
+        f.seek(0)
+        f.write(datos)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+    return cabecera
+
+
+# ------------------------------------------------------------
+# LECTURA
+# ------------------------------------------------------------
+class GrafoLocal:
+    """
+    Lector de la instantánea con la bitácora aplicada encima. Los cambios de
+    la bitácora viven en memoria como diferencias por usuario (aristas
+    agregadas y quitadas, usuarios eliminados); los usuarios que no están en
+    la instantánea reciben ids a partir de n.
+    """
+
+    def __init__(self, ruta: str = GRAFO_INSTANTANEA):
+        self.ruta = ruta
+        self._archivo = open(ruta, "rb")
+        self._mm = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIA)] != MAGIA:
+            self.cerrar()
+            raise ValueError(f"{ruta} no es una instantánea del grafo")
+        fin = self._mm.find(b"\0", len(MAGIA), CABECERA)
+        self.cabecera = json.loads(self._mm[len(MAGIA):fin])
+        if self.cabecera["version"] != VERSION:
+            self.cerrar()
+            raise ValueError(f"Versión de instantánea no soportada: {self.cabecera['version']}")
+
+        self.emails = self._vista("emails")
+        self._offsets_nombres = self._vista("nombres.offsets")
+        self._nombres_datos = self._vista("nombres.datos")
+        self._adyacencia = {t: (self._vista(f"{t}.indptr"), self._vista(f"{t}.indices")) for t in TIPOS}
+        self.n = len(self.emails)
+
+        # Cambios de la bitácora
+        self._nuevos: Dict[str, int] = {}
+        self._emails_nuevos: List[str] = []
+        self._nombres: Dict[int, str] = {}
+        self._agregadas: Dict[str, Dict[int, Set[int]]] = {t: {} for t in TIPOS}
+        self._quitadas: Dict[str, Dict[int, Set[int]]] = {t: {} for t in TIPOS}
+        self._eliminados: Set[int] = set()
+        self._eliminados_arreglo = _VACIO
+        self._pos_bitacora = self.cabecera["bitacora"]
+        self.cambios = 0
+        self.actualizar()
+
+    def _vista(self, nombre: str) -> np.ndarray:
+        s = self.cabecera["secciones"][nombre]
+        return np.frombuffer(self._mm, dtype=np.dtype(s["dtype"]), count=s["n"], offset=s["offset"])
+
+    def cerrar(self):
+        self.emails = self._offsets_nombres = self._nombres_datos = None
+        self._adyacencia = {}
+        try:
+            self._mm.close()
+        except BufferError:
+            # Quedan vistas vivas fuera del objeto; el mapa se libera con ellas
+            pass
+        self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    # ------------------------------------------------------------
+    # BITÁCORA
+    # ------------------------------------------------------------
+    def actualizar(self) -> int:
+        """Aplica las líneas nuevas de la bitácora. Devuelve cuántos cambios aplicó."""
+        try:
+            f = open(self.ruta + ".log", "rb")
+        except FileNotFoundError:
+            return 0
+        with f:
+            f.seek(self._pos_bitacora)
+            datos = f.read()
+        # Una línea sin "\n" todavía se está escribiendo
+        fin = datos.rfind(b"\n") + 1
+        aplicados = 0
+        for linea in datos[:fin].splitlines():
+            if linea:
+                self._aplicar(json.loads(linea))
+                aplicados += 1
+        self._pos_bitacora += fin
+        self.cambios += aplicados
+        return aplicados
+
+    def _aplicar(self, cambio: Dict[str, Any]):
+        op = cambio["op"]
+        if op == "usuario":
+            i = self._id(cambio["a"], crear=True)
+            self._nombres[i] = cambio.get("nombre") or ""
+            if i in self._eliminados:
+                self._revivir(i)
+            return
+        if op == "-usuario":
+            i = self._id(cambio["a"])
+            if i is None:
+                return
+            self._eliminados.add(i)
+            self._eliminados_arreglo = np.fromiter(self._eliminados, dtype=np.int64)
+            for tipo in TIPOS:
+                self._agregadas[tipo].pop(i, None)
+                for destinos in self._agregadas[tipo].values():
+                    destinos.discard(i)
+            return
+
+        # Solo una entrada "usuario" da id a un email nuevo: una arista hacia
+        # alguien desconocido o eliminado no existe en Neo4j
+        tipo = cambio["tipo"]
+        a, b = self._id(cambio["a"]), self._id(cambio["b"])
+        if a is None or b is None or a in self._eliminados or b in self._eliminados:
+            return
+        pares = [(a, b), (b, a)] if tipo == "AMIGO_DE" else [(a, b)]
+        for x, y in pares:
+            if op == "+":
+                self._agregadas[tipo].setdefault(x, set()).add(y)
+                self._quitadas[tipo].get(x, set()).discard(y)
+            else:
+                self._quitadas[tipo].setdefault(x, set()).add(y)
+                self._agregadas[tipo].get(x, set()).discard(y)
+
+    def _revivir(self, i: int):
+        """
+        Usuario eliminado y creado de nuevo con el mismo email: vuelve a
+        aparecer, pero sin las aristas que tenía en la instantánea, que se
+        borraron con él.
+        """
+        self._eliminados.discard(i)
+        self._eliminados_arreglo = np.fromiter(self._eliminados, dtype=np.int64)
+        if i >= self.n:
+            return
+        for tipo in TIPOS:
+            indptr, indices = self._adyacencia[tipo]
+            salientes = indices[indptr[i]:indptr[i + 1]]
+            if len(salientes):
+                self._quitadas[tipo].setdefault(i, set()).update(salientes.tolist())
+            # Entrantes: la fila de cada posición de indices que apunta a i
+            for x in (np.searchsorted(indptr, np.flatnonzero(indices == i), side="right") - 1).tolist():
+                self._quitadas[tipo].setdefault(x, set()).add(i)
+
+    # ------------------------------------------------------------
+    # IDS Y NOMBRES
+    # ------------------------------------------------------------
+    def _id(self, email: str, crear: bool = False) -> Optional[int]:
+        clave = email.encode("utf-8")
+        if self.n and len(clave) <= self.emails.dtype.itemsize:
+            i = int(np.searchsorted(self.emails, clave))
+            if i < self.n and self.emails[i] == clave:
+                return i
+        i = self._nuevos.get(email)
+        if i is None and crear:
+            i = self._nuevos[email] = self.n + len(self._emails_nuevos)
+            self._emails_nuevos.append(email)
+        return i
+
+    def email(self, i: int) -> str:
+        return self.emails[i].decode("utf-8") if i < self.n else self._emails_nuevos[i - self.n]
+
+    def nombre(self, i: int) -> str:
+        """Nombre del usuario i, o "" si no tiene."""
+        if i in self._nombres:
+            return self._nombres[i]
+        if i >= self.n:
+            return ""
+        return bytes(self._nombres_datos[self._offsets_nombres[i]:self._offsets_nombres[i + 1]]).decode("utf-8")
+
+    # ------------------------------------------------------------
+    # CONSULTAS
+    # ------------------------------------------------------------
+    def _vecinos(self, tipo: str, i: int) -> np.ndarray:
+        """Ids vecinos de i (ordenados si no hubo cambios en i)."""
+        if i < self.n and i not in self._eliminados:
+            indptr, indices = self._adyacencia[tipo]
+            vecinos = indices[indptr[i]:indptr[i + 1]].astype(np.int64)
+        else:
+            vecinos = _VACIO
+        if len(self._eliminados_arreglo) and len(vecinos):
+            vecinos = vecinos[~np.isin(vecinos, self._eliminados_arreglo)]
+        quitadas = self._quitadas[tipo].get(i)
+        if quitadas:
+            vecinos = vecinos[~np.isin(vecinos, np.fromiter(quitadas, dtype=np.int64))]
+        agregadas = self._agregadas[tipo].get(i)
+        if agregadas:
+            vecinos = np.union1d(vecinos, np.fromiter(agregadas, dtype=np.int64))
+        return vecinos
+
+    def amigos(self, email: str) -> List[str]:
+        i = self._id(email)
+        return [] if i is None else [self.email(j) for j in self._vecinos("AMIGO_DE", i).tolist()]
+
+    def seguidos(self, email: str) -> List[str]:
+        i = self._id(email)
+        return [] if i is None else [self.email(j) for j in self._vecinos("SIGUE", i).tolist()]
+
+    def amigos_en_comun(self, email1: str, email2: str) -> List[str]:
+        """Como database.amigos_en_comun: nombres (o email) distintos, ordenados."""
+        i, j = self._id(email1), self._id(email2)
+        if i is None or j is None:
+            return []
+        comunes = np.intersect1d(self._vecinos("AMIGO_DE", i), self._vecinos("AMIGO_DE", j))
+        comunes = comunes[(comunes != i) & (comunes != j)]
+        return sorted({self.nombre(k) or self.email(k) for k in comunes.tolist()})
+
+    def sugerencias_de_amigos(self, email: str) -> List[Optional[str]]:
+        """Como database.sugerencias_de_amigos: nombres distintos de amigos de amigos."""
+        i = self._id(email)
+        if i is None:
+            return []
+        amigos = self._vecinos("AMIGO_DE", i)
+        if not len(amigos):
+            return []
+        candidatos = np.unique(np.concatenate([self._vecinos("AMIGO_DE", a) for a in amigos.tolist()]))
+        candidatos = np.setdiff1d(candidatos, amigos, assume_unique=True)
+        candidatos = candidatos[candidatos != i]
+        return list(dict.fromkeys(self.nombre(k) or None for k in candidatos.tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instantánea binaria de AMIGO_DE y SIGUE")
+    parser.add_argument("--ruta", default=GRAFO_INSTANTANEA)
+    parser.add_argument("--escribir", action="store_true", help="escribe la instantánea desde Neo4j")
+    parser.add_argument("--comunes", nargs=2, metavar="EMAIL")
+    parser.add_argument("--sugerencias", metavar="EMAIL")
+    args = parser.parse_args()
+
+    if args.escribir:
+        t0 = time.perf_counter()
+        with get_driver() as driver:
+            cabecera = escribir(driver, args.ruta)
+        print(f"Instantánea escrita en {time.perf_counter() - t0:.1f} s: {cabecera['usuarios']} usuarios, "
+              + ", ".join(f"{n} {tipo}" for tipo, n in cabecera["aristas"].items()))
+
+    t0 = time.perf_counter()
+    with GrafoLocal(args.ruta) as grafo:
+        print(f"Abierta en {(time.perf_counter() - t0) * 1000:.1f} ms "
+              f"({grafo.cabecera['creada']}, {grafo.cambios} cambios de la bitácora)")
+        if args.comunes:
+            t0 = time.perf_counter()
+            comunes = grafo.amigos_en_comun(*args.comunes)
+            print(f"Amigos en común ({(time.perf_counter() - t0) * 1000:.2f} ms): {comunes}")
+        if args.sugerencias:
+            t0 = time.perf_counter()
+            sugerencias = grafo.sugerencias_de_amigos(args.sugerencias)
+            print(f"Sugerencias ({(time.perf_counter() - t0) * 1000:.2f} ms): {sugerencias}")
+
+
+if __name__ == "__main__":
+    main()
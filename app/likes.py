@@ -0,0 +1,84 @@
+# likes.py
+import threading
+from typing import Dict, Any
+
+from database import incrementar_likes_lote
+
+
+class AgregadorLikes:
+    """
+    Agrupa en memoria los incrementos de likes por publicación y los escribe
+    con una sola transacción por intervalo. Un post viral que recibe miles de
+    likes por segundo se convierte en una escritura por flush en vez de miles
+    de escrituras compitiendo por el mismo lock.
+    """
+
+    def __init__(self, driver, intervalo: float = 0.5):
+        self.driver = driver
+        self.intervalo = intervalo
+        self._pendientes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+
+        # Contadores
+        self.incrementos = 0   # llamadas a agregar()
+        self.escrituras = 0    # filas escritas en la base de datos
+        self.flushes = 0
+        self.errores = 0
+
+        self._hilo = threading.Thread(target=self._loop, name="agregador-likes", daemon=True)
+        self._hilo.start()
+
+    def agregar(self, post_id: str, delta: int = 1):
+        with self._lock:
+            self._pendientes[post_id] = self._pendientes.get(post_id, 0) + delta
+            self.incrementos += 1
+
+    def flush(self) -> int:
+        """
+        Escribe los incrementos pendientes. Devuelve el número de filas escritas.
+        Si la escritura falla, los deltas vuelven a la cola para el siguiente flush.
+        """
+        with self._lock:
+            lote, self._pendientes = self._pendientes, {}
+        lote = {post_id: d for post_id, d in lote.items() if d}
+        if not lote:
+            return 0
+        try:
+            incrementar_likes_lote(self.driver, lote)
+        except Exception as e:
+            print(f"Error escribiendo likes: {e}")
+            with self._lock:
+                self.errores += 1
+                for post_id, d in lote.items():
+                    self._pendientes[post_id] = self._pendientes.get(post_id, 0) + d
+            return 0
+        with self._lock:
+            self.escrituras += len(lote)
+            self.flushes += 1
+        return len(lote)
+
+    def ratio_coalescencia(self) -> float:
+        """Incrementos recibidos por fila escrita."""
+        return self.incrementos / self.escrituras if self.escrituras else 0.0
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "incrementos": self.incrementos,
+                "escrituras": self.escrituras,
+                "flushes": self.flushes,
+                "errores": self.errores,
+                "pendientes": len(self._pendientes),
+                "ratio_coalescencia": self.ratio_coalescencia(),
+            }
+
+    def cerrar(self):
+        """Detiene el hilo y escribe lo que quede pendiente."""
+        self._detener.set()
+        self._hilo.join()
+        self.flush()
+
+    def _loop(self):
+        while not self._detener.wait(self.intervalo):
+            self.flush()
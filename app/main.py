@@ -1,78 +1,280 @@
 # main.py
+import argparse
+import sys
+
 from database import get_driver, delete_all, init_schema, seed_data, get_database_info
 from database import top_publicaciones, publicaciones_por_usuario, amigos_en_comun, sugerencias_de_amigos, publicacion_to_str
-import UI
-import tkinter as tk
+from database import refrescar_tendencias, top_publicaciones_tendencia, top_etiquetas_tendencia
+from database import inicializada, escribir_marcador, hay_datos, backfill_etiquetas
+from migraciones import aplicar_migraciones, cargar_migraciones, version_esquema
+
 
-def initialize_database():
-    """Initialize database with example data"""
-    print(f"Inicializando base de datos...")
+def seed_database(driver):
+    """Destructive reseed: wipes the database and loads the example data"""
+    print("  Eliminando datos previos...")
+    delete_all(driver)
     
-    with get_driver() as driver:
-        print(" Conexión establecida")
-        
-        print("  Eliminando datos previos...")
-        delete_all(driver)
-        
-        print(" Creando constraints...")
-        init_schema(driver)
-        
+    print(" Creando constraints...")
+    init_schema(driver)
+    
+    print(" Sembrando datos...")
+    seed_data(driver)
+    
+    print(" Calculando tendencias...")
+    refrescar_tendencias(driver)
+    
+    escribir_marcador(driver)
+
+
+def run_demo(driver):
+    """Print data verification and demo queries"""
+    # Data verification
+    print("\n" + "="*50)
+    print("VERIFICACIÓN DE DATOS")
+    print("="*50)
+    
+    info = get_database_info(driver)
+    print(f"✓ Usuarios en BD: {info['usuarios']}")
+    print(f"✓ Publicaciones en BD: {info['publicaciones']}")
+    print(f"✓ Etiquetas únicas en BD: {info['etiquetas']}")
+    print(f"✓ Etiquetas: {', '.join(info['lista_etiquetas'])}")
+    
+    print("\nAmistades por usuario (top 5):")
+    for nombre, count in info['top_amistades']:
+        print(f"  {nombre}: {count} amigos")
+    
+    print("\n" + "="*50)
+    print("DEMOSTRACIÓN DE CONSULTAS")
+    print("="*50)
+    
+    print("\nTop 5 publicaciones:")
+    for row in top_publicaciones(driver, 0, 5):
+        print(publicacion_to_str(row))
+    
+    print("\nPublicaciones de Ana:")
+    for row in publicaciones_por_usuario(driver, "ana@mail.com"):
+        print(publicacion_to_str(row))
+    
+    print("\nAmigos en común entre Ana y Bruno:")
+    print(amigos_en_comun(driver, "ana@mail.com", "bruno@mail.com"))
+    
+    print("\nSugerencias de amigos para Ana:")
+    print(sugerencias_de_amigos(driver, "ana@mail.com"))
+    
+    print("\nEtiquetas en tendencia (último mes):")
+    for row in top_etiquetas_tendencia(driver, "mes"):
+        print(f"  {row['etiqueta']}: {row['posts']} posts, {row['likes']} likes")
+    
+    print("\nPublicaciones en tendencia (última semana):")
+    for row in top_publicaciones_tendencia(driver, "semana"):
+        print(publicacion_to_str(row))
+
+
+def ensure_initialized(driver):
+    """
+    Fast start: a single version lookup when the database is already
+    initialized. Otherwise applies pending migrations and, only if there is
+    no data at all, seeds the example data. Existing data is never wiped here.
+    """
+    if inicializada(driver):
+        return
+    
+    print("Inicializando base de datos...")
+    init_schema(driver)
+    if hay_datos(driver):
+        print(" Datos existentes encontrados, no se siembra")
+    else:
         print(" Sembrando datos...")
         seed_data(driver)
-        
-        # Data verification
-        print("\n" + "="*50)
-        print("VERIFICACIÓN DE DATOS")
-        print("="*50)
-        
-        info = get_database_info(driver)
-        print(f"✓ Usuarios en BD: {info['usuarios']}")
-        print(f"✓ Publicaciones en BD: {info['publicaciones']}")
-        print(f"✓ Etiquetas únicas en BD: {info['etiquetas']}")
-        print(f"✓ Etiquetas: {', '.join(info['lista_etiquetas'])}")
-        
-        print("\nAmistades por usuario (top 5):")
-        for nombre, count in info['top_amistades']:
-            print(f"  {nombre}: {count} amigos")
-        
-        print("\n" + "="*50)
-        print("DEMOSTRACIÓN DE CONSULTAS")
-        print("="*50)
-        
-        print("\nTop 5 publicaciones:")
-        for row in top_publicaciones(driver, 5):
-            print(publicacion_to_str(row))
-        
-        print("\nPublicaciones de Ana:")
-        for row in publicaciones_por_usuario(driver, "ana@mail.com"):
-            print(publicacion_to_str(row))
-        
-        print("\nAmigos en común entre Ana y Bruno:")
-        print(amigos_en_comun(driver, "ana@mail.com", "bruno@mail.com"))
-        
-        print("\nSugerencias de amigos para Ana:")
-        print(sugerencias_de_amigos(driver, "ana@mail.com"))
-        
+        refrescar_tendencias(driver)
+    escribir_marcador(driver)
+
+
+# ------------------------------------------------------------
+# COMMANDS
+# ------------------------------------------------------------
+def cmd_ui(args):
+    with get_driver() as driver:
+        ensure_initialized(driver)
+    
+    # Tk is only needed here, so headless commands don't pay for importing it
+    import tkinter as tk
+    import UI
+    
+    print("\n" + "="*50)
+    print("LANZANDO INTERFAZ GRÁFICA")
+    print("="*50)
+    
+    root = tk.Tk()
+    app = UI.SocialApp(root)
+    root.mainloop()
+
+
+def cmd_seed(args):
+    with get_driver() as driver:
+        print(" Conexión establecida")
+        seed_database(driver)
         print("\n🎉 Inicialización completada!")
 
-def main():
-    """Principal function that initializes the DB and launch the UI"""
+
+def cmd_demo(args):
+    with get_driver() as driver:
+        run_demo(driver)
+
+
+def cmd_migrar(args):
+    with get_driver() as driver:
+        actual = version_esquema(driver)
+        pendientes = [m for m in cargar_migraciones() if m.version > actual]
+        print(f"Versión de esquema: {actual}, migraciones pendientes: {len(pendientes)}")
+        if args.estado:
+            for m in pendientes:
+                print(f"  {m.version:03d}_{m.nombre}")
+            return
+        total = aplicar_migraciones(driver)
+        print(f"Migraciones aplicadas: {total}")
+
+
+def cmd_cargar(args):
+    from carga_paralela import generar_dataset, cargar
+    
+    ds = generar_dataset(args.usuarios, args.posts, args.amigos, args.seguidos)
+    with get_driver() as driver:
+        init_schema(driver)
+        stats = cargar(driver, ds, workers=args.workers)
+        escribir_marcador(driver)
+    for fase, segundos in stats.segundos.items():
+        print(f"  {fase}: {stats.filas[fase]} filas en {segundos:.2f}s")
+    print(f"Total: {stats.total_segundos:.2f}s, reintentos: {stats.reintentos}")
+
+
+def cmd_tendencias(args):
+    with get_driver() as driver:
+        total = refrescar_tendencias(driver, todas=args.todas)
+        print(f"Buckets de tendencia recalculados: {total}")
+
+
+def cmd_backfill_etiquetas(args):
+    with get_driver() as driver:
+        total = backfill_etiquetas(driver)
+        print(f"Publicaciones actualizadas: {total}")
+
+
+def cmd_planes(args):
+    from verificar_planes import main as verificar_planes
+    
+    verificar_planes((["--actualizar"] if args.actualizar else []) + (["--semilla"] if args.semilla else []))
+
+
+def cmd_servir(args):
+    from servidor import main as servir
+    
+    servir(["--host", args.host, "--puerto", str(args.puerto),
+            "--max-concurrentes", str(args.max_concurrentes)]
+           + (["--instantanea"] if args.instantanea else []))
+
+
+def cmd_sonda(args):
+    from sonda import main as sondear
+    
+    sondear(["--pings", str(args.pings), "--slo-ping-ms", str(args.slo_ping_ms),
+             "--slo-lectura-ms", str(args.slo_lectura_ms)] + (["--json"] if args.json else []))
+
+
+def cmd_consistencia(args):
+    from consistencia import main as verificar
+    
+    verificar(["--reglas", *args.reglas, "--lote", str(args.lote), "--muestras", str(args.muestras)]
+              + (["--max-lotes", str(args.max_lotes)] if args.max_lotes else [])
+              + (["--reparar"] if args.reparar else []) + (["--reanudar"] if args.reanudar else []))
+
+
+def cmd_instantanea(args):
+    from instantanea_grafo import escribir
+    
+    with get_driver() as driver:
+        cabecera = escribir(driver)
+    print(f"Instantánea: {cabecera['usuarios']} usuarios, "
+          + ", ".join(f"{n} {tipo}" for tipo, n in cabecera["aristas"].items()))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Social network backend on Neo4j")
+    sub = parser.add_subparsers(dest="command")
+    
+    sub.add_parser("ui", help="launch the Tk interface (default); seeds only an empty database") \
+        .set_defaults(func=cmd_ui)
+    sub.add_parser("seed", help="wipe the database and load the example data") \
+        .set_defaults(func=cmd_seed)
+    sub.add_parser("demo", help="print data verification and demo queries") \
+        .set_defaults(func=cmd_demo)
+    
+    p = sub.add_parser("migrar", help="apply pending schema migrations from db/migraciones")
+    p.add_argument("--estado", action="store_true", help="only list the pending migrations")
+    p.set_defaults(func=cmd_migrar)
+    
+    p = sub.add_parser("cargar", help="load a synthetic dataset with parallel sessions")
+    p.add_argument("--usuarios", type=int, default=10_000)
+    p.add_argument("--posts", type=int, default=3, help="posts per user")
+    p.add_argument("--amigos", type=int, default=3, help="friendships per user")
+    p.add_argument("--seguidos", type=int, default=2, help="follows per user")
+    p.add_argument("--workers", type=int, default=4)
+    p.set_defaults(func=cmd_cargar)
+    
+    p = sub.add_parser("tendencias", help="recompute the dirty trending buckets")
+    p.add_argument("--todas", action="store_true", help="recompute every day bucket")
+    p.set_defaults(func=cmd_tendencias)
+    
+    sub.add_parser("backfill-etiquetas", help="fill p.etiquetas and tag index properties on existing posts") \
+        .set_defaults(func=cmd_backfill_etiquetas)
+    
+    p = sub.add_parser("planes", help="EXPLAIN every registered query and compare with db/planes.json")
+    p.add_argument("--actualizar", action="store_true", help="rewrite the plan snapshot")
+    p.add_argument("--semilla", action="store_true", help="load the example data into an empty instance")
+    p.set_defaults(func=cmd_planes)
+    
+    p = sub.add_parser("servir", help="serve the JSON HTTP API")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--puerto", type=int, default=8080)
+    p.add_argument("--max-concurrentes", type=int, default=32)
+    p.add_argument("--instantanea", action="store_true",
+                   help="serve common friends and suggestions from the local graph snapshot")
+    p.set_defaults(func=cmd_servir)
+    
+    p = sub.add_parser("sonda", help="health probe: ping and indexed-read latency; exits 1 on SLO breach")
+    p.add_argument("--pings", type=int, default=50)
+    p.add_argument("--slo-ping-ms", type=float, default=20.0)
+    p.add_argument("--slo-lectura-ms", type=float, default=50.0)
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_sonda)
+    
+    from consistencia import LOTE, MUESTRAS, REGLAS
+    p = sub.add_parser("consistencia", help="check the db/validation.cypher rules in batches, optionally repairing")
+    p.add_argument("--reglas", nargs="+", choices=list(REGLAS), default=list(REGLAS))
+    p.add_argument("--reparar", action="store_true", help="fix the repairable violations in batches")
+    p.add_argument("--reanudar", action="store_true", help="continue from where the previous run stopped")
+    p.add_argument("--lote", type=int, default=LOTE, help="nodes per batch")
+    p.add_argument("--max-lotes", type=int, default=None, help="batches per rule in this run")
+    p.add_argument("--muestras", type=int, default=MUESTRAS, help="violations to print per rule")
+    p.set_defaults(func=cmd_consistencia)
+    
+    sub.add_parser("instantanea", help="write the memory-mapped AMIGO_DE/SIGUE snapshot to db/grafo.csr") \
+        .set_defaults(func=cmd_instantanea)
+    
+    return parser
+
+
+def main(argv=None):
+    """Principal function: runs a subcommand, launching the UI by default"""
+    args = build_parser().parse_args(argv)
+    func = getattr(args, "func", cmd_ui)
     try:
-        # Initialize the database
-        initialize_database()
-        
-        # Launch the UI
-        print("\n" + "="*50)
-        print("LANZANDO INTERFAZ GRÁFICA")
-        print("="*50)
-        
-        root = tk.Tk()
-        app = UI.SocialApp(root)
-        root.mainloop()
-        
+        func(args)
     except Exception as e:
         print(f" Error: {e}")
-        input("Presiona Enter para salir...")
+        if func is cmd_ui:
+            input("Presiona Enter para salir...")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
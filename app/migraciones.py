@@ -0,0 +1,114 @@
+# migraciones.py
+# Aplica una sola vez, en orden, los archivos db/migraciones/NNN_nombre.cypher.
+# Cada migración aplicada queda registrada en un nodo (:SchemaMigration
+# {version, nombre, checksum}); si un archivo ya aplicado cambia, el runner se
+# detiene en vez de aplicar un esquema distinto al registrado.
+import hashlib
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+from consultas import INDICES_PENDIENTES, MIGRACIONES_APLICADAS, REGISTRAR_MIGRACION, VERSION_ESQUEMA
+
+DIRECTORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "db", "migraciones")
+PATRON = re.compile(r"^(\d+)_(\w+)\.cypher$")
+
+
+@dataclass
+class Migracion:
+    version: int
+    nombre: str
+    ruta: str
+    checksum: str
+
+    def sentencias(self) -> List[str]:
+        """Sentencias del archivo separadas por ";" (no usar ";" dentro de literales), sin comentarios //."""
+        with open(self.ruta, encoding="utf-8") as f:
+            lineas = [l for l in f.read().splitlines() if not l.strip().startswith("//")]
+        return [s.strip() for s in "\n".join(lineas).split(";") if s.strip()]
+
+
+def cargar_migraciones(directorio: str = DIRECTORIO) -> List[Migracion]:
+    migraciones = []
+    for archivo in sorted(os.listdir(directorio)):
+        m = PATRON.match(archivo)
+        if not m:
+            continue
+        ruta = os.path.join(directorio, archivo)
+        with open(ruta, "rb") as f:
+            checksum = hashlib.sha256(f.read().replace(b"\r\n", b"\n")).hexdigest()
+        migraciones.append(Migracion(int(m.group(1)), m.group(2), ruta, checksum))
+    versiones = [m.version for m in migraciones]
+    if len(set(versiones)) != len(versiones):
+        raise RuntimeError(f"Versiones de migración duplicadas en {directorio}")
+    return migraciones
+
+
+def ultima_version(directorio: str = DIRECTORIO) -> int:
+    migraciones = cargar_migraciones(directorio)
+    return migraciones[-1].version if migraciones else 0
+
+
+def version_esquema(driver) -> int:
+    """Última versión aplicada (0 si ninguna)."""
+    with driver.session() as s:
+        return s.run(VERSION_ESQUEMA).single()["v"]
+
+
+def esperar_indices(driver, timeout: float = 3600, intervalo: float = 2.0):
+    """
+    Espera a que todos los índices estén ONLINE. Los índices se construyen en
+    segundo plano sin bloquear escrituras; aquí solo se informa el progreso.
+    """
+    limite = time.monotonic() + timeout
+    with driver.session() as s:
+        while True:
+            pendientes = [r.data() for r in s.run(INDICES_PENDIENTES)]
+            fallidos = [p["name"] for p in pendientes if p["state"] == "FAILED"]
+            if fallidos:
+                raise RuntimeError(f"Índices fallidos: {', '.join(fallidos)}")
+            if not pendientes:
+                return
+            if time.monotonic() > limite:
+                raise TimeoutError(f"Índices sin terminar tras {timeout}s")
+            estado = ", ".join(f"{p['name']} {p['populationPercent']:.1f}%" for p in pendientes)
+            print(f"  Poblando índices: {estado}")
+            time.sleep(intervalo)
+
+
+def aplicar_migraciones(driver, directorio: str = DIRECTORIO) -> int:
+    """
+    Aplica las migraciones pendientes. Devuelve cuántas se aplicaron.
+    """
+    migraciones = cargar_migraciones(directorio)
+    with driver.session() as s:
+        aplicadas: Dict[int, str] = {
+            r["version"]: r["checksum"]
+            for r in s.run(MIGRACIONES_APLICADAS)
+        }
+
+    total = 0
+    for m in migraciones:
+        if m.version in aplicadas:
+            if aplicadas[m.version] != m.checksum:
+                raise RuntimeError(
+                    f"La migración {m.version:03d}_{m.nombre} cambió después de aplicarse "
+                    f"(checksum {aplicadas[m.version][:12]} != {m.checksum[:12]})"
+                )
+            continue
+
+        print(f" Aplicando migración {m.version:03d}_{m.nombre}...")
+        with driver.session() as s:
+            # DDL y CALL {} IN TRANSACTIONS requieren transacciones implícitas
+            for sentencia in m.sentencias():
+                s.run(sentencia).consume()
+        esperar_indices(driver)
+        with driver.session() as s:
+            s.run(
+                REGISTRAR_MIGRACION,
+                version=m.version, nombre=m.nombre, checksum=m.checksum
+            )
+        total += 1
+    return total
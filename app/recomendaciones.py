@@ -0,0 +1,196 @@
+# recomendaciones.py
+# Recomendaciones de a quién seguir por afinidad de etiquetas: cada usuario es
+# un vector con el número de publicaciones que ha creado por etiqueta, y se le
+# recomiendan los usuarios con mayor similitud coseno que aún no sigue.
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from consultas import ETIQUETAS_POR_USUARIO, SEGUIDOS
+
+PAGINA = 10_000
+BLOQUE = 65_536          # usuarios por bloque del producto matricial
+MAX_ETIQUETAS = 256      # columnas de la matriz; las etiquetas más raras se descartan
+HOLGURA_ETIQUETAS = 16   # columnas libres para etiquetas nuevas
+MAX_CACHE = 10_000
+
+
+class Recomendador:
+    """
+    Matriz usuario × etiqueta en memoria (float32, N × T con T pequeño). Las
+    similitudes se calculan por bloques de usuarios, de modo que nunca se
+    materializa una matriz N × N.
+    """
+
+    def __init__(self, driver, k: int = 10):
+        self.driver = driver
+        self.k = k
+        self.emails: List[str] = []
+        self.fila: Dict[str, int] = {}
+        self.columna: Dict[str, int] = {}
+        self.conteos = np.zeros((0, 0), dtype=np.float32)
+        self.normas = np.zeros(0, dtype=np.float32)
+        self._n = 0
+        self._cache: "OrderedDict[str, List[Tuple[str, float]]]" = OrderedDict()
+
+    # ------------------------------------------------------------
+    # CONSTRUCCIÓN
+    # ------------------------------------------------------------
+    def construir(self):
+        """Carga los conteos de etiquetas de todos los usuarios, por páginas."""
+        emails: List[str] = []
+        filas: List[int] = []
+        etiquetas: List[str] = []
+        desde = ""
+        with self.driver.session() as s:
+            while True:
+                registros = list(s.run(ETIQUETAS_POR_USUARIO, desde=desde, pagina=PAGINA))
+                if not registros:
+                    break
+                for r in registros:
+                    filas.extend([len(emails)] * len(r["etiquetas"]))
+                    etiquetas.extend(r["etiquetas"])
+                    emails.append(r["email"])
+                desde = registros[-1]["email"]
+
+        nombres, ids, frecuencia = np.unique(np.array(etiquetas, dtype=str), return_inverse=True,
+                                             return_counts=True)
+        # Solo las MAX_ETIQUETAS etiquetas más frecuentes
+        elegidas = np.argsort(-frecuencia, kind="stable")[:MAX_ETIQUETAS]
+        mapa = np.full(len(nombres), -1, dtype=np.int64)
+        mapa[elegidas] = np.arange(len(elegidas))
+        cols = mapa[ids] if len(ids) else np.zeros(0, dtype=np.int64)
+        validas = cols >= 0
+
+        self.emails = emails
+        self.fila = {e: i for i, e in enumerate(emails)}
+        self.columna = {str(nombres[j]): i for i, j in enumerate(elegidas)}
+        self._n = len(emails)
+        self.conteos = np.zeros((self._n, len(elegidas) + HOLGURA_ETIQUETAS), dtype=np.float32)
+        np.add.at(self.conteos, (np.array(filas, dtype=np.int64)[validas], cols[validas]), 1.0)
+        self.normas = np.linalg.norm(self.conteos, axis=1)
+        self._cache.clear()
+
+    # ------------------------------------------------------------
+    # ACTUALIZACIÓN INCREMENTAL
+    # ------------------------------------------------------------
+    def registrar_publicacion(self, email: str, etiquetas: Sequence[str]):
+        """Suma una publicación nueva al vector del autor."""
+        self.editar_publicacion(email, (), etiquetas)
+
+    def editar_publicacion(self, email: str, anteriores: Sequence[str], nuevas: Sequence[str]):
+        """
+        Cambia las etiquetas de una publicación de email en su vector: resta
+        las anteriores y suma las nuevas. Una publicación borrada es una
+        edición sin etiquetas nuevas.
+        """
+        i = self.fila.get(email)
+        if i is None:
+            if not nuevas:
+                return
+            i = self._agregar_usuario(email)
+        # Las mismas etiquetas que deja _normalizar_etiquetas en p.etiquetas
+        for delta, etiquetas in ((-1.0, anteriores), (1.0, nuevas)):
+            for tag in dict.fromkeys(e for e in etiquetas if e):
+                j = self.columna.get(tag)
+                if j is None and delta > 0 and len(self.columna) < self.conteos.shape[1]:
+                    j = self.columna[tag] = len(self.columna)
+                if j is not None:
+                    self.conteos[i, j] = max(self.conteos[i, j] + delta, 0.0)
+        self.normas[i] = np.linalg.norm(self.conteos[i])
+        self._invalidar_afectados(i)
+
+    def invalidar(self, email: Optional[str] = None):
+        """
+        Descarta la lista en caché de email, o la de todos sin email. Al crear
+        o borrar un seguimiento hay que llamarla con el seguidor, porque cambia
+        su lista de excluidos.
+        """
+        if email is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(email, None)
+
+    def _invalidar_afectados(self, i: int):
+        """
+        Tras cambiar el vector de la fila i solo pueden cambiar su propia lista,
+        las listas en las que ya aparece y aquellas en las que ahora supera
+        al último recomendado; las demás siguen en la caché.
+        """
+        autor = self.emails[i]
+        self._cache.pop(autor, None)
+        cacheados = [e for e in self._cache if e in self.fila]
+        if not cacheados:
+            return
+        filas = np.array([self.fila[e] for e in cacheados], dtype=np.int64)
+        normas = self.normas[filas] * self.normas[i]
+        sim = (self.conteos[filas] @ self.conteos[i]) / np.where(normas > 0, normas, 1.0)
+        for email, s in zip(cacheados, sim.tolist()):
+            recs = self._cache[email]
+            if any(e == autor for e, _ in recs) or (
+                    s > 0 and (len(recs) < self.k or s >= recs[-1][1] - 1e-6)):
+                del self._cache[email]
+
+    def _agregar_usuario(self, email: str) -> int:
+        if self._n == len(self.conteos):
+            capacidad = max(16, 2 * self._n)
+            conteos = np.zeros((capacidad, self.conteos.shape[1]), dtype=np.float32)
+            conteos[:self._n] = self.conteos[:self._n]
+            normas = np.zeros(capacidad, dtype=np.float32)
+            normas[:self._n] = self.normas[:self._n]
+            self.conteos, self.normas = conteos, normas
+        i = self._n
+        self._n += 1
+        self.emails.append(email)
+        self.fila[email] = i
+        return i
+
+    # ------------------------------------------------------------
+    # CONSULTA
+    # ------------------------------------------------------------
+    def similares(self, email: str, k: Optional[int] = None,
+                  excluir: Sequence[str] = ()) -> List[Tuple[str, float]]:
+        """Top-k usuarios por similitud coseno, calculado por bloques."""
+        k = k or self.k
+        i = self.fila.get(email)
+        if i is None or self.normas[i] == 0:
+            return []
+        excluidos = {self.fila[e] for e in excluir if e in self.fila} | {i}
+        q = self.conteos[i] / self.normas[i]
+
+        mejores_ids = np.zeros(0, dtype=np.int64)
+        mejores_sim = np.zeros(0, dtype=np.float32)
+        for inicio in range(0, self._n, BLOQUE):
+            fin = min(inicio + BLOQUE, self._n)
+            normas = self.normas[inicio:fin]
+            sim = (self.conteos[inicio:fin] @ q) / np.where(normas > 0, normas, 1.0)
+            ids = np.arange(inicio, fin)
+            # Candidatos del bloque + mejores acumulados; se queda con los k mejores
+            top = np.argpartition(-sim, min(k + len(excluidos), len(sim) - 1))[:k + len(excluidos)]
+            mejores_ids = np.concatenate([mejores_ids, ids[top]])
+            mejores_sim = np.concatenate([mejores_sim, sim[top]])
+            orden = np.argsort(-mejores_sim, kind="stable")[:k + len(excluidos)]
+            mejores_ids, mejores_sim = mejores_ids[orden], mejores_sim[orden]
+
+        return [
+            (self.emails[j], float(s))
+            for j, s in zip(mejores_ids.tolist(), mejores_sim.tolist())
+            if j not in excluidos and s > 0
+        ][:k]
+
+    def recomendar(self, email: str) -> List[Tuple[str, float]]:
+        """
+        Usuarios a seguir para email: los más similares que todavía no sigue.
+        Los resultados se guardan en una caché LRU por usuario.
+        """
+        if email in self._cache:
+            self._cache.move_to_end(email)
+            return self._cache[email]
+        with self.driver.session() as s:
+            seguidos = [r["email"] for r in s.run(SEGUIDOS, email=email)]
+        recs = self.similares(email, excluir=seguidos)
+        self._cache[email] = recs
+        if len(self._cache) > MAX_CACHE:
+            self._cache.popitem(last=False)
+        return recs
@@ -0,0 +1,681 @@
+# servidor.py
+# API HTTP/JSON concurrente sobre database.py, con asyncio y sin dependencias
+# nuevas. Todas las peticiones comparten un único driver (y su pool de
+# conexiones); las funciones de database.py son bloqueantes y se ejecutan en
+# un ThreadPoolExecutor del mismo tamaño que el límite de concurrencia.
+#
+# - Como mucho max_concurrentes peticiones en curso; hasta max_en_cola más
+#   esperan, y a partir de ahí se responde 503 con Retry-After.
+# - Los listados completos (usuarios, publicaciones de un usuario) se envían
+#   con Transfer-Encoding: chunked, página a página, sin armar la respuesta
+#   entera en memoria.
+# - GET /metricas devuelve, por endpoint, peticiones, errores y latencias
+#   p50/p99/máx sobre las últimas MUESTRAS_METRICAS peticiones.
+# - SIGINT/SIGTERM: deja de aceptar conexiones, cierra las inactivas, espera a
+#   las peticiones en curso y vacía los likes pendientes antes de salir.
+#
+# El backend (por defecto el módulo database) se inyecta, así el servidor se
+# puede probar de punta a punta contra una instancia local desechable o
+# cualquier objeto con las mismas funciones.
+#
+# Con --instantanea, amigos en común y sugerencias se responden desde la
+# instantánea local del grafo (instantanea_grafo.py) en vez de Neo4j.
+#
+#   python servidor.py [--host 127.0.0.1] [--puerto 8080] [--max-concurrentes 32] [--instantanea]
+import argparse
+import asyncio
+import json
+import re
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from neo4j.exceptions import ConstraintError
+
+import database
+
+MAX_CABECERA = 64 * 1024
+MAX_CUERPO = 1024 * 1024
+PAGINA_STREAM = 500
+MUESTRAS_METRICAS = 2048
+TIEMPO_CIERRE = 30.0
+
+ESTADOS = {
+    200: "OK", 201: "Created", 202: "Accepted", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+    431: "Request Header Fields Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado: int, mensaje: str, cabeceras: Optional[Dict[str, str]] = None):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+        self.cabeceras = cabeceras or {}
+
+
+@dataclass
+class Peticion:
+    metodo: str
+    ruta: str
+    query: Dict[str, List[str]]
+    cabeceras: Dict[str, str]
+    cuerpo: bytes
+    params: Dict[str, str] = field(default_factory=dict)
+
+    def arg(self, nombre: str, defecto: Any = None, tipo: Callable = str) -> Any:
+        valores = self.query.get(nombre)
+        if not valores:
+            return defecto
+        try:
+            return tipo(valores[0])
+        except ValueError:
+            raise ErrorHTTP(400, f"Parámetro inválido: {nombre}")
+
+    def json(self) -> Dict[str, Any]:
+        try:
+            datos = json.loads(self.cuerpo or b"{}")
+        except ValueError:
+            raise ErrorHTTP(400, "Cuerpo JSON inválido")
+        if not isinstance(datos, dict):
+            raise ErrorHTTP(400, "Se esperaba un objeto JSON")
+        return datos
+
+    @property
+    def mantener_viva(self) -> bool:
+        return self.cabeceras.get("connection", "").lower() != "close"
+
+
+@dataclass
+class Respuesta:
+    estado: int = 200
+    datos: Any = None
+    stream: Optional[AsyncIterator[bytes]] = None
+    cabeceras: Dict[str, str] = field(default_factory=dict)
+
+
+def _error(e: ErrorHTTP) -> Respuesta:
+    return Respuesta(e.estado, {"error": e.mensaje}, cabeceras=e.cabeceras)
+
+
+def _a_json(obj: Any) -> Any:
+    # Fechas de neo4j.time y de datetime, y nodos (que se comportan como dicts)
+    if hasattr(obj, "iso_format"):
+        return obj.iso_format()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if hasattr(obj, "items"):
+        return dict(obj.items())
+    return str(obj)
+
+
+def _json(datos: Any) -> bytes:
+    return json.dumps(datos, default=_a_json, ensure_ascii=False).encode("utf-8")
+
+
+# ------------------------------------------------------------
+# MÉTRICAS
+# ------------------------------------------------------------
+class Metricas:
+    """Peticiones, errores y latencias recientes por endpoint."""
+
+    def __init__(self, muestras: int = MUESTRAS_METRICAS):
+        self.muestras = muestras
+        self.peticiones: Dict[str, int] = {}
+        self.errores: Dict[str, int] = {}
+        self.latencias: Dict[str, Deque[float]] = {}
+        self.rechazadas = 0
+
+    def registrar(self, endpoint: str, segundos: float, error: bool):
+        self.peticiones[endpoint] = self.peticiones.get(endpoint, 0) + 1
+        if error:
+            self.errores[endpoint] = self.errores.get(endpoint, 0) + 1
+        self.latencias.setdefault(endpoint, deque(maxlen=self.muestras)).append(segundos)
+
+    def resumen(self) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, latencias in sorted(self.latencias.items()):
+            orden = sorted(latencias)
+            endpoints[endpoint] = {
+                "peticiones": self.peticiones[endpoint],
+                "errores": self.errores.get(endpoint, 0),
+                "p50_ms": round(1000 * orden[int(0.50 * (len(orden) - 1))], 3),
+                "p99_ms": round(1000 * orden[int(0.99 * (len(orden) - 1))], 3),
+                "max_ms": round(1000 * orden[-1], 3),
+            }
+        return {"endpoints": endpoints, "rechazadas": self.rechazadas}
+
+
+# ------------------------------------------------------------
+# SERVIDOR
+# ------------------------------------------------------------
+Ruta = Tuple[str, "re.Pattern[str]", str, Callable]
+
+
+class Servidor:
+    def __init__(self, driver, backend=database, host: str = "127.0.0.1", puerto: int = 8080,
+                 max_concurrentes: int = 32, max_en_cola: int = 256, grafo=None):
+        self.driver = driver
+        self.db = backend
+        self.grafo = grafo
+        self.host = host
+        self.puerto = puerto
+        self.max_en_cola = max_en_cola
+        self.metricas = Metricas()
+        self._hilos = ThreadPoolExecutor(max_workers=max_concurrentes, thread_name_prefix="api")
+        self._cupo = asyncio.Semaphore(max_concurrentes)
+        self._en_cola = 0
+        self._cerrando = False
+        self._parada: Optional[asyncio.Event] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._conexiones: Dict[asyncio.Task, bool] = {}  # tarea -> atendiendo una petición
+        self._lock_grafo = threading.Lock()
+        self._recomendador = None
+        self._lock_recomendador = threading.Lock()
+        self._likes = None
+        self._rutas: List[Ruta] = []
+        self._definir_rutas()
+
+    # ------------------------------------------------------------
+    # RUTAS
+    # ------------------------------------------------------------
+    def _ruta(self, metodo: str, plantilla: str, manejador: Callable):
+        patron = re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", plantilla)
+        self._rutas.append((metodo, re.compile(f"^{patron}$"), f"{metodo} {plantilla}", manejador))
+
+    def _definir_rutas(self):
+        r = self._ruta
+        r("GET", "/salud", self._salud)
+        r("GET", "/metricas", self._ver_metricas)
+        r("GET", "/usuarios", self._listar_usuarios)
+        r("POST", "/usuarios", self._crear_usuario)
+        r("GET", "/usuarios/{email}", self._ver_usuario)
+        r("DELETE", "/usuarios/{email}", self._eliminar_usuario)
+        r("GET", "/usuarios/{email}/publicaciones", self._publicaciones_usuario)
+        r("POST", "/usuarios/{email}/publicaciones", self._crear_publicacion)
+        r("GET", "/usuarios/{email}/feed", self._feed)
+        r("GET", "/usuarios/{email}/sugerencias", self._sugerencias)
+        r("GET", "/usuarios/{email}/recomendaciones", self._recomendaciones)
+        r("GET", "/usuarios/{email}/amigos/{otro}/comunes", self._amigos_en_comun)
+        r("PUT", "/usuarios/{email}/amigos/{otro}", self._crear_amistad)
+        r("DELETE", "/usuarios/{email}/amigos/{otro}", self._eliminar_amistad)
+        r("GET", "/usuarios/{email}/seguidores", self._seguidores)
+        r("GET", "/usuarios/{email}/seguidos", self._seguidos)
+        r("GET", "/usuarios/{email}/seguimientos", self._contar_seguimientos)
+        r("PUT", "/usuarios/{email}/seguidos/{otro}", self._seguir)
+        r("DELETE", "/usuarios/{email}/seguidos/{otro}", self._dejar_de_seguir)
+        r("GET", "/usuarios/{email}/camino/{otro}", self._camino)
+        r("GET", "/publicaciones", self._top_publicaciones)
+        r("PATCH", "/publicaciones/{id}", self._actualizar_publicacion)
+        r("DELETE", "/publicaciones/{id}", self._eliminar_publicacion)
+        r("POST", "/publicaciones/{id}/likes", self._like)
+        r("GET", "/etiquetas/{etiqueta}/publicaciones", self._publicaciones_etiqueta)
+        r("GET", "/tendencias", self._tendencias)
+
+    def _resolver(self, metodo: str, ruta: str) -> Tuple[str, Callable, Dict[str, str]]:
+        encontrada = False
+        for m, patron, endpoint, manejador in self._rutas:
+            coincidencia = patron.match(ruta)
+            if coincidencia:
+                encontrada = True
+                if m == metodo:
+                    return endpoint, manejador, {k: unquote(v) for k, v in coincidencia.groupdict().items()}
+        if encontrada:
+            raise ErrorHTTP(405, f"Método no permitido: {metodo}")
+        raise ErrorHTTP(404, f"Ruta inexistente: {ruta}")
+
+    async def _en_hilo(self, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._hilos, lambda: fn(*args, **kwargs))
+
+    async def _db(self, fn: Callable, *args, **kwargs) -> Any:
+        """Ejecuta una función bloqueante del backend en el pool de hilos."""
+        coalescedor = getattr(fn, "coalescedor", None)
+        if coalescedor is not None:
+            # Lecturas compartidas: las peticiones iguales esperan en el event
+            # loop la misma ejecución, sin ocupar un hilo cada una
+            return await coalescedor.llamar_async(fn.__wrapped__, self.driver, *args,
+                                                  ejecutar=self._en_hilo, **kwargs)
+        return await self._en_hilo(fn, self.driver, *args, **kwargs)
+
+    def _stream_paginas(self, pagina: Callable[[int, int], List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+        """Arreglo JSON armado página a página con pagina(skip, limit)."""
+        async def generar():
+            yield b"["
+            skip, primero = 0, True
+            while True:
+                filas = await self._db(lambda driver: pagina(skip, PAGINA_STREAM))
+                for fila in filas:
+                    yield (b"" if primero else b",") + _json(fila)
+                    primero = False
+                if len(filas) < PAGINA_STREAM:
+                    break
+                skip += len(filas)
+            yield b"]"
+        return generar()
+
+    # ------------------------------------------------------------
+    # MANEJADORES
+    # ------------------------------------------------------------
+    async def _salud(self, p: Peticion) -> Respuesta:
+        return Respuesta(datos={"estado": "cerrando" if self._cerrando else "ok"})
+
+    async def _ver_metricas(self, p: Peticion) -> Respuesta:
+        datos = self.metricas.resumen()
+        if self._likes:
+            datos["likes"] = self._likes.estadisticas()
+        lecturas = getattr(self.db, "LECTURAS", None)
+        if lecturas is not None:
+            datos["coalescencia"] = lecturas.estadisticas()
+        return Respuesta(datos=datos)
+
+    async def _listar_usuarios(self, p: Peticion) -> Respuesta:
+        orden, desc = p.arg("orden", "email"), p.arg("desc", "0") == "1"
+        if orden not in self.db.ORDENES_USUARIO:
+            raise ErrorHTTP(400, f"Orden inválido: {orden}")
+        return Respuesta(stream=self._stream_paginas(
+            lambda skip, limit: self.db.usuarios_pagina(self.driver, skip, limit, orden, desc)
+        ))
+
+    async def _crear_usuario(self, p: Peticion) -> Respuesta:
+        datos = p.json()
+        try:
+            usuario = self.db.UsuarioInput(
+                id=datos["id"], nombre=datos["nombre"], email=datos["email"],
+                fechaRegistro=datos["fechaRegistro"],
+            )
+        except KeyError as e:
+            raise ErrorHTTP(400, f"Falta el campo {e.args[0]}")
+        await self._db(self.db.insert_usuario, usuario)
+        return Respuesta(201, {"email": usuario.email})
+
+    async def _ver_usuario(self, p: Peticion) -> Respuesta:
+        usuario = await self._db(self.db.find_usuario, p.params["email"])
+        if usuario is None:
+            raise ErrorHTTP(404, "Usuario inexistente")
+        return Respuesta(datos=usuario)
+
+    async def _eliminar_usuario(self, p: Peticion) -> Respuesta:
+        await self._db(self.db.eliminar_usuario, p.params["email"])
+        return Respuesta(204)
+
+    async def _publicaciones_usuario(self, p: Peticion) -> Respuesta:
+        email = p.params["email"]
+        orden, desc = p.arg("orden", "fecha"), p.arg("desc", "1") == "1"
+        if orden not in self.db.ORDENES_PUBLICACION:
+            raise ErrorHTTP(400, f"Orden inválido: {orden}")
+        limit = p.arg("limit", None, int)
+        if limit is not None:
+            filas = await self._db(self.db.publicaciones_por_usuario, email,
+                                   p.arg("skip", 0, int), limit, orden, desc)
+            return Respuesta(datos=filas)
+        return Respuesta(stream=self._stream_paginas(
+            lambda skip, lim: self.db.publicaciones_por_usuario(self.driver, email, skip, lim, orden, desc)
+        ))
+
+    async def _crear_publicacion(self, p: Peticion) -> Respuesta:
+        datos = p.json()
+        try:
+            pub = self.db.PublicacionInput(
+                contenido=datos["contenido"], fecha=datos["fecha"],
+                likes=int(datos.get("likes", 0)), etiquetas=list(datos.get("etiquetas", [])),
+            )
+        except KeyError as e:
+            raise ErrorHTTP(400, f"Falta el campo {e.args[0]}")
+        await self._db(self.db.create_publicacion, p.params["email"], pub)
+        if self._recomendador:
+            await self._en_hilo(self._registrar_publicacion, p.params["email"], pub.etiquetas)
+        return Respuesta(201, {"ok": True})
+
+    async def _feed(self, p: Peticion) -> Respuesta:
+        filas = await self._db(self.db.feed, p.params["email"],
+                               p.arg("skip", 0, int), p.arg("limit", 20, int))
+        return Respuesta(datos=filas)
+
+    def _consultar_local(self, func: Callable, *args) -> Any:
+        # GrafoLocal no es seguro entre hilos: aplicar la bitácora y consultar
+        # van juntos bajo un lock
+        with self._lock_grafo:
+            self.grafo.actualizar()
+            return func(*args)
+
+    async def _local(self, func: Callable, *args) -> Any:
+        # En el pool: una bitácora larga o un usuario con muchos amigos no
+        # deben frenar al resto de peticiones
+        return await self._en_hilo(self._consultar_local, func, *args)
+
+    async def _sugerencias(self, p: Peticion) -> Respuesta:
+        if self.grafo is not None:
+            return Respuesta(datos=await self._local(self.grafo.sugerencias_de_amigos, p.params["email"]))
+        return Respuesta(datos=await self._db(self.db.sugerencias_de_amigos, p.params["email"]))
+
+    # Recomendador no es seguro entre hilos: se construye una vez y se usa con
+    # lock, siempre desde el pool (construir() puede tardar y el event loop no
+    # debe quedarse esperando el lock)
+    def _recomendar(self, driver, email: str):
+        with self._lock_recomendador:
+            if self._recomendador is None:
+                self._recomendador = self.db.recomendador(driver)
+                self._recomendador.construir()
+            return self._recomendador.recomendar(email)
+
+    def _registrar_publicacion(self, email: str, etiquetas: List[str]):
+        with self._lock_recomendador:
+            self._recomendador.registrar_publicacion(email, etiquetas)
+
+    def _editar_publicacion(self, email: str, anteriores: List[str], nuevas: List[str]):
+        with self._lock_recomendador:
+            self._recomendador.editar_publicacion(email, anteriores, nuevas)
+
+    def _invalidar_recomendaciones(self, email: str):
+        with self._lock_recomendador:
+            self._recomendador.invalidar(email)
+
+    async def _recomendaciones(self, p: Peticion) -> Respuesta:
+        recs = await self._db(self._recomendar, p.params["email"])
+        emails = [e for e, _ in recs]
+        # Tarjetas: nombre y últimas publicaciones de todos en dos consultas
+        usuarios = await self._db(self.db.find_usuarios, emails)
+        publicaciones = await self._db(self.db.publicaciones_por_usuarios, emails,
+                                       p.arg("publicaciones", 3, int))
+        return Respuesta(datos=[
+            {"email": e, "nombre": usuarios.get(e, {}).get("nombre"), "similitud": s,
+             "publicaciones": publicaciones.get(e, [])}
+            for e, s in recs
+        ])
+
+    async def _amigos_en_comun(self, p: Peticion) -> Respuesta:
+        if self.grafo is not None:
+            return Respuesta(datos=await self._local(self.grafo.amigos_en_comun, p.params["email"],
+                                                     p.params["otro"]))
+        return Respuesta(datos=await self._db(self.db.amigos_en_comun, p.params["email"], p.params["otro"]))
+
+    async def _crear_amistad(self, p: Peticion) -> Respuesta:
+        await self._db(self.db.create_amistad, p.params["email"], p.params["otro"])
+        return Respuesta(204)
+
+    async def _eliminar_amistad(self, p: Peticion) -> Respuesta:
+        await self._db(self.db.eliminar_amistad, p.params["email"], p.params["otro"])
+        return Respuesta(204)
+
+    async def _pagina_seguimientos(self, fn: Callable, p: Peticion) -> Respuesta:
+        filas, siguiente = await self._db(fn, p.params["email"], p.arg("cursor"), p.arg("limit", 20, int))
+        return Respuesta(datos={"filas": filas, "siguiente": siguiente})
+
+    async def _seguidores(self, p: Peticion) -> Respuesta:
+        return await self._pagina_seguimientos(self.db.seguidores, p)
+
+    async def _seguidos(self, p: Peticion) -> Respuesta:
+        return await self._pagina_seguimientos(self.db.seguidos, p)
+
+    async def _contar_seguimientos(self, p: Peticion) -> Respuesta:
+        return Respuesta(datos=await self._db(self.db.contar_seguimientos, p.params["email"]))
+
+    async def _seguir(self, p: Peticion) -> Respuesta:
+        await self._db(self.db.create_seguimiento, p.params["email"], p.params["otro"])
+        if self._recomendador:
+            await self._en_hilo(self._invalidar_recomendaciones, p.params["email"])
+        return Respuesta(204)
+
+    async def _dejar_de_seguir(self, p: Peticion) -> Respuesta:
+        await self._db(self.db.eliminar_seguimiento, p.params["email"], p.params["otro"])
+        if self._recomendador:
+            await self._en_hilo(self._invalidar_recomendaciones, p.params["email"])
+        return Respuesta(204)
+
+    async def _camino(self, p: Peticion) -> Respuesta:
+        try:
+            ruta = await self._db(self.db.camino, p.params["email"], p.params["otro"],
+                                  p.arg("max", 6, int))
+        except RuntimeError as e:
+            raise ErrorHTTP(503, str(e))
+        usuarios = await self._db(self.db.find_usuarios, ruta or [])
+        return Respuesta(datos={
+            "camino": [{"email": e, "nombre": usuarios.get(e, {}).get("nombre")} for e in ruta or []],
+            "grado": len(ruta) - 1 if ruta else None,
+        })
+
+    async def _top_publicaciones(self, p: Peticion) -> Respuesta:
+        filas = await self._db(self.db.top_publicaciones, p.arg("skip", 0, int), p.arg("limit", 10, int),
+                               p.arg("orden", "likes"), p.arg("desc", "1") == "1")
+        return Respuesta(datos=filas)
+
+    async def _actualizar_publicacion(self, p: Peticion) -> Respuesta:
+        datos = p.json()
+        if ("contenido" in datos) != ("likes" in datos):
+            raise ErrorHTTP(400, "contenido y likes se actualizan juntos")
+        if "etiquetas" in datos:
+            etiquetas = list(datos["etiquetas"])
+            previo = await self._db(self.db.actualizar_etiquetas, p.params["id"], etiquetas)
+            await self._publicacion_editada(previo, etiquetas)
+        if "contenido" in datos:
+            await self._db(self.db.actualizar_publicacion, p.params["id"], datos["contenido"], int(datos["likes"]))
+        return Respuesta(204)
+
+    async def _eliminar_publicacion(self, p: Peticion) -> Respuesta:
+        previo = await self._db(self.db.eliminar_publicacion, p.params["id"])
+        await self._publicacion_editada(previo, [])
+        return Respuesta(204)
+
+    async def _publicacion_editada(self, previo: Optional[Tuple[str, List[str]]], etiquetas: List[str]):
+        # previo es (autor, etiquetas anteriores), o None si la publicación no existía
+        if previo and previo[0] and self._recomendador:
+            await self._en_hilo(self._editar_publicacion, previo[0], previo[1], etiquetas)
+
+    async def _like(self, p: Peticion) -> Respuesta:
+        delta = int(p.json().get("delta", 1))
+        if self._likes is None:
+            self._likes = self.db.agregador_likes(self.driver)
+        # Los likes se agregan en memoria y se escriben por lotes (ver likes.py)
+        self._likes.agregar(p.params["id"], delta)
+        return Respuesta(202, {"pendiente": True})
+
+    async def _publicaciones_etiqueta(self, p: Peticion) -> Respuesta:
+        filas, siguiente = await self._db(
+            self.db.publicaciones_por_etiqueta, p.params["etiqueta"],
+            p.arg("cursor"), p.arg("limit", 10, int), p.arg("orden", "likes")
+        )
+        return Respuesta(datos={"filas": filas, "siguiente": siguiente})
+
+    async def _tendencias(self, p: Peticion) -> Respuesta:
+        ventana, limit = p.arg("ventana", "semana"), p.arg("limit", 5, int)
+        publicaciones = await self._db(self.db.top_publicaciones_tendencia, ventana, limit)
+        etiquetas = await self._db(self.db.top_etiquetas_tendencia, ventana, limit)
+        return Respuesta(datos={"publicaciones": publicaciones, "etiquetas": etiquetas})
+
+    # ------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------
+    async def _leer_peticion(self, reader: asyncio.StreamReader) -> Optional[Peticion]:
+        try:
+            cabecera = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise ErrorHTTP(431, "Cabecera demasiado grande")
+        lineas = cabecera.decode("latin-1").split("\r\n")
+        try:
+            metodo, destino, _ = lineas[0].split(" ", 2)
+            cabeceras = {k.strip().lower(): v.strip()
+                         for k, v in (l.split(":", 1) for l in lineas[1:] if l)}
+            largo = int(cabeceras.get("content-length", 0))
+        except ValueError:
+            raise ErrorHTTP(400, "Petición mal formada")
+        if largo > MAX_CUERPO:
+            raise ErrorHTTP(413, "Cuerpo demasiado grande")
+        cuerpo = await reader.readexactly(largo) if largo else b""
+        url = urlsplit(destino)
+        return Peticion(metodo.upper(), url.path, parse_qs(url.query), cabeceras, cuerpo)
+
+    @staticmethod
+    def _cabecera(estado: int, cabeceras: Dict[str, str]) -> bytes:
+        lineas = [f"HTTP/1.1 {estado} {ESTADOS.get(estado, '')}"]
+        lineas += [f"{k}: {v}" for k, v in cabeceras.items()]
+        return ("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1")
+
+    async def _responder(self, writer: asyncio.StreamWriter, r: Respuesta, mantener: bool):
+        cabeceras = {"Content-Type": "application/json; charset=utf-8",
+                     "Connection": "keep-alive" if mantener else "close", **r.cabeceras}
+        if r.stream is None:
+            cuerpo = b"" if r.estado == 204 else _json(r.datos)
+            cabeceras["Content-Length"] = str(len(cuerpo))
+            writer.write(self._cabecera(r.estado, cabeceras) + cuerpo)
+            await writer.drain()
+            return
+        cabeceras["Transfer-Encoding"] = "chunked"
+        writer.write(self._cabecera(r.estado, cabeceras))
+        async for trozo in r.stream:
+            writer.write(f"{len(trozo):X}\r\n".encode() + trozo + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _ejecutar(self, manejador: Callable, p: Peticion) -> Respuesta:
+        """Ejecuta el manejador traduciendo las excepciones a respuestas de error."""
+        try:
+            return await manejador(p)
+        except ErrorHTTP as e:
+            return _error(e)
+        except ConstraintError as e:
+            return Respuesta(409, {"error": str(e)})
+        except (ValueError, KeyError) as e:
+            return Respuesta(400, {"error": str(e)})
+        except Exception as e:
+            return Respuesta(500, {"error": str(e)})
+
+    async def _procesar(self, p: Peticion, writer: asyncio.StreamWriter) -> Tuple[str, bool, bool]:
+        """Atiende una petición. Devuelve (endpoint, hubo error, mantener la conexión)."""
+        endpoint = f"{p.metodo} ?"
+        mantener = p.mantener_viva and not self._cerrando
+        try:
+            endpoint, manejador, p.params = self._resolver(p.metodo, p.ruta)
+            if self._en_cola >= self.max_en_cola:
+                self.metricas.rechazadas += 1
+                raise ErrorHTTP(503, "Servidor saturado", {"Retry-After": "1"})
+        except ErrorHTTP as e:
+            await self._responder(writer, _error(e), mantener)
+            return endpoint, e.estado >= 500, mantener
+
+        self._en_cola += 1
+        try:
+            await self._cupo.acquire()
+        finally:
+            self._en_cola -= 1
+        try:
+            respuesta = await self._ejecutar(manejador, p)
+            mantener = mantener and not self._cerrando
+            try:
+                await self._responder(writer, respuesta, mantener)
+            except Exception:
+                # Error a mitad de un stream: se corta la conexión sin el trozo final
+                return endpoint, True, False
+            return endpoint, respuesta.estado >= 500, mantener
+        finally:
+            self._cupo.release()
+
+    async def _conexion(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tarea = asyncio.current_task()
+        self._conexiones[tarea] = False
+        try:
+            while not self._cerrando:
+                try:
+                    p = await self._leer_peticion(reader)
+                except ErrorHTTP as e:
+                    await self._responder(writer, _error(e), False)
+                    return
+                if p is None:
+                    return
+                self._conexiones[tarea] = True
+                inicio = time.perf_counter()
+                try:
+                    endpoint, error, mantener = await self._procesar(p, writer)
+                finally:
+                    self._conexiones[tarea] = False
+                self.metricas.registrar(endpoint, time.perf_counter() - inicio, error)
+                if not mantener:
+                    return
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._conexiones.pop(tarea, None)
+            writer.close()
+
+    # ------------------------------------------------------------
+    # CICLO DE VIDA
+    # ------------------------------------------------------------
+    async def iniciar(self):
+        self._parada = asyncio.Event()
+        self._server = await asyncio.start_server(self._conexion, self.host, self.puerto, limit=MAX_CABECERA)
+        self.puerto = self._server.sockets[0].getsockname()[1]
+
+    def detener(self):
+        if self._parada:
+            self._parada.set()
+
+    async def cerrar(self, timeout: float = TIEMPO_CIERRE):
+        """Cierre ordenado: no acepta más, corta las conexiones ociosas y espera a las activas."""
+        self._cerrando = True
+        if self._server:
+            self._server.close()
+        for tarea, activa in list(self._conexiones.items()):
+            if not activa:
+                tarea.cancel()
+        pendientes = list(self._conexiones)
+        if pendientes:
+            await asyncio.wait(pendientes, timeout=timeout)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._hilos.shutdown)
+        if self._likes:
+            await loop.run_in_executor(None, self._likes.cerrar)
+
+    async def servir(self):
+        await self.iniciar()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.detener)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl+C llega como KeyboardInterrupt
+        print(f"Escuchando en http://{self.host}:{self.puerto}")
+        try:
+            await self._parada.wait()
+        finally:
+            print("Cerrando: esperando peticiones en curso...")
+            await self.cerrar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP/JSON sobre la base de datos")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--max-concurrentes", type=int, default=32)
+    parser.add_argument("--max-en-cola", type=int, default=256)
+    parser.add_argument("--instantanea", nargs="?", const=database.GRAFO_INSTANTANEA, metavar="RUTA",
+                        help="responde amigos en común y sugerencias desde la instantánea del grafo")
+    args = parser.parse_args(argv)
+
+    grafo = None
+    if args.instantanea:
+        from instantanea_grafo import GrafoLocal
+
+        grafo = GrafoLocal(args.instantanea)
+    try:
+        with database.get_driver() as driver:
+            servidor = Servidor(driver, host=args.host, puerto=args.puerto,
+                                max_concurrentes=args.max_concurrentes, max_en_cola=args.max_en_cola,
+                                grafo=grafo)
+            asyncio.run(servidor.servir())
+    finally:
+        if grafo is not None:
+            grafo.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# sonda.py
+# Sonda de salud para usar antes de un despliegue o desde un monitor:
+# verifica la conexión, mide la latencia de ida y vuelta de bolt con N pings
+# (RETURN 1), cronometra una lectura por índice representativa (un usuario
+# por email) e informa versión del servidor, estado del pool y p50/p99.
+# Nunca recorre el grafo: solo usa consultas registradas sin escaneos.
+#
+#   python sonda.py [--pings 50] [--lecturas 50] [--slo-ping-ms 20] [--slo-lectura-ms 50] [--json]
+#
+# Código de salida: 0 si se cumplen los SLO de p99, 1 si alguno se incumple,
+# 2 si no se pudo conectar.
+import argparse
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import consultas as Q
+from bench_mixto import percentil
+from database import get_driver
+
+CALENTAMIENTO = 3
+
+
+def medir(n: int, operacion: Callable[[], Any]) -> List[float]:
+    """Latencias en ms de n ejecuciones, tras CALENTAMIENTO descartadas."""
+    for _ in range(min(CALENTAMIENTO, n)):
+        operacion()
+    latencias = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        operacion()
+        latencias.append(1000 * (time.perf_counter() - t0))
+    return latencias
+
+
+def resumen(latencias: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(latencias),
+        "p50_ms": percentil(latencias, 0.50),
+        "p99_ms": percentil(latencias, 0.99),
+        "max_ms": max(latencias, default=0.0),
+    }
+
+
+def estado_pool(driver) -> Dict[str, Any]:
+    # El driver no expone métricas del pool; se leen de su estado interno y,
+    # si cambia entre versiones, la sonda sigue funcionando sin este dato
+    pool = getattr(driver, "_pool", None)
+    try:
+        with pool.lock:
+            conexiones = {
+                str(direccion): {"abiertas": len(lista), "en_uso": sum(c.in_use for c in lista)}
+                for direccion, lista in pool.connections.items()
+            }
+        return {"max": pool.pool_config.max_connection_pool_size, "conexiones": conexiones}
+    except AttributeError:
+        return {}
+
+
+def sondear(driver, pings: int, lecturas: int, email: str) -> Dict[str, Any]:
+    info = driver.get_server_info()
+    with driver.session() as s:
+        componentes = [r.data() for r in s.run(Q.SONDA_VERSION)]
+        ping = medir(pings, lambda: s.run(Q.SONDA_PING).consume())
+        lectura = medir(lecturas, lambda: s.run(Q.BUSCAR_USUARIO, email=email).consume())
+        pool = estado_pool(driver)
+    return {
+        "servidor": {"direccion": str(info.address), "agente": info.agent,
+                     "protocolo": ".".join(map(str, info.protocol_version)),
+                     "componentes": componentes},
+        "pool": pool,
+        "ping": resumen(ping),
+        "lectura": resumen(lectura),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sonda de salud y latencia de Neo4j")
+    parser.add_argument("--pings", type=int, default=50)
+    parser.add_argument("--lecturas", type=int, default=50)
+    parser.add_argument("--email", default="ana@mail.com", help="usuario de la lectura por índice")
+    parser.add_argument("--slo-ping-ms", type=float, default=20.0, help="p99 máximo de los pings")
+    parser.add_argument("--slo-lectura-ms", type=float, default=50.0, help="p99 máximo de la lectura")
+    parser.add_argument("--json", action="store_true", help="salida en JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        with get_driver() as driver:
+            r = sondear(driver, args.pings, args.lecturas, args.email)
+    except Exception as e:
+        print(json.dumps({"error": str(e)}) if args.json else f"Sin conexión: {e}")
+        sys.exit(2)
+
+    incumplidos = [
+        f"{nombre} p99 {r[nombre]['p99_ms']:.1f} ms > {slo:.1f} ms"
+        for nombre, slo in (("ping", args.slo_ping_ms), ("lectura", args.slo_lectura_ms))
+        if r[nombre]["p99_ms"] > slo
+    ]
+    r["slo_incumplidos"] = incumplidos
+
+    if args.json:
+        print(json.dumps(r, ensure_ascii=False, indent=2))
+    else:
+        srv = r["servidor"]
+        print(f"Conectado a {srv['direccion']} ({srv['agente']}, bolt {srv['protocolo']})")
+        for c in srv["componentes"]:
+            print(f"  {c['name']} {c['version']} {c['edition']}")
+        if r["pool"]:
+            print(f"Pool (máx. {r['pool']['max']}): " + ", ".join(
+                f"{d} {c['en_uso']}/{c['abiertas']} en uso" for d, c in r["pool"]["conexiones"].items()))
+        for nombre in ("ping", "lectura"):
+            m = r[nombre]
+            print(f"{nombre:>8}: n={m['n']} p50 {m['p50_ms']:.2f} ms  p99 {m['p99_ms']:.2f} ms  "
+                  f"máx {m['max_ms']:.2f} ms")
+        print("SLO incumplido: " + "; ".join(incumplidos) if incumplidos else "SLO OK")
+    if incumplidos:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# verificar_planes.py
+# Gate de regresión de planes: hace EXPLAIN de cada consulta registrada en
+# consultas.py contra una instancia de prueba con el esquema aplicado y falla
+# si algún plan contiene operadores prohibidos (AllNodesScan, CartesianProduct,
+# Eager) no permitidos para esa consulta, si un operador estima más filas que
+# su máximo, o si el plan cambió respecto de la instantánea db/planes.json.
+# La instantánea se versiona junto al código, así los cambios de plan aparecen
+# en el diff de la revisión.
+#
+#   python verificar_planes.py [--actualizar] [--solo NOMBRE ...]
+#
+# Usar siempre una instancia desechable (NEO4J_URI): se aplican las
+# migraciones y, con --semilla, se cargan los datos de ejemplo si está vacía.
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from consultas import REGISTRO, Consulta
+
+INSTANTANEA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "db", "planes.json")
+PROHIBIDOS = {"AllNodesScan", "CartesianProduct", "Eager"}
+FACTOR_FILAS = 10.0   # crecimiento máximo de filas estimadas respecto de la instantánea
+MIN_FILAS = 100       # por debajo de esto el crecimiento no se considera
+
+
+def _operadores(plan: Dict[str, Any], nivel: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    yield nivel, plan
+    for hijo in plan.get("children", []):
+        yield from _operadores(hijo, nivel + 1)
+
+
+def _tipo(op: Dict[str, Any]) -> str:
+    # "NodeIndexSeek@neo4j" -> "NodeIndexSeek"
+    return op["operatorType"].split("@")[0]
+
+
+def _filas(op: Dict[str, Any]) -> float:
+    return float(op.get("args", op.get("arguments", {})).get("EstimatedRows", 0.0))
+
+
+def resumir(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Forma del plan para la instantánea: un operador por línea, indentado."""
+    lineas = []
+    for nivel, op in _operadores(plan):
+        detalles = op.get("args", op.get("arguments", {})).get("Details", "")
+        lineas.append("  " * nivel + _tipo(op) + (f" {detalles}" if detalles else ""))
+    return {"operadores": lineas, "filas": max((_filas(op) for _, op in _operadores(plan)), default=0.0)}
+
+
+def revisar(consulta: Consulta, plan: Dict[str, Any]) -> List[str]:
+    """Problemas del plan de una consulta según sus reglas."""
+    problemas = []
+    for _, op in _operadores(plan):
+        tipo = _tipo(op)
+        if tipo in PROHIBIDOS and tipo not in consulta.permitidos:
+            # Un producto de lados de a lo sumo una fila (seeks únicos) es inocuo
+            if tipo == "CartesianProduct" and all(_filas(h) <= 1 for h in op.get("children", [])):
+                continue
+            problemas.append(f"operador {tipo}")
+        if _filas(op) > consulta.max_filas:
+            problemas.append(f"{tipo} estima {_filas(op):.0f} filas (máximo {consulta.max_filas})")
+    return problemas
+
+
+def comparar(actual: Dict[str, Any], anterior: Optional[Dict[str, Any]]) -> List[str]:
+    if anterior is None:
+        return ["sin plan en la instantánea (ejecutar con --actualizar)"]
+    problemas = []
+    if actual["operadores"] != anterior["operadores"]:
+        problemas.append("el plan cambió:\n      antes:   " + "\n               ".join(anterior["operadores"])
+                         + "\n      después: " + "\n               ".join(actual["operadores"]))
+    if actual["filas"] > MIN_FILAS and actual["filas"] > FACTOR_FILAS * max(anterior["filas"], 1.0):
+        problemas.append(f"filas estimadas {anterior['filas']:.0f} -> {actual['filas']:.0f}")
+    return problemas
+
+
+def explicar(driver, consulta: Consulta) -> Dict[str, Any]:
+    with driver.session() as s:
+        return s.run("EXPLAIN " + consulta.cypher, **consulta.parametros()).consume().plan
+
+
+def leer_instantanea(ruta: str = INSTANTANEA) -> Dict[str, Any]:
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def escribir_instantanea(planes: Dict[str, Any], ruta: str = INSTANTANEA):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(planes, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def verificar(driver, nombres: Optional[List[str]] = None, actualizar: bool = False) -> int:
+    """Revisa las consultas y devuelve cuántas fallaron."""
+    instantanea = leer_instantanea()
+    planes = dict(instantanea)
+    fallidas = 0
+    for nombre in sorted(nombres or REGISTRO):
+        consulta = REGISTRO[nombre]
+        if not consulta.explicable:
+            continue
+        try:
+            plan = explicar(driver, consulta)
+        except Exception as e:
+            print(f"FALLA {nombre}: {e}")
+            fallidas += 1
+            continue
+        resumen = resumir(plan)
+        problemas = revisar(consulta, plan)
+        if not actualizar:
+            problemas += comparar(resumen, instantanea.get(nombre))
+        if problemas:
+            fallidas += 1
+            print(f"FALLA {nombre}")
+            for p in problemas:
+                print(f"    - {p}")
+        else:
+            print(f"ok    {nombre}")
+        planes[nombre] = resumen
+
+    if actualizar:
+        # Las consultas que ya no existen salen de la instantánea
+        escribir_instantanea({n: p for n, p in planes.items() if n in REGISTRO})
+        print(f"Instantánea actualizada: {os.path.normpath(INSTANTANEA)}")
+    return fallidas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN de todas las consultas registradas")
+    parser.add_argument("--actualizar", action="store_true",
+                        help="reescribe db/planes.json con los planes actuales")
+    parser.add_argument("--solo", nargs="+", metavar="NOMBRE", choices=sorted(REGISTRO),
+                        help="revisar solo estas consultas")
+    parser.add_argument("--semilla", action="store_true",
+                        help="cargar los datos de ejemplo si la instancia está vacía")
+    args = parser.parse_args(argv)
+
+    from database import get_driver, hay_datos, init_schema, seed_data
+
+    with get_driver() as driver:
+        init_schema(driver)
+        if args.semilla and not hay_datos(driver):
+            seed_data(driver)
+        fallidas = verificar(driver, args.solo, args.actualizar)
+    print(f"\n{fallidas} consulta(s) con problemas de {len(args.solo or REGISTRO)}")
+    if fallidas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,15 +17,21 @@ CREATE CONSTRAINT usuario_id_exists
 IF NOT EXISTS FOR (u:Usuario)
 REQUIRE (u.id) IS NOT NULL;
 
-// Optionally, enforce other properties' existence
+// Unique post ids
 CREATE CONSTRAINT publicacion_id_unique
 IF NOT EXISTS FOR (p:Publicación)
 REQUIRE p.id IS UNIQUE;
 
 // Ensures each post has an id (not null)
-CREATE CONSTRAINT IF NOT EXISTS
-FOR (p:Publicación)
+CREATE CONSTRAINT publicacion_id_exists
+IF NOT EXISTS FOR (p:Publicación)
 REQUIRE (p.id) IS NOT NULL;
 
-// [Optional] Index for names for fast searches (not required)
-CREATE INDEX IF NOT EXISTS FOR (u:Usuario) ON (u.nombre);
\ No newline at end of file
+// Index for names for fast searches
+CREATE INDEX usuario_nombre
+IF NOT EXISTS FOR (u:Usuario) ON (u.nombre);
+
+// Applied migrations, one node per version
+CREATE CONSTRAINT schema_migration_version_unique
+IF NOT EXISTS FOR (m:SchemaMigration)
+REQUIRE m.version IS UNIQUE;
@@ -0,0 +1,41 @@
+// ───────────────────────────────
+// TRENDING BUCKETS AND TAG BROWSE
+// ───────────────────────────────
+
+// Index for post dates (trending buckets are recomputed per day)
+CREATE INDEX publicacion_fecha
+IF NOT EXISTS FOR (p:Publicación) ON (p.fecha);
+
+// Trending buckets: one node per day + one node per (day, tag)
+CREATE CONSTRAINT tendencia_dia_unique
+IF NOT EXISTS FOR (t:Tendencia)
+REQUIRE t.dia IS UNIQUE;
+
+CREATE INDEX tendencia_etiqueta_dia
+IF NOT EXISTS FOR (te:TendenciaEtiqueta) ON (te.dia, te.etiqueta);
+
+// Tag browse: TIENE_ETIQUETA carries copies of (etiqueta, likes, fecha) so a
+// page of one tag is an ordered index seek instead of a supernode expansion
+CREATE INDEX tiene_etiqueta_likes
+IF NOT EXISTS FOR ()-[r:TIENE_ETIQUETA]-() ON (r.etiqueta, r.likes);
+
+CREATE INDEX tiene_etiqueta_fecha
+IF NOT EXISTS FOR ()-[r:TIENE_ETIQUETA]-() ON (r.etiqueta, r.fecha);
+
+// Reads use p.etiquetas and the (etiqueta, likes, fecha) copies on
+// TIENE_ETIQUETA. Posts written before those existed get them from their
+// TIENE_ETIQUETA relationships, in batches (same as backfill-etiquetas)
+MATCH (p:Publicación)
+WHERE p.etiquetas IS NULL OR EXISTS { (p)-[r:TIENE_ETIQUETA]->() WHERE r.etiqueta IS NULL }
+CALL {
+  WITH p
+  OPTIONAL MATCH (p)-[r:TIENE_ETIQUETA]->(e:Etiqueta)
+  SET r.etiqueta = e.nombre, r.likes = p.likes, r.fecha = p.fecha
+  WITH p, collect(DISTINCT e.nombre) AS etiquetas
+  SET p.etiquetas = etiquetas
+} IN TRANSACTIONS OF 10000 ROWS;
+
+// Initialization marker read on every startup
+CREATE CONSTRAINT inicializacion_clave_unique
+IF NOT EXISTS FOR (m:Inicializacion)
+REQUIRE m.clave IS UNIQUE;
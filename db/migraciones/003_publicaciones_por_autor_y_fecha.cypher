@@ -0,0 +1,17 @@
+// ───────────────────────────────
+// DATE-RANGE POSTS PER AUTHOR
+// ───────────────────────────────
+
+// Posts carry their author's email so a user's posts in a date range are one
+// ordered seek on (autor, fecha), proportional to the page and not to the
+// user's lifetime post count
+CREATE INDEX publicacion_autor_fecha
+IF NOT EXISTS FOR (p:Publicación) ON (p.autor, p.fecha);
+
+// Backfill p.autor on existing posts in batches
+MATCH (u:Usuario)-[:CREA]->(p:Publicación)
+WHERE p.autor IS NULL
+CALL {
+  WITH u, p
+  SET p.autor = u.email
+} IN TRANSACTIONS OF 10000 ROWS;
@@ -0,0 +1,24 @@
+// ───────────────────────────────
+// ONE AMIGO_DE PER FRIENDSHIP
+// ───────────────────────────────
+
+// Friendships used to be stored as two directed AMIGO_DE relationships. Every
+// read matches them without direction, so each friendship is now a single
+// relationship from the lower email to the higher one.
+
+// Pairs: drop the non-canonical half, in batches
+MATCH (a:Usuario)-[r:AMIGO_DE]->(b:Usuario)
+WHERE a.email > b.email AND (b)-[:AMIGO_DE]->(a)
+CALL {
+  WITH r
+  DELETE r
+} IN TRANSACTIONS OF 10000 ROWS;
+
+// Friendships stored only in the non-canonical direction: flip them
+MATCH (a:Usuario)-[r:AMIGO_DE]->(b:Usuario)
+WHERE a.email > b.email
+CALL {
+  WITH a, b, r
+  MERGE (b)-[:AMIGO_DE]->(a)
+  DELETE r
+} IN TRANSACTIONS OF 10000 ROWS;
@@ -0,0 +1,10 @@
+// ───────────────────────────────
+// CONSISTENCY CHECK PROGRESS
+// ───────────────────────────────
+
+// app/consistencia.py keeps one (:Verificacion {regla}) node per rule with
+// the key where the last run stopped, so a large graph can be checked in
+// several runs.
+CREATE CONSTRAINT verificacion_regla_unique
+IF NOT EXISTS FOR (v:Verificacion)
+REQUIRE v.regla IS UNIQUE;
@@ -0,0 +1,28 @@
+// ───────────────────────────────
+// FOLLOWER / FOLLOWING LISTS AND COUNTS
+// ───────────────────────────────
+
+// Every SIGUE carries both emails and its creation time, so the followers (or
+// followings) of an account are one ordered seek on (seguido, desde) or
+// (seguidor, desde), whatever the account's degree
+CREATE INDEX sigue_seguido_desde
+IF NOT EXISTS FOR ()-[r:SIGUE]-() ON (r.seguido, r.desde);
+
+CREATE INDEX sigue_seguidor_desde
+IF NOT EXISTS FOR ()-[r:SIGUE]-() ON (r.seguidor, r.desde);
+
+// Backfill existing follows in batches; their real creation time is unknown,
+// so they all get the time of the migration
+MATCH (a:Usuario)-[r:SIGUE]->(b:Usuario)
+WHERE r.seguido IS NULL
+CALL {
+  WITH a, b, r
+  SET r.seguidor = a.email, r.seguido = b.email, r.desde = coalesce(r.desde, datetime())
+} IN TRANSACTIONS OF 10000 ROWS;
+
+// Maintained counters, initialized from the stored degree of each user
+MATCH (u:Usuario)
+CALL {
+  WITH u
+  SET u.num_seguidores = COUNT { (u)<-[:SIGUE]-() }, u.num_seguidos = COUNT { (u)-[:SIGUE]->() }
+} IN TRANSACTIONS OF 10000 ROWS;
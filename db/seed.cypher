@@ -74,7 +74,9 @@ UNWIND [
 MERGE (post:Publicación {id:p.id})
 SET post.contenido = p.texto,
     post.fecha = date(p.fecha),
-    post.likes = p.likes
+    post.likes = p.likes,
+    post.etiquetas = p.etiquetas,
+    post.autor = p.author
 // Connect with author
 WITH post, p
 MATCH (u:Usuario {email:p.author})
@@ -83,14 +85,15 @@ MERGE (u)-[:CREA]->(post)
 WITH post, p
 UNWIND p.etiquetas AS tag
 MERGE (e:Etiqueta {nombre:tag})
-MERGE (post)-[:TIENE_ETIQUETA]->(e);
+MERGE (post)-[r:TIENE_ETIQUETA]->(e)
+SET r.etiqueta = tag, r.likes = post.likes, r.fecha = post.fecha;
 
 
 // ────────────────────────────────────────────────────────────────
 // RELATIONSHIPS BETWEEN USERS
 // ────────────────────────────────────────────────────────────────
 
-// FRIENDSHIPS (bidirectional)
+// FRIENDSHIPS (one AMIGO_DE per pair, from the lower email to the higher)
 UNWIND [
   ['ana@mail.com','bruno@mail.com'],
   ['ana@mail.com','carla@mail.com'],
@@ -108,11 +111,10 @@ UNWIND [
   ['monica@mail.com','olivia@mail.com'],
   ['nicolas@mail.com','ana@mail.com']
 ] AS pair
-WITH pair
+WITH CASE WHEN pair[0] < pair[1] THEN pair ELSE [pair[1], pair[0]] END AS pair
 MATCH (a:Usuario {email:pair[0]})
 MATCH (b:Usuario {email:pair[1]})
-MERGE (a)-[:AMIGO_DE]->(b)
-MERGE (b)-[:AMIGO_DE]->(a);
+MERGE (a)-[:AMIGO_DE]->(b);
 
 // FOLLOW RELATIONSHIPS (one-way)
 UNWIND [
@@ -127,4 +129,7 @@ UNWIND [
 WITH f
 MATCH (a:Usuario {email:f[0]})
 MATCH (b:Usuario {email:f[1]})
-MERGE (a)-[:SIGUE]->(b);
\ No newline at end of file
+MERGE (a)-[r:SIGUE]->(b)
+ON CREATE SET r.desde = datetime(), r.seguidor = a.email, r.seguido = b.email,
+              a.num_seguidos = coalesce(a.num_seguidos, 0) + 1,
+              b.num_seguidores = coalesce(b.num_seguidores, 0) + 1;
\ No newline at end of file
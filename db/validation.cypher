@@ -1,6 +1,9 @@
 // ────────────────────────────────────────────────────────────────
 // MANUAL VALIDATIONS
 // ────────────────────────────────────────────────────────────────
+// Each statement scans the whole graph: fine for the example data. On a large
+// graph use `python main.py consistencia`, which checks the same rules in
+// batches and can repair them.
 
 // Users without posts
 MATCH (u:Usuario) WHERE NOT (u)-[:CREA]->(:Publicación) RETURN u;
@@ -8,11 +11,19 @@ MATCH (u:Usuario) WHERE NOT (u)-[:CREA]->(:Publicación) RETURN u;
 // Posts without tags
 MATCH (p:Publicación) WHERE NOT (p)-[:TIENE_ETIQUETA]->(:Etiqueta) RETURN p;
 
-// Non bidirectional friends (inconsistencies)
-MATCH (a:Usuario)-[:AMIGO_DE]->(b)
-WHERE NOT (b)-[:AMIGO_DE]->(a)
+// Friendships not stored canonically (one AMIGO_DE from the lower email to the higher)
+MATCH (a:Usuario)-[:AMIGO_DE]->(b:Usuario)
+WHERE a.email > b.email
 RETURN a,b;
 
-// wipe all data
-MATCH (n)
-DETACH DELETE n;
+// Friendships stored more than once
+MATCH (a:Usuario)-[r:AMIGO_DE]->(b:Usuario)
+WITH a, b, count(r) AS n
+WHERE n > 1
+RETURN a,b,n;
+
+// Follower/following counters that differ from the actual SIGUE degree
+MATCH (u:Usuario)
+WHERE coalesce(u.num_seguidores, 0) <> COUNT { (u)<-[:SIGUE]-() }
+   OR coalesce(u.num_seguidos, 0) <> COUNT { (u)-[:SIGUE]->() }
+RETURN u.email, u.num_seguidores, u.num_seguidos;
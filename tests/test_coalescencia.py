@@ -0,0 +1,123 @@
+# test_coalescencia.py
+# Single-flight de coalescencia.Coalescedor, con hilos y con asyncio.
+#
+#   python -m unittest discover tests
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from coalescencia import Coalescedor  # noqa: E402
+
+
+class Lectura:
+    """Función lenta que cuenta sus ejecuciones y espera a que se la suelte."""
+
+    def __init__(self, error=None):
+        self.soltar = threading.Event()
+        self.ejecuciones = 0
+        self.error = error
+        self.__name__ = "lectura"
+
+    def __call__(self, email, campos=()):
+        self.ejecuciones += 1
+        self.soltar.wait(5)
+        if self.error:
+            raise self.error
+        return {"email": email}
+
+
+class CoalescedorTest(unittest.TestCase):
+    def setUp(self):
+        self.c = Coalescedor()
+
+    def esperar_llamadas(self, n):
+        limite = time.monotonic() + 5
+        while self.c.estadisticas()["funciones"]["lectura"]["llamadas"] < n:
+            self.assertLess(time.monotonic(), limite)
+            time.sleep(0.01)
+
+    def en_hilos(self, func, n, *args):
+        resultados = []
+
+        def llamar():
+            try:
+                resultados.append(self.c.llamar(func, *args))
+            except Exception as e:
+                resultados.append(e)
+
+        hilos = [threading.Thread(target=llamar) for _ in range(n)]
+        for h in hilos:
+            h.start()
+        self.esperar_llamadas(n)
+        func.soltar.set()
+        for h in hilos:
+            h.join(5)
+        return resultados
+
+    def test_llamadas_concurrentes_comparten_una_ejecucion(self):
+        lectura = Lectura()
+        resultados = self.en_hilos(lectura, 5, "ana@x", ["nombre"])
+        self.assertEqual(lectura.ejecuciones, 1)
+        self.assertEqual(len(resultados), 5)
+        # Todos reciben el mismo objeto
+        self.assertTrue(all(r is resultados[0] for r in resultados))
+        self.assertEqual(self.c.estadisticas(), {
+            "ahorradas": 4, "en_vuelo": 0,
+            "funciones": {"lectura": {"llamadas": 5, "ejecuciones": 1, "ahorradas": 4}},
+        })
+
+    def test_la_excepcion_tambien_se_comparte(self):
+        lectura = Lectura(error=RuntimeError("caída"))
+        resultados = self.en_hilos(lectura, 3, "ana@x")
+        self.assertEqual(lectura.ejecuciones, 1)
+        self.assertEqual([str(r) for r in resultados], ["caída"] * 3)
+
+    def test_no_es_una_cache(self):
+        lectura = Lectura()
+        lectura.soltar.set()
+        self.c.llamar(lectura, "ana@x")
+        self.c.llamar(lectura, "ana@x")
+        self.c.llamar(lectura, "bruno@x")
+        self.assertEqual(lectura.ejecuciones, 3)
+        self.assertEqual(self.c.estadisticas()["en_vuelo"], 0)
+
+    def test_argumentos_no_hashables_no_se_comparten(self):
+        lectura = Lectura()
+        resultados = self.en_hilos(lectura, 2, "ana@x", bytearray(b"nombre"))
+        self.assertEqual(lectura.ejecuciones, 2)
+        self.assertEqual(resultados, [{"email": "ana@x"}] * 2)
+
+    def test_decorador(self):
+        lectura = Lectura()
+        lectura.soltar.set()
+        compartida = self.c.compartida(lectura)
+        self.assertIs(compartida.coalescedor, self.c)
+        # Listas, dicts y sets se congelan para formar la clave
+        self.assertEqual(compartida("ana@x", campos=[{"nombre"}, {"a": [1]}]), {"email": "ana@x"})
+        self.assertEqual(self.c.estadisticas()["funciones"]["lectura"]["ejecuciones"], 1)
+
+    def test_corrutinas_comparten_una_ejecucion(self):
+        lectura = Lectura()
+
+        async def varias():
+            tareas = [asyncio.ensure_future(self.c.llamar_async(lectura, "ana@x")) for _ in range(4)]
+            await asyncio.sleep(0.05)
+            self.assertEqual(self.c.estadisticas()["en_vuelo"], 1)
+            # Cancelar a uno no cancela la ejecución compartida
+            tareas[0].cancel()
+            lectura.soltar.set()
+            return await asyncio.gather(*tareas[1:])
+
+        resultados = asyncio.run(varias())
+        self.assertEqual(lectura.ejecuciones, 1)
+        self.assertEqual(resultados, [{"email": "ana@x"}] * 3)
+        self.assertEqual(self.c.estadisticas()["en_vuelo"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# test_consistencia.py
+# consistencia.verificar contra una sesión falsa que guarda el progreso en
+# memoria: recorrido por bloques, reanudación desde el cursor guardado y
+# reparación de las violaciones de cada bloque en una sola escritura.
+#
+#   python -m unittest discover tests
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import consultas as Q  # noqa: E402
+from consistencia import Regla, verificar  # noqa: E402
+
+CLAVES = ["k%02d" % i for i in range(1, 11)]
+MALAS = {"k02", "k03", "k05", "k09"}
+REGLA = Regla("prueba", "Claves malas", bloque="BLOQUE", reparacion="REPARAR")
+
+
+class Registro(SimpleNamespace):
+    def single(self):
+        return self
+
+    def consume(self):
+        return self
+
+    def __getitem__(self, clave):
+        return getattr(self, clave)
+
+
+class SesionFalsa:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def run(self, q, **p):
+        d = self.driver
+        if q == "BLOQUE":
+            d.desdes.append(p["desde"])
+            claves = [c for c in CLAVES if c > p["desde"]][:p["lote"]]
+            return Registro(ultimo=claves[-1] if claves else None, revisados=len(claves),
+                            violaciones=[c for c in claves if c in d.malas])
+        if q == "REPARAR":
+            d.reparaciones.append(list(p["filas"]))
+            d.malas -= set(p["filas"])
+            return Registro(n=len(p["filas"]))
+        if q == Q.PROGRESO_CONSISTENCIA:
+            # Sin progreso guardado la consulta no devuelve filas
+            return Registro(**d.progreso) if d.progreso else SimpleNamespace(single=lambda: None)
+        assert q == Q.GUARDAR_PROGRESO_CONSISTENCIA
+        d.progreso = dict(p)
+        d.guardados += 1
+        return Registro()
+
+    def execute_write(self, fn):
+        return fn(self)
+
+
+class DriverFalso:
+    def __init__(self):
+        self.malas = set(MALAS)
+        self.progreso = None
+        self.desdes = []
+        self.reparaciones = []
+        self.guardados = 0
+
+    def session(self, **opciones):
+        return SesionFalsa(self)
+
+
+class VerificarTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = DriverFalso()
+
+    def test_pasada_completa_por_bloques(self):
+        r = verificar(self.driver, REGLA, lote=3, muestras=2)
+        self.assertEqual((r.revisados, r.violaciones, r.reparadas), (10, 4, 0))
+        self.assertEqual(r.muestra, ["k02", "k03"])
+        self.assertIsNone(r.cursor)
+        self.assertEqual(self.driver.desdes, ["", "k03", "k06", "k09", "k10"])
+        # Un guardado por bloque y otro al terminar la pasada
+        self.assertEqual(self.driver.guardados, 5)
+        self.assertIsNone(self.driver.progreso["cursor"])
+
+    def test_reanuda_desde_el_cursor_guardado(self):
+        r = verificar(self.driver, REGLA, lote=3, max_lotes=2)
+        self.assertEqual((r.revisados, r.violaciones, r.cursor), (6, 3, "k06"))
+        self.driver.desdes.clear()
+
+        r = verificar(self.driver, REGLA, lote=3, reanudar=True)
+        self.assertEqual(self.driver.desdes, ["k06", "k09", "k10"])
+        self.assertEqual((r.revisados, r.violaciones, r.cursor), (10, 4, None))
+        self.assertEqual(r.muestra, ["k02", "k03", "k05", "k09"])
+
+        # Una pasada terminada no se reanuda: vuelve a empezar
+        self.driver.desdes.clear()
+        r = verificar(self.driver, REGLA, lote=3, reanudar=True, max_lotes=1)
+        self.assertEqual(self.driver.desdes, [""])
+        self.assertEqual(r.revisados, 3)
+
+    def test_repara_cada_bloque_en_una_escritura(self):
+        r = verificar(self.driver, REGLA, lote=3, reparar=True)
+        self.assertEqual(self.driver.reparaciones, [["k02", "k03"], ["k05"], ["k09"]])
+        self.assertEqual((r.violaciones, r.reparadas), (4, 4))
+        self.assertEqual(self.driver.malas, set())
+
+        r = verificar(self.driver, REGLA, lote=3, reparar=True)
+        self.assertEqual((r.violaciones, r.reparadas), (0, 0))
+        self.assertEqual(len(self.driver.reparaciones), 3)
+
+    def test_regla_sin_reparacion(self):
+        regla = Regla("solo_lectura", "Claves malas", bloque="BLOQUE")
+        r = verificar(self.driver, regla, lote=5, reparar=True, reanudar=True)
+        self.assertEqual((r.violaciones, r.reparadas), (4, 0))
+        self.assertEqual(self.driver.reparaciones, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+# test_instantanea_grafo.py
+# Instantánea CSR escrita desde un driver falso, y la bitácora aplicada encima
+# por GrafoLocal. No hace falta Neo4j.
+#
+#   python -m unittest discover tests
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import database  # noqa: E402
+import instantanea_grafo as G  # noqa: E402
+from consultas import INSTANTANEA_ADYACENCIA  # noqa: E402
+
+USUARIOS = {"ana@x": "Ana", "bruno@x": "Bruno", "carla@x": "Carla", "dani@x": "Dani"}
+ARISTAS = {
+    "AMIGO_DE": {"ana@x": ["bruno@x", "carla@x"], "bruno@x": ["ana@x"], "carla@x": ["ana@x"]},
+    "SIGUE": {"ana@x": ["bruno@x"], "carla@x": ["ana@x", "bruno@x"]},
+}
+
+
+class SesionFalsa:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def run(self, q, desde, pagina):
+        tipo, = [t for t, consulta in INSTANTANEA_ADYACENCIA.items() if consulta == q]
+        filas = [{"email": e, "destinos": d} for e, d in sorted(ARISTAS[tipo].items()) if e > desde]
+        return filas[:pagina]
+
+
+class DriverFalso:
+    def session(self, **opciones):
+        return SesionFalsa()
+
+
+def leer_columnas(driver, q, columnas, fetch_size):
+    emails = sorted(USUARIOS)
+    return {"email": emails, "nombre": [USUARIOS[e] for e in emails]}
+
+
+class GrafoLocalTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.dir, "grafo.csr")
+        with mock.patch.object(G, "leer_columnas", leer_columnas):
+            G.escribir(DriverFalso(), self.ruta, pagina=2)
+        self.grafo = G.GrafoLocal(self.ruta)
+
+    def tearDown(self):
+        self.grafo.cerrar()
+        shutil.rmtree(self.dir)
+
+    def anotar(self, *cambios, completa=True):
+        with open(self.ruta + ".log", "a") as f:
+            for cambio in cambios:
+                f.write(json.dumps(cambio) + ("\n" if completa else ""))
+        return self.grafo.actualizar()
+
+    def test_lee_la_instantanea(self):
+        self.assertEqual(self.grafo.cabecera["aristas"], {"AMIGO_DE": 4, "SIGUE": 3})
+        self.assertEqual(self.grafo.amigos("ana@x"), ["bruno@x", "carla@x"])
+        self.assertEqual(self.grafo.seguidos("carla@x"), ["ana@x", "bruno@x"])
+        self.assertEqual(self.grafo.amigos_en_comun("bruno@x", "carla@x"), ["Ana"])
+        self.assertEqual(self.grafo.nombre(self.grafo._id("dani@x")), "Dani")
+        self.assertEqual(self.grafo.amigos("nadie@x"), [])
+
+    def test_aplica_aristas_de_la_bitacora(self):
+        self.anotar({"op": "+", "tipo": "AMIGO_DE", "a": "bruno@x", "b": "dani@x"},
+                    {"op": "-", "tipo": "SIGUE", "a": "carla@x", "b": "ana@x"})
+        self.assertEqual(self.grafo.amigos("dani@x"), ["bruno@x"])
+        self.assertEqual(self.grafo.amigos("bruno@x"), ["ana@x", "dani@x"])
+        self.assertEqual(self.grafo.seguidos("carla@x"), ["bruno@x"])
+        self.assertEqual(self.grafo.cambios, 2)
+
+    def test_linea_a_medio_escribir_espera(self):
+        cambio = {"op": "+", "tipo": "SIGUE", "a": "dani@x", "b": "ana@x"}
+        self.assertEqual(self.anotar(cambio, completa=False), 0)
+        self.assertEqual(self.grafo.seguidos("dani@x"), [])
+        with open(self.ruta + ".log", "a") as f:
+            f.write("\n")
+        self.assertEqual(self.grafo.actualizar(), 1)
+        self.assertEqual(self.grafo.seguidos("dani@x"), ["ana@x"])
+
+    def test_usuario_nuevo_solo_por_entrada_usuario(self):
+        self.anotar({"op": "+", "tipo": "AMIGO_DE", "a": "ana@x", "b": "eva@x"})
+        self.assertIsNone(self.grafo._id("eva@x"))
+        self.assertEqual(self.grafo.amigos("ana@x"), ["bruno@x", "carla@x"])
+        self.anotar({"op": "usuario", "a": "eva@x", "nombre": "Eva"},
+                    {"op": "+", "tipo": "AMIGO_DE", "a": "ana@x", "b": "eva@x"})
+        self.assertEqual(self.grafo.amigos("eva@x"), ["ana@x"])
+        self.assertEqual(self.grafo.nombre(self.grafo._id("eva@x")), "Eva")
+
+    def test_usuario_eliminado_y_recreado(self):
+        self.anotar({"op": "-usuario", "a": "ana@x"})
+        self.assertEqual(self.grafo.amigos("ana@x"), [])
+        self.assertEqual(self.grafo.amigos("bruno@x"), [])
+        # Una arista hacia un usuario eliminado no revive nada
+        self.anotar({"op": "+", "tipo": "AMIGO_DE", "a": "bruno@x", "b": "ana@x"})
+        self.assertEqual(self.grafo.amigos("bruno@x"), [])
+
+        self.anotar({"op": "usuario", "a": "ana@x", "nombre": "Ana 2"},
+                    {"op": "+", "tipo": "AMIGO_DE", "a": "ana@x", "b": "dani@x"})
+        # Vuelve sin las aristas de la instantánea, que se borraron con ella
+        self.assertEqual(self.grafo.amigos("ana@x"), ["dani@x"])
+        self.assertEqual(self.grafo.amigos("carla@x"), [])
+        self.assertEqual(self.grafo.seguidos("carla@x"), ["bruno@x"])
+        self.assertEqual(self.grafo.nombre(self.grafo._id("ana@x")), "Ana 2")
+
+
+class BitacoraTest(unittest.TestCase):
+    """database.py solo anota las escrituras que cambiaron el grafo."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.bitacora = os.path.join(self.dir, "grafo.csr.log")
+        open(self.bitacora, "w").close()
+        parche = mock.patch.object(database, "BITACORA_GRAFO", self.bitacora)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def driver(self, **contadores):
+        resumen = SimpleNamespace(counters=SimpleNamespace(**contadores))
+        resultado = SimpleNamespace(consume=lambda: resumen)
+        sesion = mock.MagicMock()
+        sesion.__enter__.return_value.run.return_value = resultado
+        return SimpleNamespace(session=lambda: sesion)
+
+    def anotadas(self):
+        with open(self.bitacora) as f:
+            return [json.loads(linea) for linea in f]
+
+    def test_anota_solo_si_cambio(self):
+        database.create_amistad(self.driver(relationships_created=0), "ana@x", "nadie@x")
+        database.eliminar_seguimiento(self.driver(relationships_deleted=0), "ana@x", "bruno@x")
+        database.eliminar_usuario(self.driver(nodes_deleted=0), "nadie@x")
+        self.assertEqual(self.anotadas(), [])
+
+        database.create_seguimiento(self.driver(relationships_created=1), "ana@x", "bruno@x")
+        database.eliminar_amistad(self.driver(relationships_deleted=1), "ana@x", "bruno@x")
+        self.assertEqual(self.anotadas(), [
+            {"op": "+", "a": "ana@x", "tipo": "SIGUE", "b": "bruno@x"},
+            {"op": "-", "a": "ana@x", "tipo": "AMIGO_DE", "b": "bruno@x"},
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
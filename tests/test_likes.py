@@ -0,0 +1,76 @@
+# test_likes.py
+# AgregadorLikes con la escritura por lotes sustituida: agrupación de los
+# incrementos por publicación y reintento de un flush fallido.
+#
+#   python -m unittest discover tests
+import contextlib
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import likes  # noqa: E402
+
+
+class EscrituraFalsa:
+    def __init__(self):
+        self.lotes = []
+        self.fallar = 0
+
+    def __call__(self, driver, deltas):
+        if self.fallar:
+            self.fallar -= 1
+            raise ConnectionError("sin conexión")
+        self.lotes.append(dict(deltas))
+
+
+class AgregadorLikesTest(unittest.TestCase):
+    def setUp(self):
+        self.escritura = EscrituraFalsa()
+        parche = mock.patch.object(likes, "incrementar_likes_lote", self.escritura)
+        parche.start()
+        self.addCleanup(parche.stop)
+        # Intervalo largo: los flushes de los tests son los explícitos
+        self.agregador = likes.AgregadorLikes(driver=None, intervalo=60)
+        self.addCleanup(self.agregador.cerrar)
+
+    def test_agrupa_por_publicacion(self):
+        for _ in range(1000):
+            self.agregador.agregar("p1")
+        self.agregador.agregar("p2", 5)
+        self.agregador.agregar("p3", 2)
+        self.agregador.agregar("p3", -2)
+        self.assertEqual(self.agregador.flush(), 2)
+        self.assertEqual(self.escritura.lotes, [{"p1": 1000, "p2": 5}])
+        self.assertEqual(self.agregador.flush(), 0)
+        self.assertEqual(self.escritura.lotes, [{"p1": 1000, "p2": 5}])
+        stats = self.agregador.estadisticas()
+        self.assertEqual((stats["incrementos"], stats["escrituras"], stats["flushes"]), (1003, 2, 1))
+        self.assertAlmostEqual(stats["ratio_coalescencia"], 501.5)
+
+    def test_flush_fallido_se_reintenta(self):
+        self.agregador.agregar("p1", 3)
+        self.escritura.fallar = 1
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.agregador.flush(), 0)
+        self.assertEqual(self.agregador.estadisticas()["pendientes"], 1)
+        # Lo que llega entre medias se suma a lo que volvió a la cola
+        self.agregador.agregar("p1", 2)
+        self.agregador.agregar("p2")
+        self.assertEqual(self.agregador.flush(), 2)
+        self.assertEqual(self.escritura.lotes, [{"p1": 5, "p2": 1}])
+        stats = self.agregador.estadisticas()
+        self.assertEqual((stats["errores"], stats["pendientes"], stats["flushes"]), (1, 0, 1))
+
+    def test_cerrar_escribe_lo_pendiente(self):
+        self.agregador.agregar("p1")
+        self.agregador.cerrar()
+        self.assertEqual(self.escritura.lotes, [{"p1": 1}])
+        self.assertFalse(self.agregador._hilo.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# test_recomendaciones.py
+# Recomendador sobre un driver falso: vectores de etiquetas, ediciones y la
+# invalidación selectiva de la caché. No hace falta Neo4j.
+#
+#   python -m unittest discover tests
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from recomendaciones import Recomendador  # noqa: E402
+
+ETIQUETAS = {
+    "ana@x": ["neo4j", "python"],
+    "bruno@x": ["neo4j", "python", "python"],
+    "carla@x": ["cocina"],
+    "dani@x": ["cocina", "viajes"],
+    "eva@x": ["viajes"],
+}
+
+
+class SesionFalsa:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def run(self, q, **params):
+        # Las dos consultas del recomendador se distinguen por sus parámetros
+        if "desde" in params:
+            filas = [{"email": e, "etiquetas": t} for e, t in sorted(ETIQUETAS.items())
+                     if e > params["desde"]]
+            return filas[:params["pagina"]]
+        self.driver.consultas.append(params["email"])
+        return [{"email": e} for e in self.driver.seguidos.get(params["email"], [])]
+
+
+class DriverFalso:
+    def __init__(self):
+        self.seguidos = {}
+        self.consultas = []
+
+    def session(self, **opciones):
+        return SesionFalsa(self)
+
+
+class RecomendadorTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = DriverFalso()
+        self.r = Recomendador(self.driver, k=2)
+        self.r.construir()
+
+    def emails(self, email):
+        return [e for e, _ in self.r.recomendar(email)]
+
+    def test_recomienda_por_afinidad_sin_seguidos(self):
+        self.assertEqual(self.emails("ana@x"), ["bruno@x"])
+        self.assertEqual(self.emails("carla@x"), ["dani@x"])
+        self.driver.seguidos["carla@x"] = ["dani@x"]
+        self.r.invalidar("carla@x")
+        self.assertEqual(self.emails("carla@x"), [])
+
+    def test_publicacion_solo_invalida_las_listas_afectadas(self):
+        for email in ETIQUETAS:
+            self.r.recomendar(email)
+        self.driver.consultas.clear()
+        # eva se acerca a carla y dani; las listas de ana y bruno no la verían
+        self.r.registrar_publicacion("eva@x", ["cocina"])
+        self.assertEqual(sorted(self.r._cache), ["ana@x", "bruno@x"])
+        self.assertEqual(self.emails("carla@x"), ["dani@x", "eva@x"])
+        self.emails("ana@x")
+        self.assertEqual(self.driver.consultas, ["carla@x"])
+
+    def test_editar_y_borrar_publicacion(self):
+        self.r.editar_publicacion("ana@x", ["neo4j", "python"], ["cocina"])
+        self.assertEqual(self.emails("ana@x"), ["carla@x", "dani@x"])
+        self.r.editar_publicacion("ana@x", ["cocina"], [])
+        self.assertEqual(self.r.normas[self.r.fila["ana@x"]], 0)
+        self.assertEqual(self.emails("ana@x"), [])
+        self.assertNotIn("ana@x", self.emails("carla@x"))
+        # Borrar una publicación de alguien sin vector no crea su fila
+        self.r.editar_publicacion("nadie@x", ["cocina"], [])
+        self.assertNotIn("nadie@x", self.r.fila)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,282 @@
+# test_servidor.py
+# Peticiones HTTP reales contra servidor.Servidor con un backend falso en
+# memoria: no hace falta Neo4j.
+#
+#   python -m unittest discover tests
+import asyncio
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from servidor import Servidor  # noqa: E402
+
+
+@dataclass
+class UsuarioFalso:
+    id: str
+    nombre: str
+    email: str
+    fechaRegistro: str
+
+
+@dataclass
+class PublicacionFalsa:
+    contenido: str
+    fecha: str
+    likes: int
+    etiquetas: List[str]
+
+
+class LikesFalsos:
+    def __init__(self):
+        self.pendientes = {}
+
+    def agregar(self, post_id, delta=1):
+        self.pendientes[post_id] = self.pendientes.get(post_id, 0) + delta
+
+    def estadisticas(self):
+        return {"pendientes": len(self.pendientes)}
+
+    def cerrar(self):
+        pass
+
+
+class RecomendadorFalso:
+    def __init__(self):
+        self.construido = False
+        self.publicaciones = []
+        self.ediciones = []
+        self.invalidados = []
+
+    def construir(self):
+        self.construido = True
+
+    def recomendar(self, email):
+        return [("b@x.com", 0.5)]
+
+    def registrar_publicacion(self, email, etiquetas):
+        self.publicaciones.append((email, list(etiquetas), threading.current_thread().name))
+
+    def editar_publicacion(self, email, anteriores, nuevas):
+        self.ediciones.append((email, anteriores, nuevas))
+
+    def invalidar(self, email=None):
+        self.invalidados.append(email)
+
+
+def backend_falso():
+    usuarios = {}
+    seguidores = ["s%02d@x.com" % i for i in range(5)]
+    db = SimpleNamespace(
+        ORDENES_USUARIO={"email": "u.email"}, ORDENES_PUBLICACION={"fecha": "p.fecha"},
+        UsuarioInput=UsuarioFalso, PublicacionInput=PublicacionFalsa,
+        usuarios=usuarios, publicaciones=[], ediciones=[], likes=LikesFalsos(), recomendadores=[],
+    )
+
+    def insert_usuario(driver, u):
+        usuarios[u.email] = {"email": u.email, "nombre": u.nombre}
+
+    def usuarios_pagina(driver, skip, limit, orden, desc):
+        return sorted(usuarios.values(), key=lambda u: u["email"], reverse=desc)[skip:skip + limit]
+
+    def create_publicacion(driver, email, pub):
+        db.publicaciones.append((email, pub))
+
+    def paginar(driver, email, cursor, limit):
+        inicio = seguidores.index(cursor) + 1 if cursor else 0
+        filas = [{"email": e} for e in seguidores[inicio:inicio + limit]]
+        siguiente = filas[-1]["email"] if inicio + limit < len(seguidores) else None
+        return filas, siguiente
+
+    def actualizar_etiquetas(driver, post_id, etiquetas):
+        db.ediciones.append((post_id, etiquetas))
+        return "a@x.com", ["viejo"]
+
+    def recomendador(driver):
+        r = RecomendadorFalso()
+        db.recomendadores.append(r)
+        return r
+
+    db.insert_usuario = insert_usuario
+    db.usuarios_pagina = usuarios_pagina
+    db.create_publicacion = create_publicacion
+    db.seguidores = db.seguidos = paginar
+    db.find_usuarios = lambda driver, emails: {e: usuarios[e] for e in emails if e in usuarios}
+    db.publicaciones_por_usuarios = lambda driver, emails, n: {e: [] for e in emails}
+    db.actualizar_etiquetas = actualizar_etiquetas
+    db.actualizar_publicacion = lambda driver, post_id, contenido, likes: db.ediciones.append(
+        (post_id, contenido, likes))
+    db.eliminar_publicacion = lambda driver, post_id: ("a@x.com", ["neo4j"]) if post_id == "p1" else None
+    db.create_seguimiento = lambda driver, a, b: None
+    db.agregador_likes = lambda driver: db.likes
+    db.recomendador = recomendador
+    return db
+
+
+class GrafoFalso:
+    """GrafoLocal que se queda en sugerencias_de_amigos hasta que se lo suelta."""
+
+    def __init__(self):
+        self.soltar = threading.Event()
+        self.hilos = []
+
+    def actualizar(self):
+        self.hilos.append(threading.current_thread().name)
+
+    def sugerencias_de_amigos(self, email):
+        self.soltar.wait(5)
+        return ["Carla"]
+
+
+class ServidorBase(unittest.TestCase):
+    grafo = None
+
+    def setUp(self):
+        self.db = backend_falso()
+        self.loop = asyncio.new_event_loop()
+        self.hilo = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.hilo.start()
+
+        async def iniciar():
+            servidor = Servidor(None, backend=self.db, puerto=0, max_concurrentes=4, grafo=self.grafo)
+            await servidor.iniciar()
+            return servidor
+
+        self.servidor = self._en_loop(iniciar())
+
+    def tearDown(self):
+        self._en_loop(self.servidor.cerrar(timeout=1))
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.hilo.join()
+        self.loop.close()
+
+    def _en_loop(self, corrutina):
+        return asyncio.run_coroutine_threadsafe(corrutina, self.loop).result(timeout=5)
+
+    def pedir(self, metodo, ruta, cuerpo=None):
+        conexion = http.client.HTTPConnection("127.0.0.1", self.servidor.puerto, timeout=5)
+        try:
+            conexion.request(metodo, ruta, body=None if cuerpo is None else json.dumps(cuerpo),
+                             headers={"Connection": "close"})
+            r = conexion.getresponse()
+            datos = r.read()
+            return r.status, json.loads(datos) if datos else None
+        finally:
+            conexion.close()
+
+
+class ServidorTest(ServidorBase):
+    def test_crear_y_listar_usuarios(self):
+        for email in ["b@x.com", "a@x.com"]:
+            estado, _ = self.pedir("POST", "/usuarios", {
+                "id": email, "nombre": email[0], "email": email, "fechaRegistro": "2024-01-01"})
+            self.assertEqual(estado, 201)
+        estado, usuarios = self.pedir("GET", "/usuarios?orden=email")
+        self.assertEqual(estado, 200)
+        self.assertEqual([u["email"] for u in usuarios], ["a@x.com", "b@x.com"])
+        self.assertEqual(self.pedir("GET", "/usuarios?orden=edad")[0], 400)
+        self.assertEqual(self.pedir("POST", "/usuarios", {"email": "c@x.com"})[0], 400)
+
+    def test_paginas_de_seguidores(self):
+        vistos, cursor = [], None
+        while True:
+            ruta = "/usuarios/a@x.com/seguidores?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            estado, pagina = self.pedir("GET", ruta)
+            self.assertEqual(estado, 200)
+            vistos += [f["email"] for f in pagina["filas"]]
+            cursor = pagina["siguiente"]
+            if cursor is None:
+                break
+        self.assertEqual(len(vistos), 5)
+
+    def test_likes_usan_el_agregador_del_backend(self):
+        for _ in range(3):
+            self.assertEqual(self.pedir("POST", "/publicaciones/p1/likes", {"delta": 2})[0], 202)
+        self.assertEqual(self.db.likes.pendientes, {"p1": 6})
+        estado, metricas = self.pedir("GET", "/metricas")
+        self.assertEqual(metricas["likes"], {"pendientes": 1})
+
+    def test_recomendaciones_y_publicacion_nueva(self):
+        estado, recs = self.pedir("GET", "/usuarios/a@x.com/recomendaciones")
+        self.assertEqual(estado, 200)
+        self.assertEqual([r["email"] for r in recs], ["b@x.com"])
+        recomendador, = self.db.recomendadores
+        self.assertTrue(recomendador.construido)
+
+        estado, _ = self.pedir("POST", "/usuarios/a@x.com/publicaciones", {
+            "contenido": "hola", "fecha": "2024-01-01", "etiquetas": ["neo4j"]})
+        self.assertEqual(estado, 201)
+        self.assertEqual(self.db.publicaciones[0][1].etiquetas, ["neo4j"])
+        email, etiquetas, hilo = recomendador.publicaciones[0]
+        self.assertEqual((email, etiquetas), ("a@x.com", ["neo4j"]))
+        self.assertTrue(hilo.startswith("api"))
+
+    def test_editar_publicacion(self):
+        self.assertEqual(self.pedir("PATCH", "/publicaciones/p1", {"contenido": "nuevo"})[0], 400)
+        self.assertEqual(self.db.ediciones, [])
+        estado, _ = self.pedir("PATCH", "/publicaciones/p1", {"contenido": "nuevo", "likes": 3,
+                                                             "etiquetas": ["neo4j"]})
+        self.assertEqual(estado, 204)
+        self.assertEqual(self.db.ediciones, [("p1", ["neo4j"]), ("p1", "nuevo", 3)])
+
+    def test_ediciones_y_seguimientos_llegan_al_recomendador(self):
+        self.pedir("GET", "/usuarios/a@x.com/recomendaciones")
+        recomendador, = self.db.recomendadores
+        self.pedir("PATCH", "/publicaciones/p1", {"etiquetas": ["nuevo"]})
+        self.assertEqual(self.pedir("DELETE", "/publicaciones/p1")[0], 204)
+        self.assertEqual(self.pedir("DELETE", "/publicaciones/p2")[0], 204)
+        self.assertEqual(recomendador.ediciones, [("a@x.com", ["viejo"], ["nuevo"]),
+                                                  ("a@x.com", ["neo4j"], [])])
+        self.pedir("PUT", "/usuarios/c@x.com/seguidos/a@x.com")
+        self.assertEqual(recomendador.invalidados, ["c@x.com"])
+
+    def test_lock_del_recomendador_no_bloquea_el_event_loop(self):
+        self.pedir("GET", "/usuarios/a@x.com/recomendaciones")
+        respuestas = []
+        with self.servidor._lock_recomendador:
+            publicar = threading.Thread(target=lambda: respuestas.append(self.pedir(
+                "POST", "/usuarios/a@x.com/publicaciones", {"contenido": "x", "fecha": "2024-01-01"})))
+            publicar.start()
+            time.sleep(0.2)
+            # La publicación espera el lock en el pool; las demás rutas siguen respondiendo
+            self.assertEqual(self.pedir("GET", "/salud"), (200, {"estado": "ok"}))
+            self.assertEqual(respuestas, [])
+        publicar.join(timeout=5)
+        self.assertEqual(respuestas[0][0], 201)
+
+
+class ServidorGrafoLocalTest(ServidorBase):
+
+    def setUp(self):
+        self.grafo = GrafoFalso()
+        super().setUp()
+
+    def tearDown(self):
+        self.grafo.soltar.set()
+        super().tearDown()
+
+    def test_grafo_local_no_bloquea_el_event_loop(self):
+        respuestas = []
+        sugerir = threading.Thread(target=lambda: respuestas.append(
+            self.pedir("GET", "/usuarios/a@x.com/sugerencias")))
+        sugerir.start()
+        time.sleep(0.2)
+        self.assertEqual(self.pedir("GET", "/salud"), (200, {"estado": "ok"}))
+        self.assertEqual(respuestas, [])
+        self.grafo.soltar.set()
+        sugerir.join(timeout=5)
+        self.assertEqual(respuestas, [(200, ["Carla"])])
+        self.assertTrue(self.grafo.hilos[0].startswith("api"))
+
+
+if __name__ == "__main__":
+    unittest.main()